@@ -1090,6 +1090,10 @@ def recog(args):
                                 nbest_hyps[n]["yseq"].extend(hyps[n]["yseq"])
                                 nbest_hyps[n]["score"] += hyps[n]["score"]
                     nbest_hyps = [nbest_hyps]
+                elif hasattr(model, "decoder_mode") and model.decoder_mode == "maskctc":
+                    nbest_hyps = model.recognize_maskctc_batch(
+                        feats, args, train_args.char_list
+                    )
                 else:
                     nbest_hyps = model.recognize_batch(
                         feats, args, train_args.char_list, rnnlm=rnnlm
@@ -151,6 +151,22 @@ def get_parser():
         default=True,
         help="Normalize transducer scores by length",
     )
+    parser.add_argument(
+        "--transducer-search-type",
+        type=str,
+        default="default",
+        choices=["default", "tsd"],
+        help="Beam search algorithm for transducer models. "
+        "'tsd' is the time synchronous decoding, "
+        "which expands all the hypotheses in one batch at each step",
+    )
+    parser.add_argument(
+        "--max-sym-exp",
+        type=int,
+        default=2,
+        help="Number of expansion steps per frame in the time synchronous decoding, "
+        "i.e. at most max-sym-exp - 1 labels are emitted per frame",
+    )
     # rnnlm related
     parser.add_argument(
         "--rnnlm", type=str, default=None, help="RNNLM model file to read"
@@ -12,6 +12,8 @@ from torch.nn.utils.rnn import pad_sequence
 
 from espnet.nets.beam_search import BeamSearch
 from espnet.nets.beam_search import Hypothesis
+from espnet.nets.scorer_interface import BatchPartialStackedStateScorerInterface
+from espnet.nets.scorer_interface import BatchStackedStateScorerInterface
 
 
 class BatchHypothesis(NamedTuple):
@@ -29,7 +31,27 @@ class BatchHypothesis(NamedTuple):
 
 
 class BatchBeamSearch(BeamSearch):
-    """Batch beam search implementation."""
+    """Batch beam search implementation.
+
+    If all the scorers implement
+    :class:`espnet.nets.scorer_interface.BatchStackedStateScorerInterface`,
+    the states of the running hypotheses are kept stacked over the hypotheses
+    and the hypotheses are updated without converting them to the list.
+    Otherwise, `BatchHypothesis.states` holds the list of the states
+    of each hypothesis.
+
+    """
+
+    @property
+    def use_stacked_states(self) -> bool:
+        """Whether the states of the running hypotheses are stacked."""
+        return all(
+            isinstance(d, BatchStackedStateScorerInterface)
+            for d in self.full_scorers.values()
+        ) and all(
+            isinstance(d, BatchPartialStackedStateScorerInterface)
+            for d in self.part_scorers.values()
+        )
 
     def batchfy(self, hyps: List[Hypothesis]) -> BatchHypothesis:
         """Convert list to batch."""
@@ -46,6 +68,18 @@ class BatchBeamSearch(BeamSearch):
         )
 
     def _batch_select(self, hyps: BatchHypothesis, ids: List[int]) -> BatchHypothesis:
+        if self.use_stacked_states:
+            ids = torch.as_tensor(ids, dtype=torch.long, device=hyps.yseq.device)
+            return BatchHypothesis(
+                yseq=hyps.yseq[ids],
+                score=hyps.score[ids],
+                length=hyps.length[ids],
+                scores={k: v[ids] for k, v in hyps.scores.items()},
+                states={
+                    k: self.scorers[k].select_stacked_state(v, ids)
+                    for k, v in hyps.states.items()
+                },
+            )
         return BatchHypothesis(
             yseq=hyps.yseq[ids],
             score=hyps.score[ids],
@@ -58,6 +92,18 @@ class BatchBeamSearch(BeamSearch):
         )
 
     def _select(self, hyps: BatchHypothesis, i: int) -> Hypothesis:
+        if self.use_stacked_states:
+            # The states of the hypothesis are stacked over one hypothesis
+            ids = torch.as_tensor([i], dtype=torch.long, device=hyps.yseq.device)
+            return Hypothesis(
+                yseq=hyps.yseq[i, : hyps.length[i]],
+                score=hyps.score[i],
+                scores={k: v[i] for k, v in hyps.scores.items()},
+                states={
+                    k: self.scorers[k].select_stacked_state(v, ids)
+                    for k, v in hyps.states.items()
+                },
+            )
         return Hypothesis(
             yseq=hyps.yseq[i, : hyps.length[i]],
             score=hyps.score[i],
@@ -118,6 +164,20 @@ class BatchBeamSearch(BeamSearch):
             Hypothesis: The initial hypothesis.
 
         """
+        if self.use_stacked_states:
+            return BatchHypothesis(
+                yseq=torch.tensor([[self.sos]], device=x.device),
+                score=torch.zeros(1, dtype=x.dtype, device=x.device),
+                length=torch.ones(1, dtype=torch.int64, device=x.device),
+                scores={
+                    k: torch.zeros(1, dtype=x.dtype, device=x.device)
+                    for k in self.scorers
+                },
+                states={
+                    k: d.batch_init_stacked_state(x) for k, d in self.scorers.items()
+                },
+            )
+
         init_states = dict()
         init_scores = dict()
         for k, d in self.scorers.items():
@@ -154,7 +214,10 @@ class BatchBeamSearch(BeamSearch):
         scores = dict()
         states = dict()
         for k, d in self.full_scorers.items():
-            scores[k], states[k] = d.batch_score(hyp.yseq, hyp.states[k], x)
+            if self.use_stacked_states:
+                scores[k], states[k] = d.batch_score_stacked(hyp.yseq, hyp.states[k], x)
+            else:
+                scores[k], states[k] = d.batch_score(hyp.yseq, hyp.states[k], x)
         return scores, states
 
     def score_partial(
@@ -178,9 +241,14 @@ class BatchBeamSearch(BeamSearch):
         scores = dict()
         states = dict()
         for k, d in self.part_scorers.items():
-            scores[k], states[k] = d.batch_score_partial(
-                hyp.yseq, ids, hyp.states[k], x
-            )
+            if self.use_stacked_states:
+                scores[k], states[k] = d.batch_score_partial_stacked(
+                    hyp.yseq, ids, hyp.states[k], x
+                )
+            else:
+                scores[k], states[k] = d.batch_score_partial(
+                    hyp.yseq, ids, hyp.states[k], x
+                )
         return scores, states
 
     def merge_states(self, states: Any, part_states: Any, part_idx: int) -> Any:
@@ -243,6 +311,17 @@ class BatchBeamSearch(BeamSearch):
             dtype=x.dtype, device=x.device
         ).unsqueeze(1)
 
+        if self.use_stacked_states:
+            return self._stacked_update(
+                running_hyps,
+                weighted_scores,
+                part_ids,
+                scores,
+                states,
+                part_scores,
+                part_states,
+            )
+
         # TODO(karita): do not use list. use batch instead
         # see also https://github.com/espnet/espnet/pull/1402#discussion_r354561029
         # update hyps
@@ -283,6 +362,62 @@ class BatchBeamSearch(BeamSearch):
             )
         return self.batchfy(best_hyps)
 
+    def _stacked_update(
+        self,
+        running_hyps: BatchHypothesis,
+        weighted_scores: torch.Tensor,
+        part_ids: torch.Tensor,
+        scores: Dict[str, torch.Tensor],
+        states: Dict[str, Any],
+        part_scores: Dict[str, torch.Tensor],
+        part_states: Dict[str, Any],
+    ) -> BatchHypothesis:
+        """Select the best hypotheses keeping the states stacked.
+
+        This is equivalent to the update of the hypotheses in `search`
+        without converting them to the list of `Hypothesis`.
+
+        """
+        (
+            full_prev_hyp_ids,
+            full_new_token_ids,
+            part_prev_hyp_ids,
+            part_new_token_ids,
+        ) = self.batch_beam(weighted_scores, part_ids)
+        n_batch = len(full_prev_hyp_ids)
+
+        yseq = running_hyps.yseq[full_prev_hyp_ids]
+        length = running_hyps.length[full_prev_hyp_ids]
+        yseq = torch.cat((yseq, yseq.new_full((n_batch, 1), self.eos)), dim=1).scatter_(
+            1, length.unsqueeze(1), full_new_token_ids.unsqueeze(1)
+        )
+
+        new_scores = dict()
+        new_states = dict()
+        for k, v in scores.items():
+            new_scores[k] = (
+                running_hyps.scores[k][full_prev_hyp_ids]
+                + v[full_prev_hyp_ids, full_new_token_ids]
+            )
+            new_states[k] = self.full_scorers[k].select_stacked_state(
+                states[k], full_prev_hyp_ids
+            )
+        for k, v in part_scores.items():
+            new_scores[k] = (
+                running_hyps.scores[k][part_prev_hyp_ids]
+                + v[part_prev_hyp_ids, part_new_token_ids]
+            )
+            new_states[k] = self.part_scorers[k].select_stacked_state(
+                part_states[k], part_prev_hyp_ids, part_new_token_ids
+            )
+        return BatchHypothesis(
+            yseq=yseq,
+            score=weighted_scores[full_prev_hyp_ids, full_new_token_ids],
+            length=length + 1,
+            scores=new_scores,
+            states=new_states,
+        )
+
     def post_process(
         self,
         i: int,
@@ -333,7 +468,7 @@ class BatchBeamSearch(BeamSearch):
             )
             running_hyps.yseq.resize_as_(yseq_eos)
             running_hyps.yseq[:] = yseq_eos
-            running_hyps.length[:] = len(yseq_eos)
+            running_hyps.length[:] = yseq_eos.shape[1]
 
         # add ended hypotheses to a final list, and removed them from current hypotheses
         # (this will be a probmlem, number of hyps < beam)
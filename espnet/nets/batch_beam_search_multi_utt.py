@@ -0,0 +1,340 @@
+"""Parallel beam search module for multiple utterances."""
+
+import logging
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Tuple
+
+import torch
+
+from espnet.nets.batch_beam_search import BatchBeamSearch
+from espnet.nets.batch_beam_search import BatchHypothesis
+from espnet.nets.beam_search import Hypothesis
+from espnet.nets.e2e_asr_common import end_detect
+
+
+class BatchBeamSearchMultiUtt(BatchBeamSearch):
+    """Batch beam search implementation for multiple utterances.
+
+    The running hypotheses of all the utterances are kept in a single
+    `BatchHypothesis` laid out as `(n_utt * n_hyps, ...)`,
+    i.e. the hypotheses of each utterance are contiguous.
+    The beam of each utterance is kept full: when a hypothesis ends,
+    its slot stays in the batch with `-inf` score so that
+    the search result is the same as `BatchBeamSearch` for each utterance.
+    The utterances whose search has finished are removed from the batch.
+
+    All the scorers must implement `BatchScorerInterface.batch_score_padded`
+    or `BatchPartialScorerInterface.batch_score_partial_padded`.
+    The states are always kept as the list of the states of each hypothesis.
+
+    """
+
+    @property
+    def use_stacked_states(self) -> bool:
+        """Disable the stacked states, which are not padded over the utterances."""
+        return False
+
+    def init_hyp_padded(
+        self, xs: torch.Tensor, xs_lens: torch.Tensor
+    ) -> BatchHypothesis:
+        """Get initial hypotheses for the padded utterances.
+
+        Args:
+            xs (torch.Tensor): The padded encoder output feature (n_utt, T, D)
+            xs_lens (torch.Tensor): The lengths of the encoder output (n_utt,)
+
+        Returns:
+            BatchHypothesis: The initial hypotheses, one per utterance.
+
+        """
+        n_utt = len(xs)
+        return BatchHypothesis(
+            yseq=torch.full((n_utt, 1), self.sos, dtype=torch.int64, device=xs.device),
+            score=torch.zeros(n_utt, dtype=xs.dtype, device=xs.device),
+            length=torch.ones(n_utt, dtype=torch.int64, device=xs.device),
+            scores={
+                k: torch.zeros(n_utt, dtype=xs.dtype, device=xs.device)
+                for k in self.scorers
+            },
+            states={
+                k: d.batch_init_state_padded(xs, xs_lens)
+                for k, d in self.scorers.items()
+            },
+        )
+
+    def score_full_padded(
+        self, hyp: BatchHypothesis, xs: torch.Tensor, xs_lens: torch.Tensor
+    ) -> Tuple[Dict[str, torch.Tensor], Dict[str, Any]]:
+        """Score new hypotheses by `self.full_scorers`.
+
+        Args:
+            hyp (BatchHypothesis): Hypotheses with prefix tokens to score
+            xs (torch.Tensor): The padded encoder output feature (n_utt, T, D)
+            xs_lens (torch.Tensor): The lengths of the encoder output (n_utt,)
+
+        Returns:
+            Tuple[Dict[str, torch.Tensor], Dict[str, Any]]: Tuple of
+                score dict of `hyp` that has string keys of `self.full_scorers`
+                and tensor score values of shape: `(n_batch, self.n_vocab)`,
+                and state dict that has string keys
+                and state values of `self.full_scorers`
+
+        """
+        scores = dict()
+        states = dict()
+        for k, d in self.full_scorers.items():
+            scores[k], states[k] = d.batch_score_padded(
+                hyp.yseq, hyp.states[k], xs, xs_lens
+            )
+        return scores, states
+
+    def score_partial_padded(
+        self,
+        hyp: BatchHypothesis,
+        ids: torch.Tensor,
+        xs: torch.Tensor,
+        xs_lens: torch.Tensor,
+    ) -> Tuple[Dict[str, torch.Tensor], Dict[str, Any]]:
+        """Score new hypotheses by `self.part_scorers`.
+
+        Args:
+            hyp (BatchHypothesis): Hypotheses with prefix tokens to score
+            ids (torch.Tensor): 2D tensor of new partial tokens to score
+            xs (torch.Tensor): The padded encoder output feature (n_utt, T, D)
+            xs_lens (torch.Tensor): The lengths of the encoder output (n_utt,)
+
+        Returns:
+            Tuple[Dict[str, torch.Tensor], Dict[str, Any]]: Tuple of
+                score dict of `hyp` that has string keys of `self.part_scorers`
+                and tensor score values of shape: `(n_batch, self.n_vocab)`,
+                and state dict that has string keys
+                and state values of `self.part_scorers`
+
+        """
+        scores = dict()
+        states = dict()
+        for k, d in self.part_scorers.items():
+            scores[k], states[k] = d.batch_score_partial_padded(
+                hyp.yseq, ids, hyp.states[k], xs, xs_lens
+            )
+        return scores, states
+
+    def search_padded(
+        self, running_hyps: BatchHypothesis, xs: torch.Tensor, xs_lens: torch.Tensor
+    ) -> BatchHypothesis:
+        """Search new tokens for running hypotheses of the padded utterances.
+
+        Args:
+            running_hyps (BatchHypothesis): Running hypotheses on beam
+            xs (torch.Tensor): The padded encoder output feature (n_utt, T, D)
+            xs_lens (torch.Tensor): The lengths of the encoder output (n_utt,)
+
+        Returns:
+            BatchHypothesis: Best hypotheses, `self.beam_size` per utterance
+
+        """
+        n_batch = len(running_hyps)
+        n_utt = len(xs)
+        n_hyps = n_batch // n_utt
+        part_ids = None  # no pre-beam
+        # batch scoring
+        weighted_scores = torch.zeros(
+            n_batch, self.n_vocab, dtype=xs.dtype, device=xs.device
+        )
+        scores, states = self.score_full_padded(running_hyps, xs, xs_lens)
+        for k in self.full_scorers:
+            weighted_scores += self.weights[k] * scores[k]
+        # partial scoring
+        if self.do_pre_beam:
+            pre_beam_scores = (
+                weighted_scores
+                if self.pre_beam_score_key == "full"
+                else scores[self.pre_beam_score_key]
+            )
+            part_ids = torch.topk(pre_beam_scores, self.pre_beam_size, dim=-1)[1]
+        part_scores, part_states = self.score_partial_padded(
+            running_hyps, part_ids, xs, xs_lens
+        )
+        for k in self.part_scorers:
+            weighted_scores += self.weights[k] * part_scores[k]
+        # add previous hyp scores (-inf for the ended hyps)
+        weighted_scores += running_hyps.score.unsqueeze(1)
+
+        # topk over (n_hyps * n_vocab) for each utterance
+        top_scores, top_ids = weighted_scores.view(n_utt, -1).topk(
+            self.beam_size, dim=1
+        )
+        offsets = torch.arange(n_utt, device=xs.device).unsqueeze(1) * n_hyps
+        prev_ids = (top_ids // self.n_vocab + offsets).view(-1)
+        new_token_ids = (top_ids % self.n_vocab).view(-1)
+
+        prev_ids_list = prev_ids.tolist()
+        new_token_ids_list = new_token_ids.tolist()
+        new_scores = dict()
+        for k, v in scores.items():
+            new_scores[k] = (
+                running_hyps.scores[k][prev_ids] + v[prev_ids, new_token_ids]
+            )
+        for k, v in part_scores.items():
+            new_scores[k] = (
+                running_hyps.scores[k][prev_ids] + v[prev_ids, new_token_ids]
+            )
+        new_states = dict()
+        for k, v in states.items():
+            new_states[k] = [
+                self.full_scorers[k].select_state(v, i) for i in prev_ids_list
+            ]
+        for k, v in part_states.items():
+            new_states[k] = [
+                self.part_scorers[k].select_state(v, i, j)
+                for i, j in zip(prev_ids_list, new_token_ids_list)
+            ]
+        return BatchHypothesis(
+            yseq=torch.cat(
+                (running_hyps.yseq[prev_ids], new_token_ids.unsqueeze(1)), dim=1
+            ),
+            score=top_scores.view(-1),
+            length=running_hyps.length[prev_ids] + 1,
+            scores=new_scores,
+            states=new_states,
+        )
+
+    def batch_forward(
+        self,
+        xs: torch.Tensor,
+        xs_lens: torch.Tensor,
+        maxlenratio: float = 0.0,
+        minlenratio: float = 0.0,
+    ) -> List[List[Hypothesis]]:
+        """Perform beam search for the padded utterances.
+
+        Args:
+            xs (torch.Tensor): The padded encoder output feature (n_utt, T, D)
+            xs_lens (torch.Tensor): The lengths of the encoder output (n_utt,)
+            maxlenratio (float): Input length ratio to obtain max output length.
+                If maxlenratio=0.0 (default), it uses a end-detect function
+                to automatically find maximum hypothesis lengths
+            minlenratio (float): Input length ratio to obtain min output length.
+
+        Returns:
+            list[list[Hypothesis]]: N-best decoding results for each utterance
+
+        """
+        n_utt = len(xs)
+        xs_lens = torch.as_tensor(xs_lens, device=xs.device)
+        # set length bounds
+        if maxlenratio == 0:
+            maxlens = xs_lens.tolist()
+        else:
+            maxlens = [max(1, int(maxlenratio * xlen)) for xlen in xs_lens.tolist()]
+        logging.info("decoder input lengths: " + str(xs_lens.tolist()))
+        logging.info("max output lengths: " + str(maxlens))
+
+        # main loop of prefix search
+        utt_ids = list(range(n_utt))
+        running_xs, running_lens = xs, xs_lens
+        running_hyps = self.init_hyp_padded(xs, xs_lens)
+        ended_hyps = [[] for _ in range(n_utt)]
+        for i in range(max(maxlens)):
+            logging.debug("position " + str(i))
+            best = self.search_padded(running_hyps, running_xs, running_lens)
+            # post process of one iteration
+            running_hyps, remained = self.post_process_padded(
+                i,
+                [maxlens[u] for u in utt_ids],
+                maxlenratio,
+                best,
+                [ended_hyps[u] for u in utt_ids],
+            )
+            if len(remained) == 0:
+                logging.info("no hypothesis. Finish decoding.")
+                break
+            if len(remained) < len(utt_ids):
+                utt_ids = [utt_ids[u] for u in remained]
+                remained = torch.tensor(remained, device=xs.device)
+                running_xs = running_xs[remained]
+                running_lens = running_lens[remained]
+            logging.debug(f"remained utterances: {len(utt_ids)}")
+
+        nbest_hyps = []
+        for u, hyps in enumerate(ended_hyps):
+            hyps = sorted(hyps, key=lambda x: x.score, reverse=True)
+            if len(hyps) == 0:
+                logging.warning(
+                    "there is no N-best results, perform recognition "
+                    "again with smaller minlenratio."
+                )
+                hyps = (
+                    []
+                    if minlenratio < 0.1
+                    else self.forward(
+                        xs[u, : xs_lens[u]], maxlenratio, max(0.0, minlenratio - 0.1)
+                    )
+                )
+            nbest_hyps.append(hyps)
+        return nbest_hyps
+
+    def post_process_padded(
+        self,
+        i: int,
+        maxlens: List[int],
+        maxlenratio: float,
+        running_hyps: BatchHypothesis,
+        ended_hyps: List[List[Hypothesis]],
+    ) -> Tuple[BatchHypothesis, List[int]]:
+        """Perform post-processing of beam search iterations.
+
+        Args:
+            i (int): The length of hypothesis tokens.
+            maxlens (List[int]): The maximum length of tokens for each utterance.
+            maxlenratio (int): The maximum length ratio in beam search.
+            running_hyps (BatchHypothesis): The running hypotheses in beam search.
+            ended_hyps (List[List[Hypothesis]]):
+                The ended hypotheses of each utterance in beam search.
+
+        Returns:
+            Tuple[BatchHypothesis, List[int]]: The new running hypotheses
+                and the indices of the utterances which are still running.
+
+        """
+        n_utt = len(maxlens)
+        n_hyps = len(running_hyps) // n_utt
+        alive = running_hyps.score > float("-inf")
+        is_eos = running_hyps.yseq[:, -1] == self.eos
+        # add eos in the final loop to avoid that there are no ended hyps
+        is_last = torch.tensor(
+            [i == maxlen - 1 for maxlen in maxlens], device=alive.device
+        ).repeat_interleave(n_hyps)
+        for b in torch.nonzero(alive & (is_eos | is_last)).view(-1).tolist():
+            hyp = self._select(running_hyps, b)
+            if is_last[b]:
+                hyp = hyp._replace(yseq=self.append_token(hyp.yseq, self.eos))
+            ended_hyps[b // n_hyps].append(hyp)
+
+        # the ended slots are kept in the beam with -inf score
+        alive = alive & ~is_eos & ~is_last
+        running_hyps = BatchHypothesis(
+            yseq=running_hyps.yseq,
+            score=running_hyps.score.masked_fill(~alive, float("-inf")),
+            length=running_hyps.length,
+            scores=running_hyps.scores,
+            states=running_hyps.states,
+        )
+        n_alive = alive.view(n_utt, n_hyps).sum(1).tolist()
+        remained = []
+        for u in range(n_utt):
+            if n_alive[u] == 0:
+                continue
+            # end detection
+            if maxlenratio == 0.0 and end_detect(
+                [h.asdict() for h in ended_hyps[u]], i
+            ):
+                logging.info(f"end detected at {i}")
+                continue
+            remained.append(u)
+        if len(remained) < n_utt:
+            ids = [u * n_hyps + j for u in remained for j in range(n_hyps)]
+            running_hyps = self._batch_select(running_hyps, ids)
+        return running_hyps, remained
@@ -0,0 +1,331 @@
+"""CTC prefix beam search module."""
+
+import logging
+from typing import List
+from typing import Tuple
+
+import torch
+
+from espnet.nets.beam_search import Hypothesis
+from espnet.nets.scorer_interface import BatchScorerInterface
+
+
+def _logaddexp(a: torch.Tensor, b: torch.Tensor) -> torch.Tensor:
+    # torch.logaddexp is available from PyTorch 1.6
+    return torch.logsumexp(torch.stack([a, b]), dim=0)
+
+
+class CTCPrefixBeamSearch(torch.nn.Module):
+    """Frame-synchronous CTC prefix beam search for a padded batch.
+
+    The prefixes of all the utterances are kept in `(n_utt, beam_size, ...)`
+    tensors and each frame is processed for all the utterances and
+    the hypotheses at once: the blank-ending and the non-blank-ending
+    probabilities of the prefixes are updated, the extension of a prefix
+    that reproduces another prefix in the beam is merged into it,
+    and the best `beam_size` candidates are selected by one `topk`.
+    Only `pre_beam_size` tokens of the highest CTC posteriors in each frame
+    are considered for the extensions. The frames after the end of
+    each utterance are treated as blank frames.
+
+    An LM can be fused through :class:`BatchScorerInterface`. It's applied
+    to the prefixes extended in each frame, which are grouped by the length.
+
+    See also Hannun et al. "First-Pass Large Vocabulary Continuous Speech
+    Recognition using Bi-Directional Recurrent DNNs," arXiv:1408.2873, 2014.
+
+    """
+
+    def __init__(
+        self,
+        ctc: torch.nn.Module,
+        beam_size: int,
+        sos: int,
+        eos: int,
+        blank: int = 0,
+        lm: BatchScorerInterface = None,
+        lm_weight: float = 0.0,
+        penalty: float = 0.0,
+        pre_beam_size: int = None,
+    ):
+        """Initialize CTC prefix beam search.
+
+        Args:
+            ctc (torch.nn.Module): The CTC module having `log_softmax`.
+                For example, :class:`espnet2.asr.ctc.CTC`
+            beam_size (int): The number of hypotheses kept during search
+            sos (int): Start of sequence id
+            eos (int): End of sequence id
+            blank (int): Blank id
+            lm (BatchScorerInterface): The LM for the shallow fusion
+            lm_weight (float): The weight of the LM scores
+            penalty (float): The bonus score for each token
+            pre_beam_size (int): The number of the tokens extending the prefixes
+                in each frame. Defaults to `int(1.5 * beam_size)`.
+
+        """
+        super().__init__()
+        self.ctc = ctc
+        self.lm = lm if lm_weight != 0 else None
+        self.beam_size = beam_size
+        self.sos = sos
+        self.eos = eos
+        self.blank = blank
+        self.lm_weight = lm_weight
+        self.penalty = penalty
+        self.pre_beam_size = (
+            int(1.5 * beam_size) if pre_beam_size is None else pre_beam_size
+        )
+
+    def forward(
+        self, x: torch.Tensor, maxlenratio: float = 0.0, minlenratio: float = 0.0
+    ) -> List[Hypothesis]:
+        """Perform CTC prefix beam search for an utterance.
+
+        Args:
+            x (torch.Tensor): Encoded speech feature (T, D)
+            maxlenratio (float): Unused. This is for the compatibility with
+                :class:`espnet.nets.beam_search.BeamSearch`.
+                The length of the prefixes is bounded by the number of frames.
+            minlenratio (float): Unused.
+
+        Returns:
+            list[Hypothesis]: N-best decoding results
+
+        """
+        xs_lens = torch.tensor([x.size(0)], device=x.device)
+        return self.batch_forward(x.unsqueeze(0), xs_lens)[0]
+
+    def batch_forward(
+        self,
+        xs: torch.Tensor,
+        xs_lens: torch.Tensor,
+        maxlenratio: float = 0.0,
+        minlenratio: float = 0.0,
+    ) -> List[List[Hypothesis]]:
+        """Perform CTC prefix beam search for zero-padded utterances.
+
+        Args:
+            xs (torch.Tensor): The padded encoded features (n_utt, T, D)
+            xs_lens (torch.Tensor): The lengths of the encoded features (n_utt,)
+            maxlenratio (float): Unused.
+            minlenratio (float): Unused.
+
+        Returns:
+            list[list[Hypothesis]]: N-best decoding results of each utterance
+
+        """
+        logp = self.ctc.log_softmax(xs)
+        n_utt, n_frames, n_vocab = logp.shape
+        device = logp.device
+        xs_lens = xs_lens.to(device)
+        # Blank frames after the end of each utterance
+        pad = torch.arange(n_frames, device=device)[None, :] >= xs_lens[:, None]
+        logp = logp.masked_fill(pad.unsqueeze(-1), float("-inf"))
+        logp[:, :, self.blank] = logp[:, :, self.blank].masked_fill(pad, 0.0)
+
+        beam = self.beam_size
+        pre_beam = min(self.pre_beam_size, n_vocab - 1)
+        neg_inf = logp.new_tensor(float("-inf"))
+        b_idx = torch.arange(n_utt, device=device).unsqueeze(1)
+        blank_id = torch.tensor([self.blank], device=device)
+
+        # The tokens of the prefixes without <sos> padded with -1
+        yseq = torch.full((n_utt, beam, n_frames), -1, dtype=torch.long, device=device)
+        # The length of the prefixes. -2 means the dead slot of the beam
+        length = torch.full((n_utt, beam), -2, dtype=torch.long, device=device)
+        length[:, 0] = 0
+        last = torch.full((n_utt, beam), -1, dtype=torch.long, device=device)
+        # log probabilities of the prefixes ending with blank and non-blank
+        p_b = logp.new_full((n_utt, beam), float("-inf"))
+        p_b[:, 0] = 0.0
+        p_nb = logp.new_full((n_utt, beam), float("-inf"))
+        lm_score = logp.new_zeros((n_utt, beam))
+        lm_logp, lm_states = self._init_lm(xs, n_vocab)
+
+        for t in range(n_frames):
+            lp = logp[:, t]
+            p_total = _logaddexp(p_b, p_nb)
+            # a. Keep the prefixes
+            stay_b = p_total + lp[:, self.blank].unsqueeze(1)
+            stay_nb = p_nb + lp.gather(1, last.clamp(min=0)).masked_fill(
+                last < 0, float("-inf")
+            )
+
+            # b. Merge the extensions which are equal to other prefixes:
+            # ext[w] + last[v] == prefix[v]
+            parent = yseq.scatter(2, (length - 1).clamp(min=0).unsqueeze(2), -1)
+            match = (length.unsqueeze(2) + 1 == length.unsqueeze(1)) & (
+                yseq[:, :, None, : t + 1] == parent[:, None, :, : t + 1]
+            ).all(-1)
+            # (n_utt, beam, beam)
+            src = torch.where(
+                last.unsqueeze(2) == last.unsqueeze(1),
+                p_b.unsqueeze(2),
+                p_total.unsqueeze(2),
+            ) + lp.gather(1, last.clamp(min=0)).unsqueeze(1)
+            src = src.masked_fill(~match, float("-inf"))
+            stay_nb = _logaddexp(stay_nb, torch.logsumexp(src, dim=1))
+
+            # c. Extend the prefixes with the tokens of the highest posteriors
+            lp_cand, cand = lp.index_fill(1, blank_id, float("-inf")).topk(
+                pre_beam, dim=1
+            )
+            ext = torch.where(
+                cand.unsqueeze(1) == last.unsqueeze(2),
+                p_b.unsqueeze(2),
+                p_total.unsqueeze(2),
+            ) + lp_cand.unsqueeze(1)
+            is_merged = (
+                match.unsqueeze(3) & (cand[:, None, None, :] == last[:, None, :, None])
+            ).any(2)
+            ext = ext.masked_fill(is_merged, float("-inf"))
+
+            # d. Select the best candidates of the kept and extended prefixes
+            lm_cand = lm_logp.gather(2, cand.unsqueeze(1).expand(-1, beam, -1))
+            stay_score = (
+                _logaddexp(stay_b, stay_nb)
+                + self.lm_weight * lm_score
+                + self.penalty * length
+            )
+            ext_score = (
+                ext
+                + self.lm_weight * (lm_score.unsqueeze(2) + lm_cand)
+                + self.penalty * (length + 1).unsqueeze(2)
+            )
+            best, best_ids = torch.cat(
+                [stay_score, ext_score.view(n_utt, -1)], dim=1
+            ).topk(beam, dim=1)
+            is_ext = best_ids >= beam
+            ext_ids = (best_ids - beam).clamp(min=0)
+            prev = torch.where(is_ext, ext_ids // pre_beam, best_ids)
+            token = cand.gather(1, ext_ids % pre_beam)
+
+            p_b = torch.where(is_ext, neg_inf, stay_b.gather(1, prev))
+            p_nb = torch.where(
+                is_ext,
+                ext.view(n_utt, -1).gather(1, ext_ids),
+                stay_nb.gather(1, prev),
+            )
+            lm_score = lm_score.gather(1, prev) + torch.where(
+                is_ext,
+                lm_cand.view(n_utt, -1).gather(1, ext_ids),
+                torch.zeros_like(lm_score),
+            )
+            last = torch.where(is_ext, token, last.gather(1, prev))
+            # Write the new tokens after the prefixes
+            length = length.gather(1, prev)
+            pos = length.clamp(min=0).unsqueeze(2)
+            yseq = yseq[b_idx, prev]
+            yseq.scatter_(
+                2,
+                pos,
+                torch.where(is_ext, token, torch.full_like(token, -1)).unsqueeze(2),
+            )
+            length = torch.where(
+                torch.isfinite(best), length + is_ext.long(), length.new_tensor(-2)
+            )
+            if self.lm is not None:
+                lm_logp, lm_states = self._update_lm(
+                    xs, yseq, length, is_ext, prev, lm_logp, lm_states
+                )
+
+        return self._to_hyps(yseq, length, p_b, p_nb, lm_score, lm_logp)
+
+    def _init_lm(self, xs: torch.Tensor, n_vocab: int) -> Tuple[torch.Tensor, list]:
+        n_utt = xs.size(0)
+        if self.lm is None:
+            return xs.new_zeros((n_utt, 1, n_vocab)).expand(-1, self.beam_size, -1), []
+        ys = torch.full((n_utt, 1), self.sos, dtype=torch.long, device=xs.device)
+        states = [self.lm.batch_init_state(x) for x in xs]
+        logp, states = self.lm.batch_score(ys, states, xs)
+        if states is None:
+            states = [None] * n_utt
+        lm_logp = logp.unsqueeze(1).repeat(1, self.beam_size, 1)
+        lm_states = [states[b] for b in range(n_utt) for _ in range(self.beam_size)]
+        return lm_logp, lm_states
+
+    def _update_lm(
+        self,
+        xs: torch.Tensor,
+        yseq: torch.Tensor,
+        length: torch.Tensor,
+        is_ext: torch.Tensor,
+        prev: torch.Tensor,
+        lm_logp: torch.Tensor,
+        lm_states: list,
+    ) -> Tuple[torch.Tensor, list]:
+        """Score the extended prefixes by the LM."""
+        n_utt, beam = length.shape
+        prev_flat = (
+            prev + torch.arange(n_utt, device=prev.device)[:, None] * beam
+        ).view(-1)
+        lm_logp = lm_logp.view(n_utt * beam, -1)[prev_flat]
+        lm_states = [lm_states[i] for i in prev_flat.tolist()]
+
+        length = length.view(-1)
+        ext_ids = torch.nonzero(is_ext.view(-1) & (length > 0)).view(-1)
+        for ylen in torch.unique(length[ext_ids]).tolist():
+            ids = ext_ids[length[ext_ids] == ylen]
+            ys = torch.cat(
+                [
+                    torch.full(
+                        (len(ids), 1), self.sos, dtype=torch.long, device=yseq.device
+                    ),
+                    yseq.view(n_utt * beam, -1)[ids, :ylen],
+                ],
+                dim=1,
+            )
+            ids_list = ids.tolist()
+            logp, states = self.lm.batch_score(
+                ys, [lm_states[i] for i in ids_list], xs[ids // beam]
+            )
+            lm_logp[ids] = logp.to(lm_logp.dtype)
+            for j, i in enumerate(ids_list):
+                lm_states[i] = None if states is None else states[j]
+        return lm_logp.view(n_utt, beam, -1), lm_states
+
+    def _to_hyps(
+        self,
+        yseq: torch.Tensor,
+        length: torch.Tensor,
+        p_b: torch.Tensor,
+        p_nb: torch.Tensor,
+        lm_score: torch.Tensor,
+        lm_logp: torch.Tensor,
+    ) -> List[List[Hypothesis]]:
+        ctc_score = _logaddexp(p_b, p_nb)
+        lm_score = lm_score + lm_logp[:, :, self.eos]
+        score = (
+            ctc_score + self.lm_weight * lm_score + self.penalty * length.clamp(min=0)
+        )
+        score = score.masked_fill(length < 0, float("-inf"))
+        score, order = score.sort(dim=1, descending=True)
+        b_idx = torch.arange(len(order), device=order.device).unsqueeze(1)
+        yseq, length = yseq[b_idx, order], length[b_idx, order]
+        ctc_score, lm_score = ctc_score[b_idx, order], lm_score[b_idx, order]
+
+        nbest_list = []
+        for b, n_alive in enumerate((length >= 0).sum(1).tolist()):
+            nbest = []
+            for w in range(n_alive):
+                scores = dict(ctc=ctc_score[b, w], length_bonus=length[b, w].float())
+                if self.lm is not None:
+                    scores["lm"] = lm_score[b, w]
+                nbest.append(
+                    Hypothesis(
+                        yseq=torch.cat(
+                            [
+                                yseq.new_tensor([self.sos]),
+                                yseq[b, w, : length[b, w]],
+                                yseq.new_tensor([self.eos]),
+                            ]
+                        ),
+                        score=score[b, w],
+                        scores=scores,
+                    )
+                )
+            nbest_list.append(nbest)
+            if len(nbest) > 0:
+                logging.debug(f"best hypo: {nbest[0].yseq.tolist()}")
+        return nbest_list
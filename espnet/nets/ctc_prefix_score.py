@@ -27,7 +27,10 @@ class CTCPrefixScoreTH(object):
         :param torch.Tensor xlens: input lengths (B,)
         :param int blank: blank label id
         :param int eos: end-of-sequence id
-        :param int margin: margin parameter for windowing (0 means no windowing)
+        :param int margin: margin parameter for windowing (0 means no windowing).
+            The window is decided by the peaks of the attention weights if given,
+            otherwise by the frames where the last labels of the prefixes
+            are most likely to be emitted.
         """
         # In the comment lines,
         # we assume T: input_length, B: batch size, W: beam width, O: output dim.
@@ -44,16 +47,17 @@ class CTCPrefixScoreTH(object):
             else torch.device("cpu")
         )
         # Pad the rest of posteriors in the batch
-        # TODO(takaaki-hori): need a better way without for-loops
-        for i, l in enumerate(xlens):
-            if l < self.input_length:
-                x[i, l:, :] = self.logzero
-                x[i, l:, blank] = 0
+        xlens = torch.as_tensor(xlens, device=self.device)
+        pad_mask = torch.arange(self.input_length, device=self.device) >= xlens.view(
+            -1, 1
+        )
+        x = x.masked_fill(pad_mask.unsqueeze(2), self.logzero)
+        x[:, :, blank] = x[:, :, blank].masked_fill(pad_mask, 0)
         # Reshape input x
         xn = x.transpose(0, 1)  # (B, T, O) -> (T, B, O)
         xb = xn[:, :, self.blank].unsqueeze(2).expand(-1, -1, self.odim)
         self.x = torch.stack([xn, xb])  # (2, T, B, O)
-        self.end_frames = torch.as_tensor(xlens) - 1
+        self.end_frames = xlens - 1
 
         # Setup CTC windowing
         self.margin = margin
@@ -65,10 +69,30 @@ class CTCPrefixScoreTH(object):
         self.idx_bh = None
         self.idx_b = torch.arange(self.batch, device=self.device)
         self.idx_bo = (self.idx_b * self.odim).unsqueeze(1)
+        # Workspace of the forward probabilities, which is reused in each step
+        # and enlarged for the largest number of hypotheses
+        self.r_buffer = None
+        self.log_phi_buffer = None
+
+    def _get_workspace(self, n_bh, snum):
+        """Get the buffers of r (T, 2, BW, S) and log_phi (T, BW, S)."""
+        numel = self.input_length * n_bh * snum
+        if self.log_phi_buffer is None or len(self.log_phi_buffer) < numel:
+            self.r_buffer = torch.empty(2 * numel, dtype=self.dtype, device=self.device)
+            self.log_phi_buffer = torch.empty(
+                numel, dtype=self.dtype, device=self.device
+            )
+        r = self.r_buffer[: 2 * numel].view(self.input_length, 2, n_bh, snum)
+        log_phi = self.log_phi_buffer[:numel].view(self.input_length, n_bh, snum)
+        return r, log_phi
 
     def __call__(self, y, state, scoring_ids=None, att_w=None):
         """Compute CTC prefix scores for next labels
 
+        Note that the returned state is a view of the workspace,
+        which is overwritten in the next call,
+        so it must be selected or copied before that.
+
         :param list y: prefix label sequences
         :param tuple state: previous CTC state
         :param torch.Tensor pre_scores: scores for pre-selection of hypotheses (BW, O)
@@ -76,7 +100,11 @@ class CTCPrefixScoreTH(object):
         :return new_state, ctc_local_scores (BW, O)
         """
         output_length = len(y[0]) - 1  # ignore sos
-        last_ids = [yi[-1] for yi in y]  # last output label ids
+        # last output label ids
+        if isinstance(y, torch.Tensor):
+            last_ids = y[:, -1].to(self.device)
+        else:
+            last_ids = torch.tensor([int(yi[-1]) for yi in y], device=self.device)
         n_bh = len(last_ids)  # batch * hyps
         n_hyps = n_bh // self.batch  # assuming each utterance has the same # of hyps
         self.scoring_num = scoring_ids.size(-1) if scoring_ids is not None else 0
@@ -121,29 +149,29 @@ class CTCPrefixScoreTH(object):
 
         # new CTC forward probs are prepared as a (T x 2 x BW x S) tensor
         # that corresponds to r_t^n(h) and r_t^b(h) in a batch.
-        r = torch.full(
-            (self.input_length, 2, n_bh, snum),
-            self.logzero,
-            dtype=self.dtype,
-            device=self.device,
-        )
-        if output_length == 0:
-            r[0, 0] = x_[0, 0]
+        r, log_phi = self._get_workspace(n_bh, snum)
 
         r_sum = torch.logsumexp(r_prev, 1)
-        log_phi = r_sum.unsqueeze(2).repeat(1, 1, snum)
+        log_phi.copy_(r_sum.unsqueeze(2).expand(-1, -1, snum))
+        # the prefix must end with blank before repeating the last label
+        hyp_ids = torch.arange(n_bh, device=self.device)
         if scoring_ids is not None:
-            for idx in range(n_bh):
-                pos = scoring_idmap[idx, last_ids[idx]]
-                if pos >= 0:
-                    log_phi[:, idx, pos] = r_prev[:, 1, idx]
+            pos = scoring_idmap[hyp_ids, last_ids]
+            is_scored = pos >= 0
+            pos = pos.clamp(min=0)
+            log_phi[:, hyp_ids, pos] = torch.where(
+                is_scored, r_prev[:, 1], log_phi[:, hyp_ids, pos]
+            )
         else:
-            for idx in range(n_bh):
-                log_phi[:, idx, last_ids[idx]] = r_prev[:, 1, idx]
+            log_phi[:, hyp_ids, last_ids] = r_prev[:, 1]
 
         # decide start and end frames based on attention weights
-        if att_w is not None and self.margin > 0:
-            f_arg = torch.matmul(att_w, self.frame_ids)
+        # or the forward probabilities of the last labels
+        if self.margin > 0:
+            if att_w is not None:
+                f_arg = torch.matmul(att_w, self.frame_ids)
+            else:
+                f_arg = r_prev[:, 0].argmax(0)
             f_min = max(int(f_arg.min().cpu()), f_min_prev)
             f_max = max(int(f_arg.max().cpu()), f_max_prev)
             start = min(f_max_prev, max(f_min - self.margin, output_length, 1))
@@ -154,6 +182,10 @@ class CTCPrefixScoreTH(object):
             end = self.input_length
 
         # compute forward probabilities log(r_t^n(h)) and log(r_t^b(h))
+        r[:start] = self.logzero
+        r[end:] = self.logzero
+        if output_length == 0:
+            r[0, 0] = x_[0, 0]
         for t in range(start, end):
             rp = r[t - 1]
             rr = torch.stack([rp[0], log_phi[t - 1], rp[0], rp[1]]).view(
@@ -162,25 +194,19 @@ class CTCPrefixScoreTH(object):
             r[t] = torch.logsumexp(rr, 1) + x_[:, t]
 
         # compute log prefix probabilites log(psi)
-        log_phi_x = torch.cat((log_phi[0].unsqueeze(0), log_phi[:-1]), dim=0) + x_[0]
+        log_phi_x = log_phi[start - 1 : end - 1] + x_[0, start:end]
+        log_psi_ = torch.logsumexp(
+            torch.cat((log_phi_x, r[start - 1, 0].unsqueeze(0)), dim=0), dim=0
+        )
         if scoring_ids is not None:
             log_psi = torch.full(
                 (n_bh, self.odim), self.logzero, dtype=self.dtype, device=self.device
             )
-            log_psi_ = torch.logsumexp(
-                torch.cat((log_phi_x[start:end], r[start - 1, 0].unsqueeze(0)), dim=0),
-                dim=0,
-            )
-            for si in range(n_bh):
-                log_psi[si, scoring_ids[si]] = log_psi_[si]
+            log_psi.scatter_(1, scoring_ids, log_psi_)
         else:
-            log_psi = torch.logsumexp(
-                torch.cat((log_phi_x[start:end], r[start - 1, 0].unsqueeze(0)), dim=0),
-                dim=0,
-            )
+            log_psi = log_psi_
 
-        for si in range(n_bh):
-            log_psi[si, self.eos] = r_sum[self.end_frames[si // n_hyps], si]
+        log_psi[:, self.eos] = r_sum[self.end_frames[hyp_ids // n_hyps], hyp_ids]
 
         # exclude blank probs
         log_psi[:, self.blank] = self.logzero
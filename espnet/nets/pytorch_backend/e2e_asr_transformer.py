@@ -5,7 +5,7 @@
 
 from argparse import Namespace
 from distutils.util import strtobool
-from itertools import groupby
+from distutils.version import LooseVersion
 import logging
 import math
 
@@ -13,6 +13,7 @@ import numpy
 import torch
 
 from espnet.nets.asr_interface import ASRInterface
+from espnet.nets.ctc_prefix_beam_search import CTCPrefixBeamSearch
 from espnet.nets.ctc_prefix_score import CTCPrefixScore
 from espnet.nets.e2e_asr_common import end_detect
 from espnet.nets.e2e_asr_common import ErrorCalculator
@@ -21,6 +22,7 @@ from espnet.nets.pytorch_backend.e2e_asr import CTC_LOSS_THRESHOLD
 from espnet.nets.pytorch_backend.e2e_asr import Reporter
 from espnet.nets.pytorch_backend.nets_utils import get_subsample
 from espnet.nets.pytorch_backend.nets_utils import make_non_pad_mask
+from espnet.nets.pytorch_backend.nets_utils import pad_list
 from espnet.nets.pytorch_backend.nets_utils import th_accuracy
 from espnet.nets.pytorch_backend.rnn.decoders import CTC_SCORING_RATIO
 from espnet.nets.pytorch_backend.transformer.add_sos_eos import add_sos_eos
@@ -41,8 +43,35 @@ from espnet.nets.pytorch_backend.transformer.mask import subsequent_mask
 from espnet.nets.pytorch_backend.transformer.mask import target_mask
 from espnet.nets.pytorch_backend.transformer.plot import PlotAttentionReport
 from espnet.nets.scorers.ctc import CTCPrefixScorer
+from espnet.nets.scorers.rnnlm import RNNLMScorer
 from espnet.utils.fill_missing_args import fill_missing_args
 
+is_torch_1_12_plus = LooseVersion(torch.__version__) >= LooseVersion("1.12")
+
+
+def _segment_max(probs, segment_ids, num_segments):
+    """Compute the maximum probability of each segment.
+
+    :param torch.Tensor probs: probabilities (B, T)
+    :param torch.Tensor segment_ids: non-decreasing segment indices (B, T)
+    :param int num_segments: number of the segments
+    :return: maximum probabilities (B, num_segments), -1 for empty segments
+    :rtype: torch.Tensor
+    """
+    out = probs.new_full((probs.size(0), num_segments), -1.0)
+    if is_torch_1_12_plus:
+        return out.scatter_reduce(1, segment_ids, probs, reduce="amax")
+
+    # The running maximum of "2 * segment_id + prob" restarts at each segment
+    # because 0 <= prob <= 1 and the segment indices are non-decreasing.
+    offset = 2.0 * segment_ids.double()
+    running_max = (probs.double() + offset).cummax(dim=-1)[0] - offset
+    is_last = torch.ones_like(segment_ids, dtype=torch.bool)
+    is_last[:, :-1] = segment_ids[:, 1:] != segment_ids[:, :-1]
+    out = torch.cat([out, out.new_empty(probs.size(0), 1)], dim=-1)
+    index = segment_ids.masked_fill(~is_last, num_segments)
+    return out.scatter_(1, index, running_max.to(probs.dtype))[:, :num_segments]
+
 
 class E2E(ASRInterface, torch.nn.Module):
     """E2E module.
@@ -438,15 +467,26 @@ class E2E(ASRInterface, torch.nn.Module):
             logging.info("Set to pure CTC decoding mode.")
 
         if self.mtlalpha > 0 and recog_args.ctc_weight == 1.0:
+            if recog_args.beam_size > 1:
+                beam_search = CTCPrefixBeamSearch(
+                    self.ctc,
+                    recog_args.beam_size,
+                    self.sos,
+                    self.eos,
+                    blank=self.blank,
+                    lm=RNNLMScorer(rnnlm) if rnnlm is not None else None,
+                    lm_weight=recog_args.lm_weight if rnnlm is not None else 0.0,
+                    penalty=recog_args.penalty,
+                )
+                nbest_hyps = beam_search(enc_output.squeeze(0))
+                return [h.asdict() for h in nbest_hyps[: recog_args.nbest]]
+
             from itertools import groupby
 
             lpz = self.ctc.argmax(enc_output)
             collapsed_indices = [x[0] for x in groupby(lpz[0])]
             hyp = [x for x in filter(lambda x: x != self.blank, collapsed_indices)]
             nbest_hyps = [{"score": 0.0, "yseq": [self.sos] + hyp}]
-            if recog_args.beam_size > 1:
-                raise NotImplementedError("Pure CTC beam search is not implemented.")
-            # TODO(hirofumi0810): Implement beam search
             return nbest_hyps
         elif self.mtlalpha > 0 and recog_args.ctc_weight > 0.0:
             lpz = self.ctc.log_softmax(enc_output)
@@ -645,93 +685,115 @@ class E2E(ASRInterface, torch.nn.Module):
     def recognize_maskctc(self, x, recog_args, char_list=None):
         """Non-autoregressive decoding using Mask CTC.
 
-        :param ndnarray x: input acoustic feature (B, T, D) or (T, D)
+        :param ndnarray x: input acoustic feature (T, D)
         :param Namespace recog_args: argment Namespace contraining options
         :param list char_list: list of characters
         :return: decoding result
         :rtype: list
         """
-        self.eval()
-        h = self.encode(x).unsqueeze(0)
+        return self.recognize_maskctc_batch([x], recog_args, char_list)[0]
 
-        ctc_probs, ctc_ids = torch.exp(self.ctc.log_softmax(h)).max(dim=-1)
-        y_hat = torch.stack([x[0] for x in groupby(ctc_ids[0])])
-        y_idx = torch.nonzero(y_hat != 0).squeeze(-1)
-
-        probs_hat = []
-        cnt = 0
-        for i, y in enumerate(y_hat.tolist()):
-            probs_hat.append(-1)
-            while cnt < ctc_ids.shape[1] and y == ctc_ids[0][cnt]:
-                if probs_hat[i] < ctc_probs[0][cnt]:
-                    probs_hat[i] = ctc_probs[0][cnt].item()
-                cnt += 1
-        probs_hat = torch.from_numpy(numpy.array(probs_hat))
+    def recognize_maskctc_batch(self, xs, recog_args, char_list=None):
+        """Non-autoregressive decoding of a batch using Mask CTC.
 
-        char_mask = "_"
-        p_thres = recog_args.maskctc_probability_threshold
-        mask_idx = torch.nonzero(probs_hat[y_idx] < p_thres).squeeze(-1)
-        confident_idx = torch.nonzero(probs_hat[y_idx] >= p_thres).squeeze(-1)
-        mask_num = len(mask_idx)
+        All the utterances are refined together: the masked tokens of each
+        utterance are filled in `maskctc_n_iterations` steps according to
+        its own number of the masked tokens.
 
-        y_in = torch.zeros(1, len(y_idx) + 1, dtype=torch.long) + self.mask_token
-        y_in[0][confident_idx] = y_hat[y_idx][confident_idx]
-        y_in[0][-1] = self.eos
+        :param list xs: list of input acoustic feature arrays [(T_1, D), (T_2, D), ...]
+        :param Namespace recog_args: argment Namespace contraining options
+        :param list char_list: list of characters
+        :return: N-best decoding results of each utterance
+        :rtype: list
+        """
+        self.eval()
+        ilens = [len(x) for x in xs]
+        xs_pad = pad_list([torch.as_tensor(x).float() for x in xs], 0.0)
+        xs_pad = xs_pad.to(next(self.parameters()).device)
+        src_mask = make_non_pad_mask(ilens).to(xs_pad.device).unsqueeze(-2)
+        h, h_mask = self.encoder(xs_pad, src_mask)
+        batch, tmax = h.shape[:2]
+        frame_mask = h_mask.squeeze(-2)
 
-        logging.info(
-            "ctc:{}".format(
-                "".join(
-                    [
-                        char_list[y] if y != self.mask_token else char_mask
-                        for y in y_in[0].tolist()
-                    ]
-                ).replace("<space>", " ")
-            )
-        )
+        ctc_probs, ctc_ids = torch.exp(self.ctc.log_softmax(h)).max(dim=-1)
 
-        if not mask_num == 0:
-            K = recog_args.maskctc_n_iterations
-            num_iter = K if mask_num >= K and K > 0 else mask_num
+        # Give the index of the collapsed CTC run to each frame.
+        # The padded frames are assigned to the dummy run "tmax".
+        is_head = torch.ones_like(frame_mask)
+        is_head[:, 1:] = ctc_ids[:, 1:] != ctc_ids[:, :-1]
+        is_head &= frame_mask
+        run_idx = (is_head.cumsum(dim=-1) - 1).masked_fill(~frame_mask, tmax)
+        run_mask = torch.arange(tmax + 1, device=h.device) < is_head.sum(
+            dim=-1, keepdim=True
+        )
+        y_hat = ctc_ids.new_zeros(batch, tmax + 1).scatter_(1, run_idx, ctc_ids)
+        probs_hat = _segment_max(ctc_probs, run_idx, tmax + 1)
+
+        # Pack the non-blank tokens of each utterance to the left
+        token_mask = run_mask & (y_hat != 0)
+        ylens = token_mask.sum(dim=-1)
+        maxlen = int(ylens.max()) + 1
+        token_idx = (token_mask.cumsum(dim=-1) - 1).masked_fill(~token_mask, maxlen)
+        p_thres = recog_args.maskctc_probability_threshold
+        is_masked = probs_hat < p_thres
+        y_hat = y_hat.masked_fill(is_masked, self.mask_token)
+        y_in = y_hat.new_full((batch, maxlen + 1), self.eos)
+        y_in = y_in.scatter_(1, token_idx, y_hat)[:, :maxlen]
+        mask_idx = torch.zeros(batch, maxlen + 1, dtype=torch.bool, device=h.device)
+        mask_idx = mask_idx.scatter_(1, token_idx, is_masked)[:, :maxlen]
+        y_mask = torch.arange(maxlen, device=h.device) <= ylens.unsqueeze(-1)
 
-            for t in range(1, num_iter):
-                pred, _ = self.decoder(
-                    y_in, (y_in != self.ignore_id).unsqueeze(-2), h, None
-                )
-                pred_sc, pred_id = pred[0][mask_idx].max(dim=-1)
-                cand = torch.topk(pred_sc, mask_num // num_iter, -1)[1]
-                y_in[0][mask_idx[cand]] = pred_id[cand]
-                mask_idx = torch.nonzero(y_in[0] == self.mask_token).squeeze(-1)
+        char_mask = "_"
 
+        def log_hyps(prefix):
+            if char_list is None:
+                return
+            for y, ylen in zip(y_in.tolist(), ylens.tolist()):
                 logging.info(
-                    "msk:{}".format(
+                    "{}:{}".format(
+                        prefix,
                         "".join(
                             [
-                                char_list[y] if y != self.mask_token else char_mask
-                                for y in y_in[0].tolist()
+                                char_list[t] if t != self.mask_token else char_mask
+                                for t in y[: ylen + 1]
                             ]
-                        ).replace("<space>", " ")
+                        ).replace("<space>", " "),
                     )
                 )
 
-            pred, pred_mask = self.decoder(
-                y_in, (y_in != self.ignore_id).unsqueeze(-2), h, None
-            )
-            y_in[0][mask_idx] = pred[0][mask_idx].argmax(dim=-1)
-            logging.info(
-                "msk:{}".format(
-                    "".join(
-                        [
-                            char_list[y] if y != self.mask_token else char_mask
-                            for y in y_in[0].tolist()
-                        ]
-                    ).replace("<space>", " ")
+        log_hyps("ctc")
+
+        mask_num = mask_idx.sum(dim=-1)
+        if int(mask_num.max()) > 0:
+            K = recog_args.maskctc_n_iterations
+            num_iter = mask_num if K <= 0 else mask_num.clamp(max=K)
+            # The number of the tokens filled at each iteration
+            num_fill = mask_num // num_iter.clamp(min=1)
+            ranks = torch.arange(maxlen, device=h.device).expand(batch, maxlen)
+
+            for t in range(1, int(num_iter.max())):
+                pred, _ = self.decoder(y_in, y_mask.unsqueeze(-2), h, h_mask)
+                pred_sc, pred_id = pred.max(dim=-1)
+                # Rank the masked tokens by their scores for each utterance
+                order = pred_sc.masked_fill(~mask_idx, float("-inf")).argsort(
+                    dim=-1, descending=True
                 )
-            )
+                rank = torch.empty_like(order).scatter_(1, order, ranks)
+                is_active = (t < num_iter).unsqueeze(-1)
+                cand = mask_idx & (rank < num_fill.unsqueeze(-1)) & is_active
+                y_in = torch.where(cand, pred_id, y_in)
+                mask_idx = torch.where(is_active, y_in == self.mask_token, mask_idx)
 
-        ret = y_in.tolist()[0][:-1]
-        hyp = {"score": 0.0, "yseq": [self.sos] + ret + [self.eos]}
+                log_hyps("msk")
 
-        return [hyp]
+            pred, _ = self.decoder(y_in, y_mask.unsqueeze(-2), h, h_mask)
+            y_in = torch.where(mask_idx, pred.argmax(dim=-1), y_in)
+            log_hyps("msk")
+
+        return [
+            [{"score": 0.0, "yseq": [self.sos] + y[:ylen] + [self.eos]}]
+            for y, ylen in zip(y_in.tolist(), ylens.tolist())
+        ]
 
     def calculate_all_attentions(self, xs_pad, ilens, ys_pad):
         """E2E attention calculation.
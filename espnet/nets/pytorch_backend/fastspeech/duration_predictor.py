@@ -68,6 +68,11 @@ class DurationPredictor(torch.nn.Module):
     def _forward(self, xs, x_masks=None, is_inference=False):
         xs = xs.transpose(1, -1)  # (B, idim, Tmax)
         for f in self.conv:
+            if is_inference and x_masks is not None:
+                # NOTE: avoid leaking the padded part through the convolution
+                #   so that the batched inference doesn't depend on the padding
+                #   length. Training keeps the original forward graph.
+                xs = xs.masked_fill(x_masks.unsqueeze(1), 0.0)
             xs = f(xs)  # (B, C, Tmax)
 
         # NOTE: calculate in log domain
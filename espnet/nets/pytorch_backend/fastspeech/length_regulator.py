@@ -45,23 +45,35 @@ class LengthRegulator(torch.nn.Module):
         else:
             self.repeat_fn = self._legacy_repeat_one_sequence
 
-    def forward(self, xs, ds, alpha=1.0):
+    def forward(self, xs, ds, alpha=1.0, return_lengths=False):
         """Calculate forward propagation.
 
+        The whole batch is expanded at once by gathering the input frames
+        into the padded output tensor.
+
         Args:
             xs (Tensor): Batch of sequences of char or phoneme embeddings (B, Tmax, D).
             ds (LongTensor): Batch of durations of each frame (B, T).
             alpha (float, optional): Alpha value to control speed of speech.
+                The cumulative durations are scaled and rounded, so that
+                the rounding errors of the durations are not accumulated.
+            return_lengths (bool, optional): Whether to return the lengths and
+                the masks of the outputs.
 
         Returns:
             Tensor: replicated input tensor based on durations (B, T*, D).
+            LongTensor: Batch of the lengths of the outputs (B,).
+                Returned if return_lengths=True.
+            Tensor: Mask tensor of the outputs (B, T*), where the padded part is 0.
+                Returned if return_lengths=True.
 
         """
         if alpha != 1.0:
             assert alpha > 0
-            ds = torch.round(ds.float() * alpha).long()
+            cum_ds = torch.round(ds.cumsum(dim=1).float() * alpha).long()
+            ds = torch.cat([cum_ds[:, :1], cum_ds[:, 1:] - cum_ds[:, :-1]], dim=1)
 
-        if ds.sum() == 0:
+        if ds.sum(dim=1).eq(0).any():
             logging.warning(
                 "predicted durations includes all 0 sequences. "
                 "fill the first element with 1."
@@ -69,9 +81,46 @@ class LengthRegulator(torch.nn.Module):
             # NOTE(kan-bayashi): This case must not be happend in teacher forcing.
             #   It will be happened in inference with a bad duration predictor.
             #   So we do not need to care the padded sequence case here.
-            ds[ds.sum(dim=1).eq(0)] = 1
+            ds = ds.masked_fill(ds.sum(dim=1, keepdim=True).eq(0), 1)
 
-        return pad_list([self.repeat_fn(x, d) for x, d in zip(xs, ds)], self.pad_value)
+        olens = ds.sum(dim=1)
+        if is_torch_1_1_plus:
+            ys = self._expand_batch(xs, ds, olens)
+        else:
+            ys = pad_list(
+                [self.repeat_fn(x, d) for x, d in zip(xs, ds)], self.pad_value
+            )
+        if not return_lengths:
+            return ys
+
+        masks = torch.arange(ys.size(1), device=ds.device)[None, :] < olens[:, None]
+        return ys, olens, masks
+
+    def _expand_batch(self, xs, ds, olens):
+        """Repeat each frame of the whole batch according to duration."""
+        batch_size, tmax = ds.shape
+        maxlen = int(olens.max())
+        # (sum(olens),): The index of the input frame in xs.view(B * Tmax, ...)
+        # for each output frame
+        in_idx = torch.repeat_interleave(
+            torch.arange(batch_size * tmax, device=ds.device), ds.reshape(-1)
+        )
+        # (sum(olens),): The index of the output frame in ys.view(B * T*, ...)
+        # i.e. b * T* + t for t-th frame of b-th sequence
+        shifts = (
+            torch.arange(batch_size, device=ds.device) * maxlen
+            - olens.cumsum(0)
+            + olens
+        )
+        out_idx = torch.arange(in_idx.size(0), device=ds.device) + (
+            torch.repeat_interleave(shifts, olens)
+        )
+
+        ys = xs.new_full((batch_size * maxlen,) + xs.shape[2:], self.pad_value)
+        ys = ys.index_copy(
+            0, out_idx, xs[:, :tmax].reshape((-1,) + xs.shape[2:])[in_idx]
+        )
+        return ys.view((batch_size, maxlen) + xs.shape[2:])
 
     def _repeat_one_sequence(self, x, d):
         """Repeat each frame according to duration for torch 1.1+."""
@@ -0,0 +1,146 @@
+"""Batched beam search for transducer models."""
+
+import numpy as np
+import torch
+
+
+def sort_nbest(hyps, nbest, normscore):
+    """Sort hypotheses by their scores.
+
+    Args:
+        hyps (list of dicts): hypotheses
+        nbest (int): number of hypotheses to return
+        normscore (bool): normalize the scores by the lengths
+
+    Returns:
+        nbest_hyps (list of dicts): n-best hypotheses
+
+    """
+    if normscore:
+        return sorted(hyps, key=lambda x: x["score"] / len(x["yseq"]), reverse=True)[
+            :nbest
+        ]
+    else:
+        return sorted(hyps, key=lambda x: x["score"], reverse=True)[:nbest]
+
+
+def time_sync_decoding(decoder, h, recog_args, rnnlm=None):
+    """Time synchronous beam search for transducer models.
+
+    Based on https://ieeexplore.ieee.org/document/9053040.
+    At each frame, at most `max_sym_exp - 1` labels are emitted and
+    all the active hypotheses are expanded together, i.e. the prediction network
+    and the joint network are computed for them in one batch and
+    the next hypotheses are selected by top-k over (hypotheses x labels).
+    The outputs of the prediction network are cached by the label prefix.
+
+    Args:
+        decoder (torch.nn.Module): transducer decoder module which implements
+            `init_state()`, `batch_score(hyps, cache)` and `joint(h_enc, h_dec)`
+        h (torch.Tensor): encoder hidden state sequences (Tmax, Henc)
+        recog_args (Namespace): argument Namespace containing options
+        rnnlm (torch.nn.Module): language model module
+
+    Returns:
+        nbest_hyps (list of dicts): n-best decoding results
+
+    """
+    beam = min(recog_args.beam_size, decoder.odim)
+    max_sym_exp = getattr(recog_args, "max_sym_exp", 2)
+    blank = decoder.blank
+
+    # "dec_state" and "lm_state" are the states before the last label
+    kept_hyps = [
+        {
+            "score": 0.0,
+            "yseq": [blank],
+            "dec_state": decoder.init_state(),
+            "lm_state": None,
+        }
+    ]
+    dec_cache = {}
+    lm_cache = {}
+
+    for hi in h:
+        # The hypotheses emitting blank at this frame: yseq -> hyp
+        blank_hyps = {}
+        hyps = kept_hyps
+
+        for v in range(max_sym_exp):
+            dec_out, dec_states = decoder.batch_score(hyps, dec_cache)
+            logp = torch.log_softmax(decoder.joint(hi, dec_out), dim=-1)
+            blank_logp = logp[:, blank].tolist()
+
+            for hyp, lp in zip(hyps, blank_logp):
+                key = tuple(hyp["yseq"])
+                score = hyp["score"] + lp
+                if key in blank_hyps:
+                    # Merge the hypotheses having the same label sequence
+                    blank_hyps[key]["score"] = np.logaddexp(
+                        blank_hyps[key]["score"], score
+                    )
+                else:
+                    blank_hyps[key] = dict(hyp, score=score)
+
+            if v == max_sym_exp - 1:
+                break
+
+            scores = logp.clone()
+            scores[:, blank] = float("-inf")
+            if rnnlm:
+                lm_states, lm_scores = batch_lm_score(decoder, rnnlm, hyps, lm_cache)
+                scores += recog_args.lm_weight * lm_scores
+            scores += scores.new_tensor([hyp["score"] for hyp in hyps]).unsqueeze(1)
+
+            top_scores, top_ids = scores.view(-1).topk(min(beam, scores.numel()))
+            new_hyps = []
+            for score, idx in zip(top_scores.tolist(), top_ids.tolist()):
+                if score == float("-inf"):
+                    break
+                i, k = divmod(idx, decoder.odim)
+                new_hyps.append(
+                    {
+                        "score": score,
+                        "yseq": hyps[i]["yseq"] + [k],
+                        "dec_state": dec_states[i],
+                        "lm_state": lm_states[i] if rnnlm else None,
+                    }
+                )
+            hyps = new_hyps
+            if len(hyps) == 0:
+                break
+
+        kept_hyps = sorted(blank_hyps.values(), key=lambda x: x["score"], reverse=True)[
+            :beam
+        ]
+
+    return sort_nbest(kept_hyps, recog_args.nbest, recog_args.score_norm_transducer)
+
+
+def batch_lm_score(decoder, rnnlm, hyps, lm_cache):
+    """Compute the language model scores of the next labels.
+
+    Args:
+        decoder (torch.nn.Module): transducer decoder module
+        rnnlm (torch.nn.Module): language model module
+        hyps (list of dicts): hypotheses
+        lm_cache (dict): cache of the outputs keyed by the label prefix
+
+    Returns:
+        lm_states (list): states after the last label of each hypothesis
+        lm_scores (torch.Tensor): scores of the next labels (n_hyps, odim)
+
+    """
+    lm_states = []
+    lm_scores = []
+    for hyp in hyps:
+        key = tuple(hyp["yseq"])
+        if key not in lm_cache:
+            vy = next(decoder.parameters()).new_full(
+                (1,), hyp["yseq"][-1], dtype=torch.long
+            )
+            lm_cache[key] = rnnlm.predict(hyp["lm_state"], vy)
+        lm_state, lm_score = lm_cache[key]
+        lm_states.append(lm_state)
+        lm_scores.append(lm_score[0])
+    return lm_states, torch.stack(lm_scores)
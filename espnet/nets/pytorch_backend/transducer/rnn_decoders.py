@@ -9,6 +9,9 @@ from espnet.nets.pytorch_backend.rnn.attentions import att_to_numpy
 
 from espnet.nets.pytorch_backend.nets_utils import pad_list
 from espnet.nets.pytorch_backend.nets_utils import to_device
+from espnet.nets.pytorch_backend.transducer.batch_beam_search import (
+    time_sync_decoding,  # noqa: H301
+)
 
 
 class DecoderRNNT(torch.nn.Module):
@@ -129,6 +132,53 @@ class DecoderRNNT(torch.nn.Module):
 
         return y, (z_list, c_list)
 
+    def init_state(self, x=None):
+        """Get an initial state for decoding.
+
+        Returns:
+            (tuple): list of L zero-init hidden and cell state (1, Hdec)
+
+        """
+        return self.zero_state(next(self.parameters()).new_zeros(1, self.embed_dim))
+
+    def batch_score(self, hyps, cache):
+        """Forward the prediction network for the hypotheses in one batch.
+
+        Args:
+            hyps (list of dicts): hypotheses having "yseq" and "dec_state",
+                which is the decoder state before the last label
+            cache (dict): cache of the outputs keyed by the label prefix
+
+        Returns:
+            y (torch.Tensor): batch of output features (B, Hdec)
+            dstates (list): decoder states after the last label of each hypothesis
+
+        """
+        process = [i for i, hyp in enumerate(hyps) if tuple(hyp["yseq"]) not in cache]
+
+        if process:
+            vy = to_device(
+                self, torch.LongTensor([hyps[i]["yseq"][-1] for i in process])
+            )
+            ey = self.dropout_embed(self.embed(vy))
+            z_prev, c_prev = (
+                [
+                    torch.cat([hyps[i]["dec_state"][j][n] for i in process])
+                    for n in six.moves.range(self.dlayers)
+                ]
+                for j in (0, 1)
+            )
+            y, (z_list, c_list) = self.rnn_forward(ey, (z_prev, c_prev))
+
+            for b, i in enumerate(process):
+                cache[tuple(hyps[i]["yseq"])] = (
+                    y[b],
+                    ([z[b : b + 1] for z in z_list], [c[b : b + 1] for c in c_list]),
+                )
+
+        outputs = [cache[tuple(hyp["yseq"])] for hyp in hyps]
+        return torch.stack([o[0] for o in outputs]), [o[1] for o in outputs]
+
     def joint(self, h_enc, h_dec):
         """Joint computation of z.
 
@@ -223,6 +273,9 @@ class DecoderRNNT(torch.nn.Module):
             nbest_hyps (list of dicts): n-best decoding results
 
         """
+        if getattr(recog_args, "transducer_search_type", "default") == "tsd":
+            return time_sync_decoding(self, h, recog_args, rnnlm)
+
         beam = recog_args.beam_size
         k_range = min(beam, self.odim)
         nbest = recog_args.nbest
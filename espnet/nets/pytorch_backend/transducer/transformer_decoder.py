@@ -5,6 +5,10 @@ import torch
 
 from espnet.nets.pytorch_backend.nets_utils import to_device
 
+from espnet.nets.pytorch_backend.transducer.batch_beam_search import (
+    time_sync_decoding,  # noqa: H301
+)
+
 from espnet.nets.pytorch_backend.transducer.transformer_decoder_layer import (
     DecoderLayer,  # noqa: H301
 )
@@ -179,6 +183,44 @@ class Decoder(torch.nn.Module):
         """Get an initial state for decoding."""
         return [None for i in range(len(self.decoders))]
 
+    def batch_score(self, hyps, cache):
+        """Forward the decoder for the hypotheses in one batch.
+
+        The hypotheses having the same length are forwarded together.
+
+        Args:
+            hyps (list of dicts): hypotheses having "yseq" and "dec_state",
+                which is the layer cache before the last label
+            cache (dict): cache of the outputs keyed by the label prefix
+
+        Returns:
+            y (torch.Tensor): batch of output features (B, attention_dim)
+            dstates (list): layer caches after the last label of each hypothesis
+
+        """
+        process = {}
+        for i, hyp in enumerate(hyps):
+            if tuple(hyp["yseq"]) not in cache:
+                process.setdefault(len(hyp["yseq"]), []).append(i)
+
+        for length, ids in process.items():
+            ys = to_device(self, torch.LongTensor([hyps[i]["yseq"] for i in ids]))
+            ys_mask = to_device(self, subsequent_mask(length).unsqueeze(0))
+            if length == 1:
+                c = self.init_state()
+            else:
+                c = [
+                    torch.cat([hyps[i]["dec_state"][n] for i in ids])
+                    for n in range(len(self.decoders))
+                ]
+            y, c = self.forward_one_step(ys, ys_mask, c)
+
+            for b, i in enumerate(ids):
+                cache[tuple(hyps[i]["yseq"])] = (y[b], [x[b : b + 1] for x in c])
+
+        outputs = [cache[tuple(hyp["yseq"])] for hyp in hyps]
+        return torch.stack([o[0] for o in outputs]), [o[1] for o in outputs]
+
     def recognize(self, h, recog_args):
         """Greedy search implementation for transformer-transducer.
 
@@ -225,6 +267,9 @@ class Decoder(torch.nn.Module):
             nbest_hyps (list of dicts): n-best decoding results
 
         """
+        if getattr(recog_args, "transducer_search_type", "default") == "tsd":
+            return time_sync_decoding(self, h, recog_args, rnnlm)
+
         beam = recog_args.beam_size
         k_range = min(beam, self.odim)
         nbest = recog_args.nbest
@@ -67,8 +67,8 @@ class DecoderLayer(nn.Module):
                 self.size,
             ), f"{cache.shape} == {(tgt.shape[0], tgt.shape[1] - 1, self.size)}"
 
-            tgt_q = tgt[:, -1, :]
-            residual = residual[:, -1, :]
+            tgt_q = tgt[:, -1:, :]
+            residual = residual[:, -1:, :]
 
             if tgt_mask is not None:
                 tgt_mask = tgt_mask[:, -1:, :]
@@ -100,6 +100,29 @@ class MultiHeadedAttention(nn.Module):
         scores = torch.matmul(q, k.transpose(-2, -1)) / math.sqrt(self.d_k)
         return self.forward_attention(v, scores, mask)
 
+    def forward_with_cache(self, query, mask, cache=None):
+        """Compute self-attention for new frames reusing cached keys and values.
+
+        Only the new frames are projected and their keys and values are
+        appended to the cache, so that incremental decoding doesn't recompute
+        the projections of the previous frames.
+
+        :param torch.Tensor query: new frames (batch, time1, size)
+        :param torch.Tensor mask: (batch, 1, time2) or (batch, time1, time2),
+            where time2 = cache_time + time1
+        :param torch.Tensor cache: concatenated keys and values of the previous
+            frames (batch, head, cache_time, 2 * d_k)
+        :return torch.Tensor: attention output (batch, time1, d_model)
+        :return torch.Tensor: updated cache (batch, head, time2, 2 * d_k)
+        """
+        q, k, v = self.forward_qkv(query, query, query)
+        kv = torch.cat([k, v], dim=-1)
+        if cache is not None:
+            kv = torch.cat([cache, kv], dim=2)
+        k, v = kv.split(self.d_k, dim=-1)
+        scores = torch.matmul(q, k.transpose(-2, -1)) / math.sqrt(self.d_k)
+        return self.forward_attention(v, scores, mask), kv
+
 
 class RelPositionMultiHeadedAttention(MultiHeadedAttention):
     """Multi-Head Attention layer with relative position encoding.
@@ -99,6 +99,51 @@ class DecoderLayer(nn.Module):
         if not self.normalize_before:
             x = self.norm1(x)
 
+        x = self._forward_src_attn_and_feed_forward(x, memory, memory_mask)
+
+        if cache is not None:
+            x = torch.cat([cache, x], dim=1)
+
+        return x, tgt_mask, memory, memory_mask
+
+    def forward_with_cache(self, tgt, tgt_mask, memory, memory_mask, cache=None):
+        """Compute decoded features of new frames with the self-attention cache.
+
+        Unlike `forward`, whose cache holds the outputs of this layer and
+        the whole prefix is fed again, only the new frames are given
+        and the keys and values of the previous frames are taken from the cache.
+        `self.self_attn` must be MultiHeadedAttention.
+
+        Args:
+            tgt (torch.Tensor): new target features (batch, time_new, size)
+            tgt_mask (torch.Tensor): mask for the new frames
+                (batch, time_new, max_time_out)
+            memory (torch.Tensor): encoded source features (batch, max_time_in, size)
+            memory_mask (torch.Tensor): mask for memory (batch, 1, max_time_in)
+            cache (torch.Tensor): cached keys and values of the self-attention
+                (batch, head, max_time_out - time_new, 2 * d_k)
+
+        Returns:
+            torch.Tensor: output of the new frames (batch, time_new, size)
+            torch.Tensor: updated cache (batch, head, max_time_out, 2 * d_k)
+
+        """
+        residual = tgt
+        if self.normalize_before:
+            tgt = self.norm1(tgt)
+
+        x_att, new_cache = self.self_attn.forward_with_cache(tgt, tgt_mask, cache)
+        if self.concat_after:
+            x = residual + self.concat_linear1(torch.cat((tgt, x_att), dim=-1))
+        else:
+            x = residual + self.dropout(x_att)
+        if not self.normalize_before:
+            x = self.norm1(x)
+
+        x = self._forward_src_attn_and_feed_forward(x, memory, memory_mask)
+        return x, new_cache
+
+    def _forward_src_attn_and_feed_forward(self, x, memory, memory_mask):
         residual = x
         if self.normalize_before:
             x = self.norm2(x)
@@ -118,8 +163,4 @@ class DecoderLayer(nn.Module):
         x = residual + self.dropout(self.feed_forward(x))
         if not self.normalize_before:
             x = self.norm3(x)
-
-        if cache is not None:
-            x = torch.cat([cache, x], dim=1)
-
-        return x, tgt_mask, memory, memory_mask
+        return x
@@ -127,6 +127,60 @@ class BatchScorerInterface(ScorerInterface):
         scores = torch.cat(scores, 0).view(ys.shape[0], -1)
         return scores, outstates
 
+    def batch_init_state_padded(
+        self, xs: torch.Tensor, xs_lens: torch.Tensor
+    ) -> List[Any]:
+        """Get initial states for zero-padded utterances (optional).
+
+        Args:
+            xs (torch.Tensor): The padded encoded features (n_utt, xlen, n_feat)
+            xs_lens (torch.Tensor): The lengths of the encoded features (n_utt,)
+
+        Returns: list of initial states for each utterance
+
+        """
+        return [self.batch_init_state(x[:xlen]) for x, xlen in zip(xs, xs_lens)]
+
+    def batch_score_padded(
+        self,
+        ys: torch.Tensor,
+        states: List[Any],
+        xs: torch.Tensor,
+        xs_lens: torch.Tensor,
+    ) -> Tuple[torch.Tensor, List[Any]]:
+        """Score new token batch for multiple zero-padded utterances (optional).
+
+        The hypotheses of each utterance must be contiguous and every utterance
+        must have the same number of hypotheses, i.e. `ys` is laid out as
+        `(n_utt * n_hyps, ylen)`. The default implementation calls
+        `batch_score` for each utterance with its unpadded feature.
+
+        Args:
+            ys (torch.Tensor): torch.int64 prefix tokens (n_utt * n_hyps, ylen).
+            states (List[Any]): Scorer states for prefix tokens.
+            xs (torch.Tensor): The padded encoded features (n_utt, xlen, n_feat).
+            xs_lens (torch.Tensor): The lengths of the encoded features (n_utt,).
+
+        Returns:
+            tuple[torch.Tensor, List[Any]]: Tuple of
+                batchfied scores for next token with shape of
+                `(n_utt * n_hyps, n_vocab)` and next state list for ys.
+
+        """
+        n_hyps = len(ys) // len(xs)
+        scores = list()
+        outstates = list()
+        for i, (x, xlen) in enumerate(zip(xs, xs_lens)):
+            b = slice(i * n_hyps, (i + 1) * n_hyps)
+            score, outstate = self.batch_score(
+                ys[b], states[b], x[:xlen].expand(n_hyps, *x[:xlen].shape)
+            )
+            scores.append(score)
+            if outstate is None:
+                outstate = [None] * n_hyps
+            outstates.extend(outstate)
+        return torch.cat(scores, 0), outstates
+
 
 class PartialScorerInterface(ScorerInterface):
     """Partial scorer interface for beam search.
@@ -186,3 +240,122 @@ class BatchPartialScorerInterface(BatchScorerInterface, PartialScorerInterface):
                 and next states for ys
         """
         raise NotImplementedError
+
+    def batch_score_partial_padded(
+        self,
+        ys: torch.Tensor,
+        next_tokens: torch.Tensor,
+        states: List[Any],
+        xs: torch.Tensor,
+        xs_lens: torch.Tensor,
+    ) -> Tuple[torch.Tensor, Any]:
+        """Score new token for multiple zero-padded utterances (optional).
+
+        See also :meth:`BatchScorerInterface.batch_score_padded`
+        for the layout of `ys`.
+
+        Args:
+            ys (torch.Tensor): torch.int64 prefix tokens (n_utt * n_hyps, ylen).
+            next_tokens (torch.Tensor): torch.int64 tokens to score
+                (n_utt * n_hyps, n_token).
+            states (List[Any]): Scorer states for prefix tokens.
+            xs (torch.Tensor): The padded encoded features (n_utt, xlen, n_feat).
+            xs_lens (torch.Tensor): The lengths of the encoded features (n_utt,).
+
+        Returns:
+            tuple[torch.Tensor, Any]:
+                Tuple of a score tensor for ys that has a shape
+                `(n_utt * n_hyps, n_vocab)` and next states for ys
+        """
+        raise NotImplementedError
+
+
+class BatchStackedStateScorerInterface(BatchScorerInterface):
+    """Batch scorer interface keeping the states stacked over the hypotheses.
+
+    Unlike :class:`BatchScorerInterface`, the states of all the hypotheses
+    are kept in a single object, e.g. a list of `(n_batch, ...)` tensors
+    for each layer, instead of a list of the states of each hypothesis.
+    It saves stacking and splitting the states in every step and the states
+    of the selected hypotheses are gathered by one `index_select`.
+    :class:`espnet.nets.batch_beam_search.BatchBeamSearch` uses this interface
+    if all the scorers implement it.
+
+    """
+
+    def batch_init_stacked_state(self, x: torch.Tensor) -> Any:
+        """Get an initial stacked state of a single hypothesis (optional).
+
+        Args:
+            x (torch.Tensor): The encoded feature tensor
+
+        Returns: initial state
+
+        """
+        return self.batch_init_state(x)
+
+    def batch_score_stacked(
+        self, ys: torch.Tensor, state: Any, xs: torch.Tensor
+    ) -> Tuple[torch.Tensor, Any]:
+        """Score new token batch with the stacked state (required).
+
+        Args:
+            ys (torch.Tensor): torch.int64 prefix tokens (n_batch, ylen).
+            state: Scorer state stacked over the prefix tokens.
+            xs (torch.Tensor):
+                The encoder feature that generates ys (n_batch, xlen, n_feat).
+
+        Returns:
+            tuple[torch.Tensor, Any]: Tuple of
+                batchfied scores for next token with shape of `(n_batch, n_vocab)`
+                and next state stacked over ys.
+
+        """
+        raise NotImplementedError
+
+    def select_stacked_state(
+        self, state: Any, ids: torch.Tensor, new_ids: torch.Tensor = None
+    ) -> Any:
+        """Select the stacked states of the hypotheses (required).
+
+        Args:
+            state: Scorer state stacked over the hypotheses
+            ids (torch.Tensor): torch.int64 indices of the hypotheses to select
+            new_ids (torch.Tensor): torch.int64 new label ids of the selected
+                hypotheses if necessary
+
+        Returns:
+            state: state stacked over the selected hypotheses
+
+        """
+        raise NotImplementedError
+
+
+class BatchPartialStackedStateScorerInterface(
+    BatchStackedStateScorerInterface, BatchPartialScorerInterface
+):
+    """Batch partial scorer interface keeping the states stacked."""
+
+    def batch_score_partial_stacked(
+        self,
+        ys: torch.Tensor,
+        next_tokens: torch.Tensor,
+        state: Any,
+        xs: torch.Tensor,
+    ) -> Tuple[torch.Tensor, Any]:
+        """Score new token with the stacked state (required).
+
+        Args:
+            ys (torch.Tensor): torch.int64 prefix tokens (n_batch, ylen).
+            next_tokens (torch.Tensor): torch.int64 tokens to score (n_batch, n_token).
+            state: Scorer state stacked over the prefix tokens.
+            xs (torch.Tensor):
+                The encoder feature that generates ys (n_batch, xlen, n_feat).
+
+        Returns:
+            tuple[torch.Tensor, Any]:
+                Tuple of a score tensor for ys that has a shape `(n_batch, n_vocab)`
+                and next state for ys, which is selected by `select_stacked_state`
+                with the new label ids
+        """
+        raise NotImplementedError
@@ -5,23 +5,26 @@ import torch
 
 from espnet.nets.ctc_prefix_score import CTCPrefixScore
 from espnet.nets.ctc_prefix_score import CTCPrefixScoreTH
-from espnet.nets.scorer_interface import BatchPartialScorerInterface
+from espnet.nets.scorer_interface import BatchPartialStackedStateScorerInterface
 
 
-class CTCPrefixScorer(BatchPartialScorerInterface):
+class CTCPrefixScorer(BatchPartialStackedStateScorerInterface):
     """Decoder interface wrapper for CTCPrefixScore."""
 
-    def __init__(self, ctc: torch.nn.Module, eos: int):
+    def __init__(self, ctc: torch.nn.Module, eos: int, margin: int = 0):
         """Initialize class.
 
         Args:
             ctc (torch.nn.Module): The CTC implementaiton.
                 For example, :class:`espnet.nets.pytorch_backend.ctc.CTC`
             eos (int): The end-of-sequence id.
+            margin (int): The margin of the frame window for the batch scoring.
+                See also :class:`espnet.nets.ctc_prefix_score.CTCPrefixScoreTH`.
 
         """
         self.ctc = ctc
         self.eos = eos
+        self.margin = margin
         self.impl = None
 
     def init_state(self, x: torch.Tensor):
@@ -96,7 +99,7 @@ class CTCPrefixScorer(BatchPartialScorerInterface):
         """
         logp = self.ctc.log_softmax(x.unsqueeze(0))  # assuming batch_size = 1
         xlen = torch.tensor([logp.size(1)])
-        self.impl = CTCPrefixScoreTH(logp, xlen, 0, self.eos)
+        self.impl = CTCPrefixScoreTH(logp, xlen, 0, self.eos, margin=self.margin)
         return None
 
     def batch_score_partial(self, y, ids, state, x):
@@ -125,3 +128,117 @@ class CTCPrefixScorer(BatchPartialScorerInterface):
             else None
         )
         return self.impl(y, batch_state, ids)
+
+    def batch_score_partial_stacked(self, y, ids, state, x):
+        """Score new token with the state stacked over the hypotheses.
+
+        Args:
+            y (torch.Tensor): prefix tokens (n_batch, ylen)
+            ids (torch.Tensor): torch.int64 next token to score
+            state: CTC state stacked over the hypotheses
+                or None for the first step
+            x (torch.Tensor): encoder feature that generates ys
+
+        Returns:
+            tuple[torch.Tensor, Any]:
+                Tuple of a score tensor for y that has a shape `(n_batch, n_vocab)`
+                and next state for ys
+
+        """
+        return self.impl(y, state, ids)
+
+    def select_stacked_state(self, state, ids, new_ids=None):
+        """Select the stacked states with relative ids in the main beam search.
+
+        Args:
+            state: CTC state stacked over the hypotheses
+            ids (torch.Tensor): Indices of the hypotheses to select
+            new_ids (torch.Tensor): New label ids of the selected hypotheses,
+                which are required for the output of `batch_score_partial_stacked`
+
+        Returns:
+            state: CTC state stacked over the selected hypotheses
+
+        """
+        if state is None:
+            return None
+        if len(state) == 5:  # the output of CTCPrefixScoreTH (need new_ids)
+            r, log_psi, f_min, f_max, scoring_idmap = state
+            s = log_psi[ids, new_ids].unsqueeze(1).expand(-1, log_psi.size(1))
+            if scoring_idmap is not None:
+                new_ids = scoring_idmap[ids, new_ids]
+            return r[:, :, ids, new_ids], s, f_min, f_max
+        r, s, f_min, f_max = state
+        return r.index_select(2, ids), s.index_select(0, ids), f_min, f_max
+
+    def batch_init_state_padded(self, xs: torch.Tensor, xs_lens: torch.Tensor):
+        """Get initial states for zero-padded utterances.
+
+        Args:
+            xs (torch.Tensor): The padded encoded features (n_utt, xlen, n_feat)
+            xs_lens (torch.Tensor): The lengths of the encoded features (n_utt,)
+
+        Returns: list of initial states for each utterance
+
+        """
+        logp = self.ctc.log_softmax(xs)
+        self.impl = CTCPrefixScoreTH(logp, xs_lens, 0, self.eos, margin=self.margin)
+        return [None] * len(xs)
+
+    def batch_score_partial_padded(self, y, ids, state, xs, xs_lens):
+        """Score new token for multiple zero-padded utterances.
+
+        Args:
+            y (torch.Tensor): prefix tokens (n_utt * n_hyps, ylen)
+            ids (torch.Tensor): torch.int64 next token to score
+            state: decoder state for prefix tokens
+            xs (torch.Tensor): The padded encoded features (n_utt, xlen, n_feat)
+            xs_lens (torch.Tensor): The lengths of the encoded features (n_utt,)
+
+        Returns:
+            tuple[torch.Tensor, Any]:
+                Tuple of a score tensor for y that has a shape `(n_batch, n_vocab)`
+                and next state for ys
+
+        """
+        if self.impl.batch != len(xs):
+            # some utterances have finished: rebuild the posteriors of the rest
+            self.batch_init_state_padded(xs, xs_lens)
+        return self.batch_score_partial(y, ids, state, xs)
+
+    def extend_prob(self, x: torch.Tensor):
+        """Extend the CTC posteriors for the streaming decoding.
+
+        Args:
+            x (torch.Tensor): The encoded feature tensor including new frames
+
+        """
+        self.batch_init_state(x)
+
+    def extend_state(self, state):
+        """Extend the CTC prefix state of a hypothesis to new frames.
+
+        The forward probabilities of the new frames are approximated
+        by assuming that the prefix is followed by only blanks,
+        because the states of the shorter prefixes are not kept.
+
+        Args:
+            state: CTC state of a hypothesis for the previous frames,
+                or the state stacked over the hypotheses
+
+        Returns:
+            state: CTC state for all the frames in `self.impl`
+
+        """
+        if state is None:
+            return state
+        r_prev, s_prev, f_min_prev, f_max_prev = state
+        r = r_prev.new_full(
+            (self.impl.input_length,) + r_prev.shape[1:], self.impl.logzero
+        )
+        start = r_prev.size(0)
+        r[:start] = r_prev
+        x_blank = self.impl.x[0, start:, 0, self.impl.blank]
+        x_blank = x_blank.view(-1, *([1] * (r_prev.dim() - 2)))
+        r[start:, 1] = torch.logsumexp(r_prev[-1], dim=0) + torch.cumsum(x_blank, 0)
+        return r, s_prev, f_min_prev, f_max_prev
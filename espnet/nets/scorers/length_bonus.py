@@ -5,10 +5,10 @@ from typing import Tuple
 
 import torch
 
-from espnet.nets.scorer_interface import BatchScorerInterface
+from espnet.nets.scorer_interface import BatchStackedStateScorerInterface
 
 
-class LengthBonus(BatchScorerInterface):
+class LengthBonus(BatchStackedStateScorerInterface):
     """Length bonus in beam search."""
 
     def __init__(self, n_vocab: int):
@@ -59,3 +59,51 @@ class LengthBonus(BatchScorerInterface):
             ),
             None,
         )
+
+    def batch_score_padded(
+        self,
+        ys: torch.Tensor,
+        states: List[Any],
+        xs: torch.Tensor,
+        xs_lens: torch.Tensor,
+    ) -> Tuple[torch.Tensor, List[Any]]:
+        """Score new token batch for multiple zero-padded utterances.
+
+        Args:
+            ys (torch.Tensor): torch.int64 prefix tokens (n_utt * n_hyps, ylen).
+            states (List[Any]): Scorer states for prefix tokens.
+            xs (torch.Tensor): The padded encoded features (n_utt, xlen, n_feat).
+            xs_lens (torch.Tensor): The lengths of the encoded features (n_utt,).
+
+        Returns:
+            tuple[torch.Tensor, List[Any]]: Tuple of
+                batchfied scores for next token with shape of
+                `(n_utt * n_hyps, n_vocab)` and next state list for ys.
+
+        """
+        return self.batch_score(ys, states, xs)
+
+    def batch_score_stacked(
+        self, ys: torch.Tensor, state: Any, xs: torch.Tensor
+    ) -> Tuple[torch.Tensor, Any]:
+        """Score new token batch with the stacked state.
+
+        Args:
+            ys (torch.Tensor): torch.int64 prefix tokens (n_batch, ylen).
+            state: Scorer state stacked over the prefix tokens, which is None.
+            xs (torch.Tensor):
+                The encoder feature that generates ys (n_batch, xlen, n_feat).
+
+        Returns:
+            tuple[torch.Tensor, Any]: Tuple of
+                batchfied scores for next token with shape of `(n_batch, n_vocab)`
+                and None
+
+        """
+        return self.batch_score(ys, state, xs)
+
+    def select_stacked_state(
+        self, state: Any, ids: torch.Tensor, new_ids: torch.Tensor = None
+    ) -> Any:
+        """Select the stacked states, which are always None."""
+        return None
@@ -1,8 +1,10 @@
 """Ngram lm implement."""
 
 from abc import ABC
+from collections import OrderedDict
 
 import kenlm
+import numpy as np
 import torch
 
 from espnet.nets.scorer_interface import BatchScorerInterface
@@ -12,18 +14,24 @@ from espnet.nets.scorer_interface import PartialScorerInterface
 class Ngrambase(ABC):
     """Ngram base implemented throught ScorerInterface."""
 
-    def __init__(self, ngram_model, token_list):
+    def __init__(self, ngram_model, token_list, cache_size=1024):
         """Initialize Ngrambase.
 
         Args:
             ngram_model: ngram model path
             token_list: token list from dict or model.json
+            cache_size: the number of contexts to cache the scores of tokens
 
         """
         self.chardict = [x if x != "<eos>" else "</s>" for x in token_list]
         self.charlen = len(self.chardict)
         self.lm = kenlm.LanguageModel(ngram_model)
         self.tmpkenlmstate = kenlm.State()
+        # LRU cache of the scores of the tokens keyed by the kenlm state,
+        # which is hashable and identifies the n-gram context.
+        # The tokens not scored yet by score_partial() are NaN
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
 
     def init_state(self, x):
         """Initialize tmp state."""
@@ -31,9 +39,60 @@ class Ngrambase(ABC):
         self.lm.NullContextWrite(state)
         return state
 
+    def next_state(self, y, state):
+        """Update the state with the last token of the prefix.
+
+        Args:
+            y: previous char
+            state: previous state
+
+        Returns:
+            kenlm.State: the state after the last token of y
+
+        """
+        out_state = kenlm.State()
+        ys = self.chardict[y[-1]] if y.shape[0] > 1 else "<s>"
+        self.lm.BaseScore(state, ys, out_state)
+        return out_state
+
+    def score_all(self, state):
+        """Score all tokens following the state with LRU cache.
+
+        Args:
+            state: kenlm state of the context
+
+        Returns:
+            np.ndarray: log10 probabilities of all tokens with shape of `(n_vocab,)`
+
+        """
+        scores = self._cached_scores(state)
+        self._fill_scores(state, scores, np.flatnonzero(np.isnan(scores)))
+        return scores
+
+    def _cached_scores(self, state):
+        """Get the cache entry of the state, which is NaN for unscored tokens."""
+        scores = self.cache.get(state)
+        if scores is not None:
+            self.cache.move_to_end(state)
+            return scores
+        scores = np.full(self.charlen, np.nan, dtype=np.float32)
+        if self.cache_size > 0:
+            self.cache[state] = scores
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        return scores
+
+    def _fill_scores(self, state, scores, tokens):
+        """Score the given tokens following the state into the cache entry."""
+        for j in tokens:
+            scores[j] = self.lm.BaseScore(state, self.chardict[j], self.tmpkenlmstate)
+
     def score_partial_(self, y, next_token, state, x):
         """Score interface for both full and partial scorer.
 
+        Only the tokens which are not scored yet for the context are
+        scored with kenlm and stored in the same LRU cache as score_all().
+
         Args:
             y: previous char
             next_token: next token need to be score
@@ -46,15 +105,12 @@ class Ngrambase(ABC):
                 and next state list for ys.
 
         """
-        out_state = kenlm.State()
-        ys = self.chardict[y[-1]] if y.shape[0] > 1 else "<s>"
-        self.lm.BaseScore(state, ys, out_state)
-        scores = torch.empty_like(next_token, dtype=x.dtype, device=y.device)
-        for i, j in enumerate(next_token):
-            scores[i] = self.lm.BaseScore(
-                out_state, self.chardict[j], self.tmpkenlmstate
-            )
-        return scores, out_state
+        out_state = self.next_state(y, state)
+        tokens = next_token.cpu().numpy()
+        scores = self._cached_scores(out_state)
+        self._fill_scores(out_state, scores, tokens[np.isnan(scores[tokens])])
+        scores = torch.from_numpy(scores[tokens])
+        return scores.to(dtype=x.dtype, device=y.device), out_state
 
 
 class NgramFullScorer(Ngrambase, BatchScorerInterface):
@@ -74,7 +130,36 @@ class NgramFullScorer(Ngrambase, BatchScorerInterface):
                 and next state list for ys.
 
         """
-        return self.score_partial_(y, torch.tensor(range(self.charlen)), state, x)
+        out_state = self.next_state(y, state)
+        scores = torch.from_numpy(self.score_all(out_state))
+        return scores.to(dtype=x.dtype, device=y.device), out_state
+
+    def batch_score(self, ys, states, xs):
+        """Score new token batch.
+
+        Args:
+            ys (torch.Tensor): torch.int64 prefix tokens (n_batch, ylen).
+            states (List[Any]): Scorer states for prefix tokens.
+            xs (torch.Tensor):
+                The encoder feature that generates ys (n_batch, xlen, n_feat).
+
+        Returns:
+            tuple[torch.Tensor, List[Any]]: Tuple of
+                batchfied scores for next token with shape of `(n_batch, n_vocab)`
+                and next state list for ys.
+
+        """
+        out_states = [self.next_state(y, state) for y, state in zip(ys, states)]
+        scores = torch.from_numpy(np.stack([self.score_all(s) for s in out_states]))
+        return scores.to(dtype=xs.dtype, device=xs.device), out_states
+
+    def batch_score_padded(self, ys, states, xs, xs_lens):
+        """Score new token batch for multiple utterances.
+
+        The n-gram LM doesn't depend on the encoded features.
+
+        """
+        return self.batch_score(ys, states, xs)
 
 
 class NgramPartScorer(Ngrambase, PartialScorerInterface):
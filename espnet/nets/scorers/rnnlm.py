@@ -0,0 +1,88 @@
+"""Scorer interface of the LM used by the legacy recognize() methods."""
+
+from typing import Any
+from typing import List
+from typing import Tuple
+
+import torch
+
+from espnet.nets.scorer_interface import BatchScorerInterface
+
+
+class RNNLMScorer(BatchScorerInterface):
+    """Wrap ClassifierWithState, i.e. "rnnlm" of E2E.recognize(), as a scorer.
+
+    The RNNLM states of the hypotheses are scored in a batch and
+    the other predictors, e.g. MultiLevelLM and LookAheadWordLM, are scored
+    one by one as ClassifierWithState.buff_predict() does.
+
+    """
+
+    def __init__(self, rnnlm: torch.nn.Module):
+        """Initialize class.
+
+        Args:
+            rnnlm (torch.nn.Module): ClassifierWithState LM module
+
+        """
+        self.rnnlm = rnnlm
+
+    def init_state(self, x: torch.Tensor) -> Any:
+        """Get an initial state for decoding."""
+        return None
+
+    def score(
+        self, y: torch.Tensor, state: Any, x: torch.Tensor
+    ) -> Tuple[torch.Tensor, Any]:
+        """Score new token.
+
+        Args:
+            y (torch.Tensor): 1D torch.int64 prefix tokens.
+            state: Scorer state for prefix tokens
+            x (torch.Tensor): encoder feature that generates ys.
+
+        Returns:
+            tuple[torch.Tensor, Any]: Tuple of
+                torch.float32 scores for next token (n_vocab)
+                and next state for ys
+
+        """
+        state, logp = self.rnnlm.predict(state, y[-1:])
+        return logp[0], state
+
+    def batch_score(
+        self, ys: torch.Tensor, states: List[Any], xs: torch.Tensor
+    ) -> Tuple[torch.Tensor, List[Any]]:
+        """Score new token batch.
+
+        Args:
+            ys (torch.Tensor): torch.int64 prefix tokens (n_batch, ylen).
+            states (List[Any]): Scorer states for prefix tokens.
+            xs (torch.Tensor):
+                The encoder feature that generates ys (n_batch, xlen, n_feat).
+
+        Returns:
+            tuple[torch.Tensor, List[Any]]: Tuple of
+                batchfied scores for next token with shape of `(n_batch, n_vocab)`
+                and next state list for ys.
+
+        """
+        is_rnnlm = self.rnnlm.predictor.__class__.__name__ == "RNNLM"
+        if not is_rnnlm or len(set(s is None for s in states)) > 1:
+            results = [self.score(y, s, x) for y, s, x in zip(ys, states, xs)]
+            return torch.stack([r[0] for r in results]), [r[1] for r in results]
+
+        if states[0] is None:
+            state = None
+        else:
+            # {"h": [(1, n_units)] * n_layers, ...} -> [(n_batch, n_units)] * ...
+            state = {
+                k: [torch.cat([s[k][i] for s in states]) for i in range(len(v))]
+                for k, v in states[0].items()
+            }
+        state, logp = self.rnnlm.predict(state, ys[:, -1])
+        new_states = [
+            {k: [h[b : b + 1] for h in v] for k, v in state.items()}
+            for b in range(len(ys))
+        ]
+        return logp, new_states
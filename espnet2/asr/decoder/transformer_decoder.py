@@ -4,6 +4,7 @@
 """Decoder definition."""
 from typing import Any
 from typing import List
+from typing import Optional
 from typing import Sequence
 from typing import Tuple
 
@@ -24,11 +25,11 @@ from espnet.nets.pytorch_backend.transformer.positionwise_feed_forward import (
     PositionwiseFeedForward,  # noqa: H301
 )
 from espnet.nets.pytorch_backend.transformer.repeat import repeat
-from espnet.nets.scorer_interface import BatchScorerInterface
+from espnet.nets.scorer_interface import BatchStackedStateScorerInterface
 from espnet2.asr.decoder.abs_decoder import AbsDecoder
 
 
-class BaseTransformerDecoder(AbsDecoder, BatchScorerInterface):
+class BaseTransformerDecoder(AbsDecoder, BatchStackedStateScorerInterface):
     """Base class of Transfomer decoder module.
 
     Args:
@@ -139,22 +140,41 @@ class BaseTransformerDecoder(AbsDecoder, BatchScorerInterface):
         olens = tgt_mask.sum(1)
         return x, olens
 
+    @property
+    def use_kv_cache(self) -> bool:
+        """Whether the self-attention keys and values are cached in decoding.
+
+        It's available only when all the self-attention modules are
+        MultiHeadedAttention, i.e. not for the convolution variants.
+        """
+        return all(
+            type(decoder.self_attn) is MultiHeadedAttention for decoder in self.decoders
+        )
+
     def forward_one_step(
         self,
         tgt: torch.Tensor,
         tgt_mask: torch.Tensor,
         memory: torch.Tensor,
         cache: List[torch.Tensor] = None,
+        memory_mask: torch.Tensor = None,
     ) -> Tuple[torch.Tensor, List[torch.Tensor]]:
         """Forward one step.
 
+        If `self.use_kv_cache` is True, the cache holds the keys and values
+        of the self-attention and only the new tokens, which are not in the cache,
+        are computed. Otherwise, it holds the outputs of each layer.
+
         Args:
             tgt: input token ids, int64 (batch, maxlen_out)
             tgt_mask: input token mask,  (batch, maxlen_out)
                       dtype=torch.uint8 in PyTorch 1.2-
                       dtype=torch.bool in PyTorch 1.2+ (include 1.2)
             memory: encoded memory, float32  (batch, maxlen_in, feat)
-            cache: cached output list of (batch, max_time_out-1, size)
+            cache: cached key and value list of
+                (batch, head, max_time_out-1, 2 * d_k) if `self.use_kv_cache`,
+                otherwise cached output list of (batch, max_time_out-1, size)
+            memory_mask: encoded memory mask, (batch, 1, maxlen_in)
         Returns:
             y, cache: NN output value and cache per `self.decoders`.
             y.shape` is (batch, maxlen_out, token)
@@ -163,11 +183,23 @@ class BaseTransformerDecoder(AbsDecoder, BatchScorerInterface):
         if cache is None:
             cache = [None] * len(self.decoders)
         new_cache = []
-        for c, decoder in zip(cache, self.decoders):
-            x, tgt_mask, memory, memory_mask = decoder(
-                x, tgt_mask, memory, None, cache=c
-            )
-            new_cache.append(x)
+        if self.use_kv_cache:
+            if cache[0] is not None:
+                # compute only the frames which are not cached
+                x = x[:, cache[0].size(2) :]
+            if tgt_mask is not None:
+                tgt_mask = tgt_mask[:, -x.size(1) :]
+            for c, decoder in zip(cache, self.decoders):
+                x, c = decoder.forward_with_cache(
+                    x, tgt_mask, memory, memory_mask, cache=c
+                )
+                new_cache.append(c)
+        else:
+            for c, decoder in zip(cache, self.decoders):
+                x, tgt_mask, memory, memory_mask = decoder(
+                    x, tgt_mask, memory, memory_mask, cache=c
+                )
+                new_cache.append(x)
 
         if self.normalize_before:
             y = self.after_norm(x[:, -1])
@@ -216,8 +248,88 @@ class BaseTransformerDecoder(AbsDecoder, BatchScorerInterface):
             ]
 
         # batch decoding
+        logp, states = self.batch_score_stacked(ys, batch_state, xs)
+
+        # transpose state of [layer, batch] into [batch, layer]
+        state_list = [[states[i][b] for i in range(n_layers)] for b in range(n_batch)]
+        return logp, state_list
+
+    def batch_score_stacked(
+        self, ys: torch.Tensor, state: Optional[List[torch.Tensor]], xs: torch.Tensor
+    ) -> Tuple[torch.Tensor, List[torch.Tensor]]:
+        """Score new token batch with the states stacked over the batch.
+
+        Args:
+            ys (torch.Tensor): torch.int64 prefix tokens (n_batch, ylen).
+            state (List[torch.Tensor]): The cache of each layer,
+                whose first dimension is n_batch, or None for the first step.
+            xs (torch.Tensor):
+                The encoder feature that generates ys (n_batch, xlen, n_feat).
+
+        Returns:
+            tuple[torch.Tensor, List[torch.Tensor]]: Tuple of
+                batchfied scores for next token with shape of `(n_batch, n_vocab)`
+                and the cache of each layer for ys.
+
+        """
         ys_mask = subsequent_mask(ys.size(-1), device=xs.device).unsqueeze(0)
-        logp, states = self.forward_one_step(ys, ys_mask, xs, cache=batch_state)
+        return self.forward_one_step(ys, ys_mask, xs, cache=state)
+
+    def select_stacked_state(
+        self,
+        state: Optional[List[torch.Tensor]],
+        ids: torch.Tensor,
+        new_ids: torch.Tensor = None,
+    ) -> Optional[List[torch.Tensor]]:
+        """Select the cache of each layer for the hypotheses of ids."""
+        if state is None:
+            return None
+        return [s.index_select(0, ids) for s in state]
+
+    def batch_score_padded(
+        self,
+        ys: torch.Tensor,
+        states: List[Any],
+        xs: torch.Tensor,
+        xs_lens: torch.Tensor,
+    ) -> Tuple[torch.Tensor, List[Any]]:
+        """Score new token batch for multiple zero-padded utterances.
+
+        Args:
+            ys (torch.Tensor): torch.int64 prefix tokens (n_utt * n_hyps, ylen).
+            states (List[Any]): Scorer states for prefix tokens.
+            xs (torch.Tensor): The padded encoded features (n_utt, xlen, n_feat).
+            xs_lens (torch.Tensor): The lengths of the encoded features (n_utt,).
+
+        Returns:
+            tuple[torch.Tensor, List[Any]]: Tuple of
+                batchfied scores for next token with shape of
+                `(n_utt * n_hyps, n_vocab)` and next state list for ys.
+
+        """
+        # merge states
+        n_batch = len(ys)
+        n_layers = len(self.decoders)
+        if states[0] is None:
+            batch_state = None
+        else:
+            # transpose state of [batch, layer] into [layer, batch]
+            batch_state = [
+                torch.stack([states[b][i] for b in range(n_batch)])
+                for i in range(n_layers)
+            ]
+
+        # expand the features of each utterance to its hypotheses
+        n_hyps = n_batch // len(xs)
+        memory = xs[:, : xs_lens.max()].repeat_interleave(n_hyps, dim=0)
+        memory_mask = (~make_pad_mask(xs_lens.repeat_interleave(n_hyps)))[:, None, :]
+        memory_mask = memory_mask.to(xs.device)
+
+        # batch decoding
+        ys_mask = subsequent_mask(ys.size(-1), device=xs.device).unsqueeze(0)
+        logp, states = self.forward_one_step(
+            ys, ys_mask, memory, cache=batch_state, memory_mask=memory_mask
+        )
 
         # transpose state of [layer, batch] into [batch, layer]
         state_list = [[states[i][b] for i in range(n_layers)] for b in range(n_batch)]
@@ -1,5 +1,4 @@
 from functools import reduce
-from itertools import permutations
 from typing import Dict
 from typing import List
 from typing import Optional
@@ -22,6 +21,8 @@ from espnet2.asr.encoder.abs_encoder import AbsEncoder
 from espnet2.asr.frontend.abs_frontend import AbsFrontend
 from espnet2.asr.specaug.abs_specaug import AbsSpecAug
 from espnet2.enh.abs_enh import AbsEnhancement
+from espnet2.enh.pit_solver import pairwise_loss
+from espnet2.enh.pit_solver import solve_pit
 from espnet2.layers.abs_normalize import AbsNormalize
 from espnet2.torch_utils.device_funcs import force_gatherable
 from espnet2.train.abs_espnet_model import AbsESPnetModel
@@ -630,15 +631,10 @@ class ESPnetEnhASRModel(AbsESPnetModel):
 
         if resort_pre:
             # speech_pre : list[(bs,T)] of spk
-            # perm : list[(num_spk)] of batch
-            speech_pre_list = []
-            for batch_idx, p in enumerate(perm):
-                batch_list = []
-                for spk_idx in p:
-                    batch_list.append(speech_pre[spk_idx][batch_idx])  # spk,T
-                speech_pre_list.append(torch.stack(batch_list, dim=0))
-
-            speech_pre = torch.stack(speech_pre_list, dim=0)  # bs,num_spk,T
+            # perm : (bs,num_spk)
+            speech_pre = torch.stack(speech_pre, dim=1)  # bs,num_spk,T
+            batch_idx = torch.arange(perm.size(0), device=perm.device).unsqueeze(1)
+            speech_pre = speech_pre[batch_idx, perm]
         else:
             speech_pre = torch.stack(speech_pre, dim=1)  # bs,num_spk,T
 
@@ -724,14 +720,14 @@ class ESPnetEnhASRModel(AbsESPnetModel):
         s_estimate = zero_mean_estimate  # [B, T]
         # s_target = <s', s>s / ||s||^2
         pair_wise_dot = torch.sum(s_estimate * s_target, dim=1, keepdim=True)  # [B, 1]
-        s_target_energy = torch.sum(s_target ** 2, dim=1, keepdim=True) + eps  # [B, 1]
+        s_target_energy = torch.sum(s_target**2, dim=1, keepdim=True) + eps  # [B, 1]
         pair_wise_proj = pair_wise_dot * s_target / s_target_energy  # [B, T]
         # e_noise = s' - s_target
         e_noise = s_estimate - pair_wise_proj  # [B, T]
 
         # SI-SNR = 10 * log_10(||s_target||^2 / ||e_noise||^2)
-        pair_wise_si_snr = torch.sum(pair_wise_proj ** 2, dim=1) / (
-            torch.sum(e_noise ** 2, dim=1) + eps
+        pair_wise_si_snr = torch.sum(pair_wise_proj**2, dim=1) / (
+            torch.sum(e_noise**2, dim=1) + eps
         )
         # print('pair_si_snr',pair_wise_si_snr[0,:])
         pair_wise_si_snr = 10 * torch.log10(pair_wise_si_snr + eps)  # [B]
@@ -747,28 +743,10 @@ class ESPnetEnhASRModel(AbsESPnetModel):
             ref (List[torch.Tensor]): [(batch, ...), ...]
             inf (List[torch.Tensor]): [(batch, ...), ...]
             criterion (function): Loss function
-            perm: (batch)
+            perm: (batch, num_spk)
         Returns:
-            loss: torch.Tensor: (batch)
-            perm: list[(num_spk)]
+            loss: torch.Tensor: scalar
+            perm: torch.Tensor: (batch, num_spk)
         """
-        num_spk = len(ref)
-
-        def pair_loss(permutation):
-            return sum(
-                [criterion(ref[s], inf[t]) for s, t in enumerate(permutation)]
-            ) / len(permutation)
-
-        losses = torch.stack(
-            [pair_loss(p) for p in permutations(range(num_spk))], dim=1
-        )
-        if perm is None:
-            loss, perm = torch.min(losses, dim=1)
-        else:
-            loss = losses[torch.arange(losses.shape[0]), perm]
-
-        perm_list = [p for p in permutations(range(num_spk))]
-        perm_detail = []
-        for p in perm:
-            perm_detail.append(perm_list[p])  # egs: list([1,0]) or list([0,2,1])
-        return loss.mean(), perm_detail
+        loss, perm = solve_pit(pairwise_loss(ref, inf, criterion), perm=perm)
+        return loss.mean(), perm
@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
 import argparse
+import copy
 import logging
 from pathlib import Path
 import sys
@@ -15,13 +16,22 @@ from typeguard import check_return_type
 from typing import List
 
 from espnet.nets.batch_beam_search import BatchBeamSearch
+from espnet.nets.batch_beam_search_multi_utt import BatchBeamSearchMultiUtt
 from espnet.nets.beam_search import BeamSearch
 from espnet.nets.beam_search import Hypothesis
+from espnet.nets.ctc_prefix_beam_search import CTCPrefixBeamSearch
+from espnet.nets.e2e_asr_common import end_detect
+from espnet.nets.pytorch_backend.transformer.subsampling import Conv2dSubsampling
+from espnet.nets.pytorch_backend.transformer.subsampling import Conv2dSubsampling6
+from espnet.nets.pytorch_backend.transformer.subsampling import Conv2dSubsampling8
 from espnet.nets.scorer_interface import BatchScorerInterface
 from espnet.nets.scorers.ctc import CTCPrefixScorer
 from espnet.nets.scorers.length_bonus import LengthBonus
 from espnet.utils.cli_utils import get_commandline_args
+from espnet2.asr.encoder.transformer_encoder import TransformerEncoder
+from espnet2.asr.frontend.default import DefaultFrontend
 from espnet2.fileio.datadir_writer import DatadirWriter
+from espnet2.layers.global_mvn import GlobalMVN
 from espnet2.tasks.asr import ASRTask
 from espnet2.tasks.lm import LMTask
 from espnet2.text.build_tokenizer import build_tokenizer
@@ -64,8 +74,14 @@ class Speech2Text:
         lm_weight: float = 1.0,
         penalty: float = 0.0,
         nbest: int = 1,
+        ctc_window_margin: int = 0,
+        ctc_prefix_beam_search: bool = False,
     ):
         assert check_argument_types()
+        if ctc_prefix_beam_search and ctc_weight != 1.0:
+            raise ValueError(
+                f"ctc_prefix_beam_search requires ctc_weight=1.0: {ctc_weight}"
+            )
 
         # 1. Build ASR model
         scorers = {}
@@ -75,7 +91,9 @@ class Speech2Text:
         asr_model.to(dtype=getattr(torch, dtype)).eval()
 
         decoder = asr_model.decoder
-        ctc = CTCPrefixScorer(ctc=asr_model.ctc, eos=asr_model.eos)
+        ctc = CTCPrefixScorer(
+            ctc=asr_model.ctc, eos=asr_model.eos, margin=ctc_window_margin
+        )
         token_list = asr_model.token_list
         scorers.update(
             decoder=decoder,
@@ -108,20 +126,34 @@ class Speech2Text:
             pre_beam_score_key=None if ctc_weight == 1.0 else "full",
         )
         # TODO(karita): make all scorers batchfied
-        if batch_size == 1:
-            non_batch = [
-                k
-                for k, v in beam_search.full_scorers.items()
-                if not isinstance(v, BatchScorerInterface)
-            ]
-            if len(non_batch) == 0:
+        non_batch = [
+            k
+            for k, v in beam_search.full_scorers.items()
+            if not isinstance(v, BatchScorerInterface)
+        ]
+        if ctc_prefix_beam_search:
+            beam_search = CTCPrefixBeamSearch(
+                ctc=asr_model.ctc,
+                beam_size=beam_size,
+                sos=asr_model.sos,
+                eos=asr_model.eos,
+                lm=scorers.get("lm"),
+                lm_weight=lm_weight,
+                penalty=penalty,
+            )
+            logging.info("CTCPrefixBeamSearch implementation is selected.")
+        elif len(non_batch) == 0:
+            if batch_size == 1:
                 beam_search.__class__ = BatchBeamSearch
                 logging.info("BatchBeamSearch implementation is selected.")
             else:
-                logging.warning(
-                    f"As non-batch scorers {non_batch} are found, "
-                    f"fall back to non-batch implementation."
-                )
+                beam_search.__class__ = BatchBeamSearchMultiUtt
+                logging.info("BatchBeamSearchMultiUtt implementation is selected.")
+        else:
+            logging.warning(
+                f"As non-batch scorers {non_batch} are found, "
+                f"fall back to non-batch implementation."
+            )
         beam_search.to(device=device, dtype=getattr(torch, dtype)).eval()
         for scorer in scorers.values():
             if isinstance(scorer, torch.nn.Module):
@@ -193,6 +225,80 @@ class Speech2Text:
         nbest_hyps = self.beam_search(
             x=enc[0], maxlenratio=self.maxlenratio, minlenratio=self.minlenratio
         )
+        results = self._hyps_to_results(nbest_hyps)
+        assert check_return_type(results)
+        return results
+
+    @torch.no_grad()
+    def batch_decode(
+        self,
+        speech: Union[torch.Tensor, np.ndarray],
+        speech_lengths: Union[torch.Tensor, np.ndarray],
+    ) -> List[List[Tuple[Optional[str], List[str], List[int], Hypothesis]]]:
+        """Inference for a zero-padded batch of utterances
+
+        The encoder is applied to the whole batch at once.
+        If all the scorers are batchfied, the beam search is also performed
+        for all the utterances at once by BatchBeamSearchMultiUtt
+        or CTCPrefixBeamSearch, otherwise each utterance is decoded one by one.
+
+        Args:
+            speech: Input speech data (Batch, Nsamples)
+            speech_lengths: The lengths of speech data (Batch,)
+        Returns:
+            The list of text, token, token_int, hyp for each utterance
+
+        """
+        assert check_argument_types()
+
+        # Input as audio signal
+        if isinstance(speech, np.ndarray):
+            speech = torch.tensor(speech)
+        if isinstance(speech_lengths, np.ndarray):
+            speech_lengths = torch.tensor(speech_lengths)
+
+        # Sort the utterances in descending order of the lengths
+        # because RNN encoders use pack_padded_sequence
+        sorted_ids = torch.argsort(speech_lengths, descending=True)
+        speech = speech[sorted_ids].to(getattr(torch, self.dtype))
+        speech_lengths = speech_lengths[sorted_ids].long()
+        batch = {"speech": speech, "speech_lengths": speech_lengths}
+
+        # a. To device
+        batch = to_device(batch, device=self.device)
+
+        # b. Forward Encoder
+        enc, enc_lens = self.asr_model.encode(**batch)
+        assert len(enc) == len(speech), (len(enc), len(speech))
+
+        # c. Passed the encoder result and the beam search
+        if isinstance(self.beam_search, (BatchBeamSearchMultiUtt, CTCPrefixBeamSearch)):
+            nbest_hyps_list = self.beam_search.batch_forward(
+                xs=enc,
+                xs_lens=enc_lens,
+                maxlenratio=self.maxlenratio,
+                minlenratio=self.minlenratio,
+            )
+        else:
+            nbest_hyps_list = [
+                self.beam_search(
+                    x=x[:xlen],
+                    maxlenratio=self.maxlenratio,
+                    minlenratio=self.minlenratio,
+                )
+                for x, xlen in zip(enc, enc_lens)
+            ]
+
+        # Revert the order of the utterances
+        results = [None] * len(nbest_hyps_list)
+        for i, hyps in zip(sorted_ids.tolist(), nbest_hyps_list):
+            results[i] = self._hyps_to_results(hyps)
+        assert check_return_type(results)
+        return results
+
+    def _hyps_to_results(
+        self, nbest_hyps: List[Hypothesis]
+    ) -> List[Tuple[Optional[str], List[str], List[int], Hypothesis]]:
         nbest_hyps = nbest_hyps[: self.nbest]
 
         results = []
@@ -213,10 +319,317 @@ class Speech2Text:
             else:
                 text = None
             results.append((text, token, token_int, hyp))
+        return results
 
+
+class Speech2TextStreaming:
+    """Streaming session of Speech2Text
+
+    The audio is given chunk by chunk and the partial results are returned
+    for each chunk. The frontend computes only the STFT frames of the new samples
+    keeping the overlapped samples, and the encoder processes the features block
+    by block with a fixed number of the left context and look-ahead frames,
+    so that the computation for each chunk doesn't grow with the utterance length.
+    The beam search is continued from the previous chunk while the best
+    hypothesis doesn't reach <eos>, and the rest is decoded at the final chunk.
+
+    Note that the decoder states of the prefixes are not recomputed
+    when the encoder output is extended, and the windowed encoder doesn't see
+    the whole utterance, so the results can differ from those of Speech2Text.
+    The model must have DefaultFrontend without WPE and beamformer
+    or no frontend, frame-wise or no normalization, TransformerEncoder,
+    and the batchfied scorers. A Speech2Text object can be shared by the sessions
+    which are not used at the same time.
+
+    Examples:
+        >>> import soundfile
+        >>> speech2text = Speech2Text("asr_config.yml", "asr.pth")
+        >>> session = Speech2TextStreaming(speech2text)
+        >>> audio, rate = soundfile.read("speech.wav")
+        >>> for i in range(0, len(audio), 1600):
+        ...     chunk = audio[i : i + 1600]
+        ...     results = session(chunk, is_final=i + 1600 >= len(audio))
+        [(text, token, token_int, hypothesis object), ...]
+
+    """
+
+    def __init__(
+        self,
+        speech2text: Speech2Text,
+        block_size: int = 16,
+        left_context: int = 16,
+        look_ahead: int = 4,
+    ):
+        assert check_argument_types()
+        asr_model = speech2text.asr_model
+        if asr_model.frontend is not None and (
+            not isinstance(asr_model.frontend, DefaultFrontend)
+            or asr_model.frontend.frontend is not None
+            and (
+                asr_model.frontend.frontend.use_wpe
+                or asr_model.frontend.frontend.use_beamformer
+            )
+        ):
+            raise NotImplementedError(
+                f"Streaming is not supported for {asr_model.frontend}"
+            )
+        if asr_model.normalize is not None and not isinstance(
+            asr_model.normalize, GlobalMVN
+        ):
+            raise NotImplementedError(
+                f"Streaming is not supported for {asr_model.normalize}"
+            )
+        if not isinstance(asr_model.encoder, TransformerEncoder):
+            raise NotImplementedError(
+                f"Streaming is not supported for {type(asr_model.encoder).__name__}"
+            )
+        if type(speech2text.beam_search) is not BatchBeamSearch:
+            raise NotImplementedError(
+                "Streaming requires BatchBeamSearch, "
+                "i.e. batch_size=1 and all the scorers are batchfied"
+            )
+        if block_size <= 0:
+            raise ValueError(f"block_size must be > 0: {block_size}")
+
+        self.speech2text = speech2text
+        self.asr_model = asr_model
+        self.beam_search = speech2text.beam_search
+        self.block_size = block_size
+        self.left_context = left_context
+        self.look_ahead = look_ahead
+
+        if asr_model.frontend is not None:
+            # The centering is emulated by padding the both ends of the utterance
+            self.stft = copy.copy(asr_model.frontend.stft)
+            self.stft.center = False
+        # The number of the input frames per encoder frame
+        # and the receptive field of an encoder frame
+        if isinstance(asr_model.encoder.embed, Conv2dSubsampling):
+            self.subsampling, self.receptive_field = 4, 7
+        elif isinstance(asr_model.encoder.embed, Conv2dSubsampling6):
+            self.subsampling, self.receptive_field = 6, 11
+        elif isinstance(asr_model.encoder.embed, Conv2dSubsampling8):
+            self.subsampling, self.receptive_field = 8, 15
+        else:
+            self.subsampling, self.receptive_field = 1, 1
+        self.reset()
+
+    def reset(self):
+        """Reset the states to start a new utterance."""
+        # Frontend: the samples which are not consumed by the STFT frames
+        self.wav_buffer = None
+        self.wav_tail = None
+        self.wav_started = False
+        # Encoder: the features from the frame "self.feats_offset"
+        self.feats = None
+        self.feats_offset = 0
+        self.num_encoded = 0
+        self.encoder_out = None
+        # Decoder
+        self.running_hyps = None
+        self.ended_hyps = []
+        self.num_steps = 0
+
+    @torch.no_grad()
+    def __call__(
+        self, speech: Union[torch.Tensor, np.ndarray], is_final: bool = False
+    ) -> List[Tuple[Optional[str], List[str], List[int], Hypothesis]]:
+        """Process a chunk of speech
+
+        Args:
+            speech: Input speech chunk (Nsamples,),
+                or features (Nframes, Dim) if the model has no frontend
+            is_final: Whether the chunk is the last one of the utterance.
+                The session is reset after the final chunk.
+        Returns:
+            text, token, token_int, hyp of the partial results
+            or the final results if is_final
+
+        """
+        assert check_argument_types()
+        if isinstance(speech, np.ndarray):
+            speech = torch.tensor(speech)
+        speech = speech.to(getattr(torch, self.speech2text.dtype))
+        speech = to_device(speech, device=self.speech2text.device)
+
+        feats = self._extract_feats(speech, is_final)
+        if feats is not None:
+            if self.feats is None:
+                self.feats = feats
+            else:
+                self.feats = torch.cat([self.feats, feats], dim=0)
+        if self._encode(is_final) or (is_final and self.encoder_out is not None):
+            self._decode(is_final)
+
+        if is_final:
+            nbest_hyps = sorted(self.ended_hyps, key=lambda x: x.score, reverse=True)
+            self.reset()
+        elif self.running_hyps is None:
+            nbest_hyps = []
+        else:
+            nbest_hyps = [
+                self.beam_search._select(self.running_hyps, i)
+                for i in range(len(self.running_hyps))
+            ]
+            # Append <eos> as the ended hypotheses to convert them to the results
+            nbest_hyps = [
+                h._replace(
+                    yseq=self.beam_search.append_token(h.yseq, self.beam_search.eos)
+                )
+                for h in nbest_hyps
+            ]
+        results = self.speech2text._hyps_to_results(nbest_hyps)
         assert check_return_type(results)
         return results
 
+    def _extract_feats(
+        self, speech: torch.Tensor, is_final: bool
+    ) -> Optional[torch.Tensor]:
+        if self.asr_model.frontend is None:
+            feats = speech
+        else:
+            pad = self.stft.n_fft // 2
+            # Keep the last samples for the reflect-padding at the end
+            if self.wav_tail is not None:
+                self.wav_tail = torch.cat([self.wav_tail, speech])[-pad - 1 :]
+            else:
+                self.wav_tail = speech[-pad - 1 :]
+
+            if self.wav_buffer is not None:
+                speech = torch.cat([self.wav_buffer, speech])
+            if not self.wav_started:
+                if len(speech) <= pad and not is_final:
+                    # Need more samples for the reflect-padding at the beginning
+                    self.wav_buffer = speech
+                    return None
+                speech = torch.cat([speech[1 : pad + 1].flip(0), speech])
+                self.wav_started = True
+            if is_final:
+                speech = torch.cat([speech, self.wav_tail[:-1].flip(0)])
+
+            n_frames = (len(speech) - self.stft.n_fft) // self.stft.hop_length + 1
+            self.wav_buffer = speech[n_frames * self.stft.hop_length :]
+            if n_frames <= 0:
+                return None
+
+            input_stft, _ = self.stft(speech[None])
+            input_power = input_stft[..., 0] ** 2 + input_stft[..., 1] ** 2
+            feats, _ = self.asr_model.frontend.logmel(input_power)
+            feats = feats[0]
+
+        if self.asr_model.normalize is not None:
+            lengths = feats.new_full([1], dtype=torch.long, fill_value=len(feats))
+            feats, _ = self.asr_model.normalize(feats[None], lengths)
+            feats = feats[0]
+        return feats
+
+    def _encode(self, is_final: bool) -> bool:
+        """Encode the blocks of the features and return whether any is encoded."""
+        if self.feats is None:
+            return False
+        num_feats = self.feats_offset + len(self.feats)
+        if num_feats < self.receptive_field:
+            return False
+        # The number of the encoder frames computable from the features
+        num_frames = (num_feats - self.receptive_field) // self.subsampling + 1
+
+        encoded = False
+        while self.num_encoded < num_frames:
+            start = self.num_encoded
+            if is_final:
+                end = min(start + self.block_size, num_frames)
+            elif start + self.block_size + self.look_ahead <= num_frames:
+                end = start + self.block_size
+            else:
+                break
+            # The window of the encoder frames including the context frames
+            window_start = max(start - self.left_context, 0)
+            window_end = min(end + self.look_ahead, num_frames)
+            feats = self.feats[
+                window_start * self.subsampling
+                - self.feats_offset : (window_end - 1) * self.subsampling
+                + self.receptive_field
+                - self.feats_offset
+            ]
+            lengths = feats.new_full([1], dtype=torch.long, fill_value=len(feats))
+            encoder_out, _, _ = self.asr_model.encoder(feats[None], lengths)
+            assert encoder_out.size(1) == window_end - window_start, (
+                encoder_out.shape,
+                window_end - window_start,
+            )
+            encoder_out = encoder_out[0, start - window_start : end - window_start]
+
+            if self.encoder_out is None:
+                self.encoder_out = encoder_out
+            else:
+                self.encoder_out = torch.cat([self.encoder_out, encoder_out], dim=0)
+            self.num_encoded = end
+            encoded = True
+
+        # Discard the features which are no longer used as the left context
+        discard = (
+            max(self.num_encoded - self.left_context, 0) * self.subsampling
+            - self.feats_offset
+        )
+        if discard > 0:
+            self.feats = self.feats[discard:]
+            self.feats_offset += discard
+        return encoded
+
+    def _decode(self, is_final: bool):
+        beam_search = self.beam_search
+        x = self.encoder_out
+        if self.running_hyps is None:
+            self.running_hyps = beam_search.init_hyp(x)
+        else:
+            # Extend the states which depend on the length of the encoder output
+            states = self.running_hyps.states
+            for k, d in beam_search.scorers.items():
+                if hasattr(d, "extend_prob"):
+                    d.extend_prob(x)
+                if hasattr(d, "extend_state"):
+                    if beam_search.use_stacked_states:
+                        states[k] = d.extend_state(states[k])
+                    else:
+                        states[k] = [d.extend_state(s) for s in states[k]]
+
+        if not is_final:
+            # The last step is left to the final chunk, which ends all the hypotheses
+            while self.num_steps < x.size(0) - 1:
+                best = beam_search.search(self.running_hyps, x)
+                is_eos = best.yseq[torch.arange(len(best)), best.length - 1] == (
+                    beam_search.eos
+                )
+                if is_eos[0]:
+                    # Wait for the next chunk not to end the utterance too early
+                    break
+                # Keep the other ended hypotheses as post_process() does
+                for b in torch.nonzero(is_eos).view(-1):
+                    self.ended_hyps.append(beam_search._select(best, b))
+                self.running_hyps = beam_search._batch_select(
+                    best, torch.nonzero(~is_eos).view(-1)
+                )
+                self.num_steps += 1
+            return
+
+        maxlenratio = self.speech2text.maxlenratio
+        if maxlenratio == 0:
+            maxlen = x.size(0)
+        else:
+            maxlen = max(1, int(maxlenratio * x.size(0)))
+        maxlen = max(maxlen, self.num_steps + 1)
+        for i in range(self.num_steps, maxlen):
+            best = beam_search.search(self.running_hyps, x)
+            self.running_hyps = beam_search.post_process(
+                i, maxlen, maxlenratio, best, self.ended_hyps
+            )
+            if maxlenratio == 0.0 and end_detect(
+                [h.asdict() for h in self.ended_hyps], i
+            ):
+                break
+            if len(self.running_hyps) == 0:
+                break
+
 
 def inference(
     output_dir: str,
@@ -231,6 +644,8 @@ def inference(
     lm_weight: float,
     penalty: float,
     nbest: int,
+    ctc_window_margin: int,
+    ctc_prefix_beam_search: bool,
     num_workers: int,
     log_level: Union[int, str],
     data_path_and_name_and_type: Sequence[Tuple[str, str, str]],
@@ -246,8 +661,6 @@ def inference(
     allow_variable_data_keys: bool,
 ):
     assert check_argument_types()
-    if batch_size > 1:
-        raise NotImplementedError("batch decoding is not implemented")
     if word_lm_train_config is not None:
         raise NotImplementedError("Word LM is not implemented")
     if ngpu > 1:
@@ -277,12 +690,15 @@ def inference(
         device=device,
         maxlenratio=maxlenratio,
         minlenratio=minlenratio,
+        batch_size=batch_size,
         dtype=dtype,
         beam_size=beam_size,
         ctc_weight=ctc_weight,
         lm_weight=lm_weight,
         penalty=penalty,
         nbest=nbest,
+        ctc_window_margin=ctc_window_margin,
+        ctc_prefix_beam_search=ctc_prefix_beam_search,
     )
 
     # 3. Build data-iterator
@@ -306,24 +722,32 @@ def inference(
             assert all(isinstance(s, str) for s in keys), keys
             _bs = len(next(iter(batch.values())))
             assert len(keys) == _bs, f"{len(keys)} != {_bs}"
-            batch = {k: v[0] for k, v in batch.items() if not k.endswith("_lengths")}
 
-            # N-best list of (text, token, token_int, hyp_object)
-            results = speech2text(**batch)
+            if batch_size == 1:
+                batch = {
+                    k: v[0] for k, v in batch.items() if not k.endswith("_lengths")
+                }
+                # N-best list of (text, token, token_int, hyp_object)
+                results_list = [speech2text(**batch)]
+            else:
+                results_list = speech2text.batch_decode(
+                    batch["speech"], batch["speech_lengths"]
+                )
 
-            # Only supporting batch_size==1
-            key = keys[0]
-            for n, (text, token, token_int, hyp) in zip(range(1, nbest + 1), results):
-                # Create a directory: outdir/{n}best_recog
-                ibest_writer = writer[f"{n}best_recog"]
+            for key, results in zip(keys, results_list):
+                for n, (text, token, token_int, hyp) in zip(
+                    range(1, nbest + 1), results
+                ):
+                    # Create a directory: outdir/{n}best_recog
+                    ibest_writer = writer[f"{n}best_recog"]
 
-                # Write the result to each file
-                ibest_writer["token"][key] = " ".join(token)
-                ibest_writer["token_int"][key] = " ".join(map(str, token_int))
-                ibest_writer["score"][key] = str(hyp.score)
+                    # Write the result to each file
+                    ibest_writer["token"][key] = " ".join(token)
+                    ibest_writer["token_int"][key] = " ".join(map(str, token_int))
+                    ibest_writer["score"][key] = str(hyp.score)
 
-                if text is not None:
-                    ibest_writer["text"][key] = text
+                    if text is not None:
+                        ibest_writer["text"][key] = text
 
 
 def get_parser():
@@ -412,6 +836,22 @@ def get_parser():
         default=0.5,
         help="CTC weight in joint decoding",
     )
+    group.add_argument(
+        "--ctc_window_margin",
+        type=int,
+        default=0,
+        help="If > 0, the CTC prefix scores are computed only in the frames "
+        "within this margin around the frames where the last labels "
+        "are most likely to be emitted",
+    )
+    group.add_argument(
+        "--ctc_prefix_beam_search",
+        type=str2bool,
+        default=False,
+        help="Use the frame-synchronous CTC prefix beam search "
+        "instead of the label-synchronous beam search. "
+        "It requires ctc_weight=1.0",
+    )
     group.add_argument("--lm_weight", type=float, default=1.0, help="RNNLM weight")
 
     group = parser.add_argument_group("Text converter related")
@@ -45,8 +45,6 @@ def inference(
     normalize_output_wav: bool,
 ):
     assert check_argument_types()
-    if batch_size > 1:
-        raise NotImplementedError("batch decoding is not implemented")
     if ngpu > 1:
         raise NotImplementedError("only single GPU decoding is supported")
 
@@ -99,23 +97,26 @@ def inference(
         with torch.no_grad():
             # a. To device
             batch = to_device(batch, device)
-            # b. Forward Enhancement Frontend
+            # b. Sort by the lengths because RNN-based separators
+            #    require the descending order
+            lengths = batch["speech_mix_lengths"]
+            sorted_ids = torch.argsort(lengths, descending=True)
+            # c. Forward Enhancement Frontend
             waves, _, _ = enh_model.enh_model.forward_rawwav(
-                batch["speech_mix"], batch["speech_mix_lengths"]
+                batch["speech_mix"][sorted_ids], lengths[sorted_ids]
             )
-            assert len(waves[0]) == batch_size, len(waves[0])
-
-        # FIXME(Chenda): will be incorrect when
-        #  batch size is not 1 or multi-channel case
-        if normalize_output_wav:
-            waves = [
-                (w / abs(w).max(dim=1, keepdim=True)[0] * 0.9).T.cpu().numpy()
-                for w in waves
-            ]  # list[(sample,batch)]
-        else:
-            waves = [w.T.cpu().numpy() for w in waves]
-        for (i, w) in enumerate(waves):
-            writers[i][keys[0]] = fs, w
+            assert len(waves[0]) == _bs, len(waves[0])
+
+        waves = [w.cpu() for w in waves]  # list[(batch, sample, ...)]
+        lengths = lengths[sorted_ids].cpu().tolist()
+        keys = [keys[j] for j in sorted_ids.tolist()]
+        for b, (key, length) in enumerate(zip(keys, lengths)):
+            for (i, w) in enumerate(waves):
+                # Trim the padded part: (sample,) or (sample, channel)
+                w = w[b, :length]
+                if normalize_output_wav:
+                    w = w / abs(w).max(dim=0, keepdim=True)[0] * 0.9
+                writers[i][key] = fs, w.numpy()
 
     for writer in writers:
         writer.close()
@@ -1,21 +1,121 @@
 #!/usr/bin/env python3
 import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 import logging
 import sys
+from typing import Dict
 from typing import List
+from typing import Tuple
 from typing import Union
 
 from mir_eval.separation import bss_eval_sources
 import numpy as np
 from pystoi import stoi
+import torch
 from typeguard import check_argument_types
 
+from espnet.nets.pytorch_backend.nets_utils import make_non_pad_mask
+from espnet.nets.pytorch_backend.nets_utils import pad_list
 from espnet.utils.cli_utils import get_commandline_args
+from espnet2.enh.pit_solver import solve_pit
 from espnet2.fileio.datadir_writer import DatadirWriter
 from espnet2.fileio.sound_scp import SoundScpReader
 from espnet2.utils import config_argparse
 
 
+# The readers of each worker process, which are set by _init_readers()
+_readers = None
+
+
+def _init_readers(ref_scp: List[str], inf_scp: List[str], dtype: str):
+    global _readers
+    _readers = (
+        [SoundScpReader(f, dtype=dtype, normalize=True) for f in ref_scp],
+        [SoundScpReader(f, dtype=dtype, normalize=True) for f in inf_scp],
+    )
+
+
+def _load(key: str, ref_channel: int) -> Tuple[int, np.ndarray, np.ndarray]:
+    ref_readers, inf_readers = _readers
+    sample_rate, _ = ref_readers[0][key]
+    ref = np.array([ref_reader[key][1] for ref_reader in ref_readers])
+    inf = np.array([inf_reader[key][1] for inf_reader in inf_readers])
+    if ref.ndim > inf.ndim:
+        # multi-channel reference and single-channel output
+        ref = ref[..., ref_channel]
+        assert ref.shape == inf.shape, (ref.shape, inf.shape)
+    elif ref.ndim < inf.ndim:
+        # single-channel reference and multi-channel output
+        raise ValueError(
+            "Reference must be multi-channel when the \
+            network output is multi-channel."
+        )
+    return sample_rate, ref, inf
+
+
+def batch_si_snr(
+    refs: List[np.ndarray], infs: List[np.ndarray], eps: float = 1e-8
+) -> np.ndarray:
+    """Compute SI-SNR of many utterances at once with the best permutations.
+
+    Args:
+        refs: [(num_spk, T_i), ...] x num_utts
+        infs: [(num_spk, T_i), ...] x num_utts
+    Returns:
+        np.ndarray: (num_utts, num_spk), SI-SNR of each reference
+            with the estimate assigned by the permutation maximizing the average
+    """
+    lengths = torch.tensor([r.shape[-1] for r in refs], dtype=torch.float64)
+    # (B, num_spk, T)
+    ref = pad_list([torch.from_numpy(r).double().t() for r in refs], 0.0)
+    inf = pad_list([torch.from_numpy(i).double().t() for i in infs], 0.0)
+    ref, inf = ref.transpose(1, 2), inf.transpose(1, 2)
+    mask = make_non_pad_mask(lengths.long(), ref, 2)
+
+    # zero-mean over the valid samples
+    ref = (ref - ref.sum(-1, keepdim=True) / lengths[:, None, None]) * mask
+    inf = (inf - inf.sum(-1, keepdim=True) / lengths[:, None, None]) * mask
+
+    # (B, num_spk(ref), num_spk(inf))
+    dot = torch.einsum("bst,but->bsu", ref, inf)
+    ref_energy = (ref**2).sum(-1, keepdim=True) + eps
+    inf_energy = (inf**2).sum(-1).unsqueeze(1)
+    # The energy of the projection onto the reference and of the residual
+    proj_energy = dot**2 / ref_energy
+    noise_energy = (inf_energy - proj_energy).clamp(min=0)
+    pair_si_snr = 10 * torch.log10(proj_energy / (noise_energy + eps) + eps)
+
+    _, perm = solve_pit(-pair_si_snr)
+    return pair_si_snr.gather(2, perm.unsqueeze(2)).squeeze(2).numpy()
+
+
+def _score(
+    keys: List[str], ref_channel: int, scoring_type: str
+) -> List[Dict[str, List[float]]]:
+    """Score the utterances and return the scores of each speaker."""
+    if scoring_type == "si_snr":
+        refs, infs = zip(*[_load(key, ref_channel)[1:] for key in keys])
+        return [{"SI_SNR": list(scores)} for scores in batch_si_snr(refs, infs)]
+
+    results = []
+    for key in keys:
+        sample_rate, ref, inf = _load(key, ref_channel)
+        sdr, sir, sar, perm = bss_eval_sources(ref, inf, compute_permutation=True)
+        results.append(
+            {
+                "STOI": [
+                    stoi(ref[i], inf[int(perm[i])], fs_sig=sample_rate)
+                    for i in range(len(ref))
+                ],
+                "SDR": list(sdr),
+                "SAR": list(sar),
+                "SIR": list(sir),
+            }
+        )
+    return results
+
+
 def scoring(
     output_dir: str,
     dtype: str,
@@ -24,6 +124,10 @@ def scoring(
     ref_scp: List[str],
     inf_scp: List[str],
     ref_channel: int,
+    scoring_type: str = "bss_eval",
+    batch_size: int = 1,
+    num_workers: int = 0,
+    prefetch_factor: int = 2,
 ):
     assert check_argument_types()
 
@@ -39,41 +143,51 @@ def scoring(
         line.rstrip().split(maxsplit=1)[0] for line in open(key_file, encoding="utf-8")
     ]
 
-    ref_readers = [SoundScpReader(f, dtype=dtype, normalize=True) for f in ref_scp]
-    inf_readers = [SoundScpReader(f, dtype=dtype, normalize=True) for f in inf_scp]
-
-    # get sample rate
-    sample_rate, _ = ref_readers[0][keys[0]]
-
     # check keys
-    for inf_reader, ref_reader in zip(inf_readers, ref_readers):
+    _init_readers(ref_scp, inf_scp, dtype)
+    for inf_reader, ref_reader in zip(*_readers):
         assert inf_reader.keys() == ref_reader.keys()
 
-    with DatadirWriter(output_dir) as writer:
-        for key in keys:
-            ref_audios = [ref_reader[key][1] for ref_reader in ref_readers]
-            inf_audios = [inf_reader[key][1] for inf_reader in inf_readers]
-            ref = np.array(ref_audios)
-            inf = np.array(inf_audios)
-            if ref.ndim > inf.ndim:
-                # multi-channel reference and single-channel output
-                ref = ref[..., ref_channel]
-                assert ref.shape == inf.shape, (ref.shape, inf.shape)
-            elif ref.ndim < inf.ndim:
-                # single-channel reference and multi-channel output
-                raise ValueError(
-                    "Reference must be multi-channel when the \
-                    network output is multi-channel."
-                )
+    batches = [keys[i : i + batch_size] for i in range(0, len(keys), batch_size)]
+    if num_workers > 0:
+        executor = ProcessPoolExecutor(
+            num_workers, initializer=_init_readers, initargs=(ref_scp, inf_scp, dtype)
+        )
+    else:
+        executor = None
+
+    def _results():
+        if executor is None:
+            for batch_keys in batches:
+                yield batch_keys, _score(batch_keys, ref_channel, scoring_type)
+            return
 
-            sdr, sir, sar, perm = bss_eval_sources(ref, inf, compute_permutation=True)
+        # Bound the number of the batches in flight
+        # so that the loaded audios don't pile up
+        futures = deque()
+        for batch_keys in batches:
+            if len(futures) >= num_workers * prefetch_factor:
+                yield futures[0][0], futures.popleft()[1].result()
+            futures.append(
+                (
+                    batch_keys,
+                    executor.submit(_score, batch_keys, ref_channel, scoring_type),
+                )
+            )
+        while len(futures) > 0:
+            yield futures[0][0], futures.popleft()[1].result()
 
-            for i in range(num_spk):
-                stoi_score = stoi(ref[i], inf[int(perm[i])], fs_sig=sample_rate)
-                writer[f"STOI_spk{i + 1}"][key] = str(stoi_score)
-                writer[f"SDR_spk{i + 1}"][key] = str(sdr[i])
-                writer[f"SAR_spk{i + 1}"][key] = str(sar[i])
-                writer[f"SIR_spk{i + 1}"][key] = str(sir[i])
+    try:
+        # Write the scores in the order of the key file
+        with DatadirWriter(output_dir) as writer:
+            for batch_keys, results in _results():
+                for key, result in zip(batch_keys, results):
+                    for i in range(num_spk):
+                        for name, scores in result.items():
+                            writer[f"{name}_spk{i + 1}"][key] = str(scores[i])
+    finally:
+        if executor is not None:
+            executor.shutdown()
 
 
 def get_parser():
@@ -118,6 +232,34 @@ def get_parser():
     group.add_argument("--key_file", type=str)
     group.add_argument("--ref_channel", type=int, default=0)
 
+    group = parser.add_argument_group("Scoring related")
+    group.add_argument(
+        "--scoring_type",
+        type=str,
+        default="bss_eval",
+        choices=["bss_eval", "si_snr"],
+        help="bss_eval: STOI, SDR, SAR and SIR by mir_eval and pystoi. "
+        "si_snr: SI-SNR computed for a batch of utterances at once",
+    )
+    group.add_argument(
+        "--batch_size",
+        type=int,
+        default=1,
+        help="The number of utterances scored in a call",
+    )
+    group.add_argument(
+        "--num_workers",
+        type=int,
+        default=0,
+        help="The number of worker processes. 0 means scoring in the main process",
+    )
+    group.add_argument(
+        "--prefetch_factor",
+        type=int,
+        default=2,
+        help="The number of batches in flight per worker",
+    )
+
     return parser
 
 
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+import argparse
+import logging
+import sys
+from typing import List
+
+import kaldiio
+
+from espnet.utils.cli_utils import get_commandline_args
+from espnet2.fileio.npy_scp import NpyScpReader
+from espnet2.fileio.packed_array import PackedArrayWriter
+
+
+def pack_arrays(
+    scps: List[str],
+    input_type: str,
+    output_dir: str,
+    shard_size: int,
+    log_level: str,
+):
+    logging.basicConfig(
+        level=log_level,
+        format="%(asctime)s (%(module)s:%(lineno)d) %(levelname)s: %(message)s",
+    )
+
+    num_utts = 0
+    with PackedArrayWriter(output_dir, shard_size=shard_size) as writer:
+        for scp in scps:
+            if input_type == "npy":
+                # e.g. collect_feats/feats.scp from collect_stats
+                reader = NpyScpReader(scp)
+            else:
+                reader = kaldiio.load_scp(scp)
+            for key in reader:
+                writer[key] = reader[key]
+                num_utts += 1
+    logging.info(f"Packed {num_utts} arrays into {writer.num_shards} shards")
+
+
+def get_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Pack arrays into shards of the packed array format, "
+        "which can be loaded by the 'packed' data type",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "--log_level",
+        type=lambda x: x.upper(),
+        default="INFO",
+        choices=("CRITICAL", "ERROR", "WARNING", "INFO", "DEBUG", "NOTSET"),
+        help="The verbose level of logging",
+    )
+
+    parser.add_argument(
+        "--scps",
+        required=True,
+        nargs="+",
+        help="Input scp files. The keys must be unique among all files",
+    )
+    parser.add_argument(
+        "--input_type",
+        default="npy",
+        choices=["npy", "kaldi_ark"],
+        help="The format of the input scp files",
+    )
+    parser.add_argument("--output_dir", required=True, help="Output directory")
+    parser.add_argument(
+        "--shard_size",
+        type=int,
+        default=10000,
+        help="The number of arrays in a shard",
+    )
+    return parser
+
+
+def main(cmd=None):
+    print(get_commandline_args(), file=sys.stderr)
+    parser = get_parser()
+    args = parser.parse_args(cmd)
+    kwargs = vars(args)
+    pack_arrays(**kwargs)
+
+
+if __name__ == "__main__":
+    main()
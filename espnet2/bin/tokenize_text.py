@@ -1,9 +1,12 @@
 #!/usr/bin/env python3
 import argparse
 from collections import Counter
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 import logging
 from pathlib import Path
 import sys
+from typing import Iterable
 from typing import List
 from typing import Optional
 
@@ -60,6 +63,56 @@ def field2slice(field: Optional[str]) -> slice:
     return slic
 
 
+# The tokenizer of each worker process, which is set by _init_tokenizer()
+_tokenizer = None
+
+
+def _init_tokenizer(
+    field: Optional[str],
+    delimiter: Optional[str],
+    cleaner: Optional[str],
+    tokenizer_kwargs: dict,
+):
+    global _tokenizer
+    _tokenizer = (
+        field2slice(field) if field is not None else None,
+        delimiter,
+        TextCleaner(cleaner),
+        build_tokenizer(delimiter=delimiter, **tokenizer_kwargs),
+    )
+
+
+def _tokenize_lines(lines: List[str]) -> List[List[str]]:
+    field, delimiter, cleaner, tokenizer = _tokenizer
+    retval = []
+    for line in lines:
+        line = line.rstrip()
+        if field is not None:
+            # e.g. field="2-"
+            # uttidA hello world!! -> hello world!!
+            tokens = line.split(delimiter)
+            tokens = tokens[field]
+            if delimiter is None:
+                line = " ".join(tokens)
+            else:
+                line = delimiter.join(tokens)
+
+        line = cleaner(line)
+        retval.append(tokenizer.text2tokens(line))
+    return retval
+
+
+def _chunks(lines: Iterable[str], chunk_size: int) -> Iterable[List[str]]:
+    chunk = []
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if len(chunk) > 0:
+        yield chunk
+
+
 def tokenize(
     input: str,
     output: str,
@@ -77,6 +130,10 @@ def tokenize(
     add_symbol: List[str],
     cleaner: Optional[str],
     g2p: Optional[str],
+    g2p_cache_size: int = 0,
+    g2p_cache_dir: Optional[str] = None,
+    num_workers: int = 0,
+    chunk_size: int = 1000,
 ):
     assert check_argument_types()
 
@@ -95,35 +152,47 @@ def tokenize(
         p.parent.mkdir(parents=True, exist_ok=True)
         fout = p.open("w", encoding="utf-8")
 
-    cleaner = TextCleaner(cleaner)
-    tokenizer = build_tokenizer(
-        token_type=token_type,
-        bpemodel=bpemodel,
-        delimiter=delimiter,
-        space_symbol=space_symbol,
-        non_linguistic_symbols=non_linguistic_symbols,
-        remove_non_linguistic_symbols=remove_non_linguistic_symbols,
-        g2p_type=g2p,
+    init_args = (
+        field,
+        delimiter,
+        cleaner,
+        dict(
+            token_type=token_type,
+            bpemodel=bpemodel,
+            space_symbol=space_symbol,
+            non_linguistic_symbols=non_linguistic_symbols,
+            remove_non_linguistic_symbols=remove_non_linguistic_symbols,
+            g2p_type=g2p,
+            g2p_cache_size=g2p_cache_size,
+            g2p_cache_dir=g2p_cache_dir,
+        ),
     )
-
-    counter = Counter()
     if field is not None:
-        field = field2slice(field)
+        # Check the format before starting the workers
+        field2slice(field)
 
-    for line in fin:
-        line = line.rstrip()
-        if field is not None:
-            # e.g. field="2-"
-            # uttidA hello world!! -> hello world!!
-            tokens = line.split(delimiter)
-            tokens = tokens[field]
-            if delimiter is None:
-                line = " ".join(tokens)
-            else:
-                line = delimiter.join(tokens)
+    def _results():
+        if num_workers == 0:
+            _init_tokenizer(*init_args)
+            for chunk in _chunks(fin, chunk_size):
+                yield from _tokenize_lines(chunk)
+            return
 
-        line = cleaner(line)
-        tokens = tokenizer.text2tokens(line)
+        # Keep the order of the lines and
+        # bound the number of the chunks in flight
+        with ProcessPoolExecutor(
+            num_workers, initializer=_init_tokenizer, initargs=init_args
+        ) as executor:
+            futures = deque()
+            for chunk in _chunks(fin, chunk_size):
+                if len(futures) >= 2 * num_workers:
+                    yield from futures.popleft().result()
+                futures.append(executor.submit(_tokenize_lines, chunk))
+            while len(futures) > 0:
+                yield from futures.popleft().result()
+
+    counter = Counter()
+    for tokens in _results():
         if not write_vocabulary:
             fout.write(" ".join(tokens) + "\n")
         else:
@@ -238,6 +307,32 @@ def get_parser() -> argparse.ArgumentParser:
         default=None,
         help="Specify g2p method if --token_type=phn",
     )
+    parser.add_argument(
+        "--g2p_cache_size",
+        type=int,
+        default=100000,
+        help="The number of the sentences whose g2p results are cached in memory",
+    )
+    parser.add_argument(
+        "--g2p_cache_dir",
+        type=str_or_none,
+        default=None,
+        help="The directory of the on-disk g2p cache shared between processes "
+        "and runs",
+    )
+    parser.add_argument(
+        "--num_workers",
+        type=int,
+        default=0,
+        help="The number of worker processes. "
+        "0 means tokenizing in the main process",
+    )
+    parser.add_argument(
+        "--chunk_size",
+        type=int,
+        default=1000,
+        help="The number of lines given to a worker process at once",
+    )
 
     group = parser.add_argument_group("write_vocabulary mode related")
     group.add_argument(
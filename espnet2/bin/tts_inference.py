@@ -129,9 +129,21 @@ class Text2Speech:
         text: Union[str, torch.Tensor, np.ndarray],
         speech: Union[torch.Tensor, np.ndarray] = None,
         durations: Union[torch.Tensor, np.ndarray] = None,
+        text_lengths: Union[torch.Tensor, np.ndarray] = None,
     ):
+        """Synthesize speech from the text.
+
+        If ``text_lengths`` is given, ``text`` is regarded as a batch of
+        padded token ids (B, Tmax) and the utterances are synthesized at once.
+        In this case, ``wav``, ``outs`` and ``outs_denorm`` are the lists of
+        the unpadded outputs of each utterance, and the others are None.
+
+        """
         assert check_argument_types()
 
+        if text_lengths is not None:
+            return self._batch_call(text, text_lengths)
+
         if self.use_speech and speech is None:
             raise RuntimeError("missing required argument: 'speech'")
 
@@ -155,12 +167,40 @@ class Text2Speech:
             duration, focus_rate = None, None
 
         if self.spc2wav is not None:
-            wav = torch.tensor(self.spc2wav(outs_denorm.cpu().numpy()))
+            wav = self.spc2wav(outs_denorm).cpu()
         else:
             wav = None
 
         return wav, outs, outs_denorm, probs, att_ws, duration, focus_rate
 
+    def _batch_call(
+        self,
+        text: Union[torch.Tensor, np.ndarray],
+        text_lengths: Union[torch.Tensor, np.ndarray],
+    ):
+        if not self.use_batch_inference:
+            raise NotImplementedError(
+                f"batch inference is not supported: {type(self.tts).__name__}"
+            )
+        batch = {"text": text, "text_lengths": text_lengths}
+        batch = to_device(batch, self.device)
+        outs, outs_denorm, outs_lengths = self.model.batch_inference(
+            **batch, **self.decode_config
+        )
+
+        if self.spc2wav is not None:
+            wav, wav_lengths = self.spc2wav.batch(outs_denorm, outs_lengths)
+            wav = [w[:wlen].cpu() for w, wlen in zip(wav, wav_lengths.tolist())]
+        else:
+            wav = None
+
+        # Remove the padded parts
+        outs_lengths = outs_lengths.tolist()
+        outs = [o[:olen] for o, olen in zip(outs, outs_lengths)]
+        outs_denorm = [o[:olen] for o, olen in zip(outs_denorm, outs_lengths)]
+
+        return wav, outs, outs_denorm, None, None, None, None
+
     @property
     def fs(self) -> Optional[int]:
         if self.spc2wav is not None:
@@ -178,6 +218,16 @@ class Text2Speech:
         """
         return self.use_teacher_forcing or getattr(self.tts, "use_gst", False)
 
+    @property
+    def use_batch_inference(self) -> bool:
+        """Check whether the utterances can be synthesized in a batch.
+
+        Returns:
+            bool: True if the model supports batch inference else False.
+
+        """
+        return hasattr(self.tts, "batch_inference") and not self.use_speech
+
 
 def inference(
     output_dir: str,
@@ -204,8 +254,6 @@ def inference(
 ):
     """Perform TTS model decoding."""
     assert check_argument_types()
-    if batch_size > 1:
-        raise NotImplementedError("batch decoding is not implemented")
     if ngpu > 1:
         raise NotImplementedError("only single GPU decoding is supported")
     logging.basicConfig(
@@ -287,93 +335,116 @@ def inference(
             assert isinstance(batch, dict), type(batch)
             assert all(isinstance(s, str) for s in keys), keys
             _bs = len(next(iter(batch.values())))
-            assert _bs == 1, _bs
-
-            # Change to single sequence and remove *_length
-            # because inference() requires 1-seq, not mini-batch.
-            batch = {k: v[0] for k, v in batch.items() if not k.endswith("_lengths")}
+            assert len(keys) == _bs, f"{len(keys)} != {_bs}"
 
             start_time = time.perf_counter()
-            wav, outs, outs_denorm, probs, att_ws, duration, focus_rate = text2speech(
-                **batch
-            )
+            if text2speech.use_batch_inference:
+                # Synthesize the mini-batch at once and unpad the outputs
+                wav, outs, outs_denorm, *_ = text2speech(
+                    text=batch["text"], text_lengths=batch["text_lengths"]
+                )
+                if wav is None:
+                    wav = [None] * _bs
+                results = [
+                    (w, o, od, None, None, None, None)
+                    for w, o, od in zip(wav, outs, outs_denorm)
+                ]
+            else:
+                # Change to single sequences and remove *_length
+                # because inference() requires 1-seq, not mini-batch.
+                results = []
+                for i in range(_bs):
+                    _data = {
+                        k: v[i, : batch[k + "_lengths"][i]]
+                        if k + "_lengths" in batch
+                        else v[i]
+                        for k, v in batch.items()
+                        if not k.endswith("_lengths")
+                    }
+                    results.append(text2speech(**_data))
 
-            key = keys[0]
-            insize = next(iter(batch.values())).size(0) + 1
             logging.info(
                 "inference speed = {:.1f} frames / sec.".format(
-                    int(outs.size(0)) / (time.perf_counter() - start_time)
+                    sum(int(r[1].size(0)) for r in results)
+                    / (time.perf_counter() - start_time)
                 )
             )
-            logging.info(f"{key} (size:{insize}->{outs.size(0)})")
-            if outs.size(0) == insize * maxlenratio:
-                logging.warning(f"output length reaches maximum length ({key}).")
-
-            norm_writer[key] = outs.cpu().numpy()
-            shape_writer.write(f"{key} " + ",".join(map(str, outs.shape)) + "\n")
 
-            denorm_writer[key] = outs_denorm.cpu().numpy()
-
-            if duration is not None:
-                # Save duration and fucus rates
-                duration_writer.write(
-                    f"{key} " + " ".join(map(str, duration.cpu().numpy())) + "\n"
-                )
-                focus_rate_writer.write(f"{key} {float(focus_rate):.5f}\n")
+            for i, (key, result) in enumerate(zip(keys, results)):
+                wav, outs, outs_denorm, probs, att_ws, duration, focus_rate = result
+                insize = int(batch["text_lengths"][i]) + 1
+                logging.info(f"{key} (size:{insize}->{outs.size(0)})")
+                if outs.size(0) == insize * maxlenratio:
+                    logging.warning(f"output length reaches maximum length ({key}).")
 
-                # Plot attention weight
-                att_ws = att_ws.cpu().numpy()
+                norm_writer[key] = outs.cpu().numpy()
+                shape_writer.write(f"{key} " + ",".join(map(str, outs.shape)) + "\n")
 
-                if att_ws.ndim == 2:
-                    att_ws = att_ws[None][None]
-                elif att_ws.ndim != 4:
-                    raise RuntimeError(f"Must be 2 or 4 dimension: {att_ws.ndim}")
+                denorm_writer[key] = outs_denorm.cpu().numpy()
 
-                w, h = plt.figaspect(att_ws.shape[0] / att_ws.shape[1])
-                fig = plt.Figure(
-                    figsize=(
-                        w * 1.3 * min(att_ws.shape[0], 2.5),
-                        h * 1.3 * min(att_ws.shape[1], 2.5),
+                if duration is not None:
+                    # Save duration and fucus rates
+                    duration_writer.write(
+                        f"{key} " + " ".join(map(str, duration.cpu().numpy())) + "\n"
+                    )
+                    focus_rate_writer.write(f"{key} {float(focus_rate):.5f}\n")
+
+                    # Plot attention weight
+                    att_ws = att_ws.cpu().numpy()
+
+                    if att_ws.ndim == 2:
+                        att_ws = att_ws[None][None]
+                    elif att_ws.ndim != 4:
+                        raise RuntimeError(f"Must be 2 or 4 dimension: {att_ws.ndim}")
+
+                    w, h = plt.figaspect(att_ws.shape[0] / att_ws.shape[1])
+                    fig = plt.Figure(
+                        figsize=(
+                            w * 1.3 * min(att_ws.shape[0], 2.5),
+                            h * 1.3 * min(att_ws.shape[1], 2.5),
+                        )
+                    )
+                    fig.suptitle(f"{key}")
+                    axes = fig.subplots(att_ws.shape[0], att_ws.shape[1])
+                    if len(att_ws) == 1:
+                        axes = [[axes]]
+                    for ax, att_w in zip(axes, att_ws):
+                        for ax_, att_w_ in zip(ax, att_w):
+                            ax_.imshow(att_w_.astype(np.float32), aspect="auto")
+                            ax_.set_xlabel("Input")
+                            ax_.set_ylabel("Output")
+                            ax_.xaxis.set_major_locator(MaxNLocator(integer=True))
+                            ax_.yaxis.set_major_locator(MaxNLocator(integer=True))
+
+                    fig.set_tight_layout({"rect": [0, 0.03, 1, 0.95]})
+                    fig.savefig(output_dir / f"att_ws/{key}.png")
+                    fig.clf()
+
+                if probs is not None:
+                    # Plot stop token prediction
+                    probs = probs.cpu().numpy()
+
+                    fig = plt.Figure()
+                    ax = fig.add_subplot(1, 1, 1)
+                    ax.plot(probs)
+                    ax.set_title(f"{key}")
+                    ax.set_xlabel("Output")
+                    ax.set_ylabel("Stop probability")
+                    ax.set_ylim(0, 1)
+                    ax.grid(which="both")
+
+                    fig.set_tight_layout(True)
+                    fig.savefig(output_dir / f"probs/{key}.png")
+                    fig.clf()
+
+                # TODO(kamo): Write scp
+                if wav is not None:
+                    sf.write(
+                        f"{output_dir}/wav/{key}.wav",
+                        wav.numpy(),
+                        text2speech.fs,
+                        "PCM_16",
                     )
-                )
-                fig.suptitle(f"{key}")
-                axes = fig.subplots(att_ws.shape[0], att_ws.shape[1])
-                if len(att_ws) == 1:
-                    axes = [[axes]]
-                for ax, att_w in zip(axes, att_ws):
-                    for ax_, att_w_ in zip(ax, att_w):
-                        ax_.imshow(att_w_.astype(np.float32), aspect="auto")
-                        ax_.set_xlabel("Input")
-                        ax_.set_ylabel("Output")
-                        ax_.xaxis.set_major_locator(MaxNLocator(integer=True))
-                        ax_.yaxis.set_major_locator(MaxNLocator(integer=True))
-
-                fig.set_tight_layout({"rect": [0, 0.03, 1, 0.95]})
-                fig.savefig(output_dir / f"att_ws/{key}.png")
-                fig.clf()
-
-            if probs is not None:
-                # Plot stop token prediction
-                probs = probs.cpu().numpy()
-
-                fig = plt.Figure()
-                ax = fig.add_subplot(1, 1, 1)
-                ax.plot(probs)
-                ax.set_title(f"{key}")
-                ax.set_xlabel("Output")
-                ax.set_ylabel("Stop probability")
-                ax.set_ylim(0, 1)
-                ax.grid(which="both")
-
-                fig.set_tight_layout(True)
-                fig.savefig(output_dir / f"probs/{key}.png")
-                fig.clf()
-
-            # TODO(kamo): Write scp
-            if wav is not None:
-                sf.write(
-                    f"{output_dir}/wav/{key}.wav", wav.numpy(), text2speech.fs, "PCM_16"
-                )
 
     # remove duration related files if attention is not provided
     if att_ws is None:
@@ -1,5 +1,4 @@
 from functools import reduce
-from itertools import permutations
 from typing import Dict
 from typing import Optional
 from typing import Tuple
@@ -9,6 +8,8 @@ from torch_complex.tensor import ComplexTensor
 from typeguard import check_argument_types
 
 from espnet2.enh.abs_enh import AbsEnhancement
+from espnet2.enh.pit_solver import pairwise_loss
+from espnet2.enh.pit_solver import solve_pit
 from espnet2.torch_utils.device_funcs import force_gatherable
 from espnet2.train.abs_espnet_model import AbsESPnetModel
 
@@ -389,14 +390,14 @@ class ESPnetEnhancementModel(AbsESPnetModel):
         s_estimate = zero_mean_estimate  # [B, T]
         # s_target = <s', s>s / ||s||^2
         pair_wise_dot = torch.sum(s_estimate * s_target, dim=1, keepdim=True)  # [B, 1]
-        s_target_energy = torch.sum(s_target ** 2, dim=1, keepdim=True) + eps  # [B, 1]
+        s_target_energy = torch.sum(s_target**2, dim=1, keepdim=True) + eps  # [B, 1]
         pair_wise_proj = pair_wise_dot * s_target / s_target_energy  # [B, T]
         # e_noise = s' - s_target
         e_noise = s_estimate - pair_wise_proj  # [B, T]
 
         # SI-SNR = 10 * log_10(||s_target||^2 / ||e_noise||^2)
-        pair_wise_si_snr = torch.sum(pair_wise_proj ** 2, dim=1) / (
-            torch.sum(e_noise ** 2, dim=1) + eps
+        pair_wise_si_snr = torch.sum(pair_wise_proj**2, dim=1) / (
+            torch.sum(e_noise**2, dim=1) + eps
         )
         # print('pair_si_snr',pair_wise_si_snr[0,:])
         pair_wise_si_snr = 10 * torch.log10(pair_wise_si_snr + eps)  # [B]
@@ -412,25 +413,12 @@ class ESPnetEnhancementModel(AbsESPnetModel):
             ref (List[torch.Tensor]): [(batch, ...), ...]
             inf (List[torch.Tensor]): [(batch, ...), ...]
             criterion (function): Loss function
-            perm: (batch)
+            perm: (batch, num_spk)
         Returns:
-            torch.Tensor: (batch)
+            loss: torch.Tensor: scalar
+            perm: torch.Tensor: (batch, num_spk)
         """
-        num_spk = len(ref)
-
-        def pair_loss(permutation):
-            return sum(
-                [criterion(ref[s], inf[t]) for s, t in enumerate(permutation)]
-            ) / len(permutation)
-
-        losses = torch.stack(
-            [pair_loss(p) for p in permutations(range(num_spk))], dim=1
-        )
-        if perm is None:
-            loss, perm = torch.min(losses, dim=1)
-        else:
-            loss = losses[torch.arange(losses.shape[0]), perm]
-
+        loss, perm = solve_pit(pairwise_loss(ref, inf, criterion), perm=perm)
         return loss.mean(), perm
 
     def collect_feats(
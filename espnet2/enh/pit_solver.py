@@ -0,0 +1,73 @@
+"""Permutation invariant training (PIT) with a pairwise loss matrix."""
+
+from itertools import permutations
+from typing import Callable
+from typing import List
+from typing import Tuple
+
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+import torch
+
+# The permutations are enumerated if the number of speakers is
+# not larger than this value, otherwise Hungarian algorithm is used.
+MAX_EXHAUSTIVE_SPK = 4
+
+
+def pairwise_loss(
+    ref: List[torch.Tensor], inf: List[torch.Tensor], criterion: Callable
+) -> torch.Tensor:
+    """Compute the losses of all pairs of the references and the estimates.
+
+    Args:
+        ref (List[torch.Tensor]): [(batch, ...), ...] x num_spk
+        inf (List[torch.Tensor]): [(batch, ...), ...] x num_spk
+        criterion (function): Loss function returning (batch,)
+    Returns:
+        torch.Tensor: (batch, num_spk, num_spk),
+            where [b, s, t] is the loss between ref[s] and inf[t]
+    """
+    return torch.stack(
+        [torch.stack([criterion(r, i) for i in inf], dim=1) for r in ref], dim=1
+    )
+
+
+def solve_pit(
+    pair_losses: torch.Tensor,
+    perm: torch.Tensor = None,
+    max_exhaustive_spk: int = MAX_EXHAUSTIVE_SPK,
+) -> Tuple[torch.Tensor, torch.Tensor]:
+    """Find the permutations minimizing the loss from the pairwise loss matrix.
+
+    If the number of speakers is small, the losses of all the permutations
+    are computed by a gather of the matrix. Otherwise, the permutations are
+    found by Hungarian algorithm on the detached matrix.
+
+    Args:
+        pair_losses (torch.Tensor): (batch, num_spk, num_spk)
+        perm (torch.Tensor): (batch, num_spk)
+            Use the given permutations instead of searching them.
+        max_exhaustive_spk (int): Enumerate the permutations
+            if num_spk <= max_exhaustive_spk.
+    Returns:
+        loss (torch.Tensor): (batch,)
+        perm (torch.Tensor): (batch, num_spk),
+            where perm[b, s] is the index of the estimate assigned to ref[s]
+    """
+    batch_size, num_spk, _ = pair_losses.shape
+    if perm is None:
+        if num_spk <= max_exhaustive_spk:
+            all_perms = torch.tensor(
+                list(permutations(range(num_spk))), device=pair_losses.device
+            )  # (num_perm, num_spk)
+            # (batch, num_perm, num_spk) -> (batch, num_perm)
+            losses = pair_losses[:, torch.arange(num_spk), all_perms].mean(dim=-1)
+            loss, idx = losses.min(dim=1)
+            return loss, all_perms[idx]
+
+        cost = pair_losses.detach().cpu().numpy()
+        perm = np.stack([linear_sum_assignment(c)[1] for c in cost])
+        perm = torch.from_numpy(perm).to(pair_losses.device)
+
+    loss = pair_losses.gather(2, perm.unsqueeze(2)).squeeze(2).mean(dim=1)
+    return loss, perm
@@ -0,0 +1,219 @@
+import collections.abc
+from pathlib import Path
+from typing import List
+from typing import Union
+
+import numpy as np
+from typeguard import check_argument_types
+
+# The offset of each array is aligned by this size in the data file
+_ALIGN = 64
+
+
+def _build_global_index(indices: List[np.ndarray]) -> np.ndarray:
+    """Merge the shard indices into one index of (key, shard, row) sorted by keys."""
+    itemsize = max([index["key"].itemsize for index in indices] + [1])
+    num_keys = sum(len(index) for index in indices)
+    global_index = np.zeros(
+        num_keys,
+        dtype=[("key", f"S{itemsize}"), ("shard", np.int64), ("row", np.int64)],
+    )
+    start = 0
+    for ishard, index in enumerate(indices):
+        end = start + len(index)
+        global_index["key"][start:end] = index["key"]
+        global_index["shard"][start:end] = ishard
+        global_index["row"][start:end] = np.arange(len(index))
+        start = end
+    global_index = global_index[np.argsort(global_index["key"], kind="stable")]
+
+    keys = global_index["key"]
+    duplicated = np.nonzero(keys[1:] == keys[:-1])[0]
+    if len(duplicated) > 0:
+        raise RuntimeError(
+            f"Duplicated keys between shards: {keys[duplicated[0]].decode()}"
+        )
+    return global_index
+
+
+class PackedArrayWriter:
+    """Writer class for the packed array format.
+
+    Many arrays are concatenated into shard files
+    with the binary index of the offsets, dtypes, and shapes,
+    instead of writing a npy file for each utterance.
+    The index of all the shards is written when closed.
+
+    Examples:
+        outdir/shard.0.bin  # The concatenated raw data
+        outdir/shard.0.idx.npy  # The index sorted by the keys
+        outdir/shard.1.bin
+        outdir/shard.1.idx.npy
+        ...
+        outdir/index.npy  # The (key, shard, row) of all the shards
+
+        >>> writer = PackedArrayWriter('./data/feats')
+        >>> writer['aa'] = numpy_array
+        >>> writer['bb'] = numpy_array
+        >>> writer.close()
+
+    """
+
+    def __init__(self, outdir: Union[Path, str], shard_size: int = 10000):
+        assert check_argument_types()
+        if shard_size <= 0:
+            raise ValueError(f"shard_size must be > 0: {shard_size}")
+        self.dir = Path(outdir)
+        self.dir.mkdir(parents=True, exist_ok=True)
+        if any(self.dir.glob("shard.*.idx.npy")):
+            raise RuntimeError(f"{self.dir} already has shard files")
+        self.shard_size = shard_size
+
+        self.num_shards = 0
+        self.fbin = None
+        self.entries = []
+
+    def __setitem__(self, key: str, value: np.ndarray):
+        assert isinstance(value, np.ndarray), type(value)
+        if self.fbin is None:
+            self.fbin = (self.dir / f"shard.{self.num_shards}.bin").open("wb")
+
+        offset = self.fbin.tell()
+        if offset % _ALIGN != 0:
+            self.fbin.write(b"\0" * (_ALIGN - offset % _ALIGN))
+            offset = self.fbin.tell()
+        value = np.ascontiguousarray(value)
+        self.fbin.write(value.tobytes())
+        self.entries.append((key, offset, value.dtype.str, value.shape))
+
+        if len(self.entries) >= self.shard_size:
+            self._flush()
+
+    def _flush(self):
+        if self.fbin is None:
+            return
+        self.fbin.close()
+        self.fbin = None
+
+        keys = [k.encode("utf-8") for k, _, _, _ in self.entries]
+        if len(set(keys)) != len(keys):
+            raise RuntimeError(f"Duplicated keys in shard.{self.num_shards}")
+        max_ndim = max(len(shape) for _, _, _, shape in self.entries)
+        index = np.zeros(
+            len(self.entries),
+            dtype=[
+                ("key", f"S{max(len(k) for k in keys)}"),
+                ("offset", np.int64),
+                ("dtype", "S8"),
+                ("ndim", np.int64),
+                ("shape", np.int64, (max(max_ndim, 1),)),
+            ],
+        )
+        for i, (key, (_, offset, dtype, shape)) in enumerate(zip(keys, self.entries)):
+            index[i]["key"] = key
+            index[i]["offset"] = offset
+            index[i]["dtype"] = dtype
+            index[i]["ndim"] = len(shape)
+            index[i]["shape"][: len(shape)] = shape
+        # Sort by the keys for binary search
+        index = index[np.argsort(index["key"], kind="stable")]
+        np.save(self.dir / f"shard.{self.num_shards}.idx.npy", index)
+
+        self.num_shards += 1
+        self.entries = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        self._flush()
+        if self.num_shards > 0:
+            indices = [
+                np.load(self.dir / f"shard.{i}.idx.npy", mmap_mode="r")
+                for i in range(self.num_shards)
+            ]
+            np.save(self.dir / "index.npy", _build_global_index(indices))
+
+
+class PackedArrayReader(collections.abc.Mapping):
+    """Reader class for the packed array format.
+
+    The index files are memory-mapped when instantiated
+    and a key is looked up by binary search in the index of all the shards,
+    so neither the startup time nor the lookup time depends on
+    the number of the shards. If the index of all the shards is missing,
+    it's built from the shard indices when instantiated.
+    The returned arrays are read-only views of the memory-mapped data files.
+
+    Examples:
+        >>> reader = PackedArrayReader('./data/feats')
+        >>> array = reader['key1']
+
+    """
+
+    def __init__(self, path: Union[Path, str]):
+        assert check_argument_types()
+        self.dir = Path(path)
+        idx_files = sorted(
+            self.dir.glob("shard.*.idx.npy"),
+            key=lambda p: int(p.name[len("shard.") : -len(".idx.npy")]),
+        )
+        if len(idx_files) == 0:
+            raise FileNotFoundError(f"No shard files are found in {self.dir}")
+        self.indices = [np.load(p, mmap_mode="r") for p in idx_files]
+        self.bin_files = [
+            p.parent / (p.name[: -len(".idx.npy")] + ".bin") for p in idx_files
+        ]
+        if (self.dir / "index.npy").exists():
+            self.global_index = np.load(self.dir / "index.npy", mmap_mode="r")
+        else:
+            self.global_index = _build_global_index(self.indices)
+        # The data files are opened at the first access
+        self.data = [None] * len(idx_files)
+
+    def _find(self, key: str):
+        bkey = key.encode("utf-8")
+        keys = self.global_index["key"]
+        if len(bkey) > keys.itemsize:
+            return None, None
+        i = np.searchsorted(keys, bkey)
+        if i < len(keys) and keys[i] == bkey:
+            ishard = int(self.global_index["shard"][i])
+            return ishard, self.indices[ishard][self.global_index["row"][i]]
+        return None, None
+
+    def _get_data(self, ishard: int) -> np.ndarray:
+        if self.data[ishard] is None:
+            if self.bin_files[ishard].stat().st_size == 0:
+                self.data[ishard] = np.empty(0, dtype=np.uint8)
+            else:
+                self.data[ishard] = np.memmap(
+                    self.bin_files[ishard], dtype=np.uint8, mode="r"
+                )
+        return self.data[ishard]
+
+    def __getitem__(self, key) -> np.ndarray:
+        ishard, entry = self._find(key)
+        if entry is None:
+            raise KeyError(key)
+        shape = tuple(entry["shape"][: entry["ndim"]])
+        return np.ndarray(
+            shape,
+            dtype=np.dtype(entry["dtype"].decode()),
+            buffer=self._get_data(ishard),
+            offset=int(entry["offset"]),
+        )
+
+    def __contains__(self, item):
+        return self._find(item)[1] is not None
+
+    def __len__(self):
+        return sum(len(index) for index in self.indices)
+
+    def __iter__(self):
+        for index in self.indices:
+            for key in index["key"]:
+                yield key.decode("utf-8")
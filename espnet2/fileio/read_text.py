@@ -1,11 +1,17 @@
+import collections.abc
 import logging
+import mmap
 from pathlib import Path
 from typing import Dict
 from typing import List
 from typing import Union
 
+import numpy as np
 from typeguard import check_argument_types
 
+# Whitespace characters in ASCII: "\t", "\n", "\v", "\f", "\r" and " "
+_WHITESPACES = np.array([9, 10, 11, 12, 13, 32], dtype=np.uint8)
+
 
 def read_2column_text(path: Union[Path, str]) -> Dict[str, str]:
     """Read a text file having 2 column as dict object.
@@ -35,19 +41,136 @@ def read_2column_text(path: Union[Path, str]) -> Dict[str, str]:
     return data
 
 
-def load_num_sequence_text(
-    path: Union[Path, str], loader_type: str = "csv_int"
-) -> Dict[str, List[Union[float, int]]]:
-    """Read a text file indicating sequences of number
+class TwoColumnTextIndex(collections.abc.Mapping):
+    """Read-only dict-like object for a text file having 2 column.
+
+    Unlike read_2column_text(), this class doesn't hold the values as str.
+    It builds a compact index, i.e. the sorted keys and the byte offsets of
+    the lines, by scanning the file with numpy at once, and
+    the value is parsed from the memory-mapped file when it's accessed.
+    The keys are iterated in the order in the file.
 
     Examples:
-        key1 1 2 3
-        key2 34 5 6
+        wav.scp:
+            key1 /some/path/a.wav
+            key2 /some/path/b.wav
+
+        >>> d = TwoColumnTextIndex('wav.scp')
+        >>> d['key1']
+        '/some/path/a.wav'
 
-        >>> d = load_num_sequence_text('text')
-        >>> np.testing.assert_array_equal(d["key1"], np.array([1, 2, 3]))
     """
-    assert check_argument_types()
+
+    def __init__(self, path: Union[Path, str], chunk_size: int = 2**26):
+        assert check_argument_types()
+        self.path = path
+        self.mm = None
+
+        self.file_size = Path(path).stat().st_size
+        if self.file_size > 0:
+            buf = np.memmap(path, dtype=np.uint8, mode="r")
+        else:
+            # np.memmap can't map an empty file
+            buf = np.empty(0, dtype=np.uint8)
+
+        starts = []
+        keys = []
+        num_lines = 0
+        chunk_start = 0
+        while chunk_start < len(buf):
+            # Extend the chunk to the end of the line
+            chunk_end = min(chunk_start + chunk_size, len(buf))
+            while chunk_end < len(buf) and buf[chunk_end - 1] != 10:
+                chunk_end = min(chunk_end + chunk_size, len(buf))
+            chunk = np.asarray(buf[chunk_start:chunk_end])
+            if chunk[-1] != 10:
+                # The last line without newline
+                chunk = np.concatenate([chunk, np.array([10], dtype=np.uint8)])
+
+            # The starting position of each line in this chunk
+            line_starts = np.concatenate(
+                [[0], np.flatnonzero(chunk == 10)[:-1] + 1]
+            ).astype(np.int64)
+            # The key ends at the first whitespace in the line
+            ws = np.flatnonzero(np.isin(chunk, _WHITESPACES))
+            key_lens = ws[np.searchsorted(ws, line_starts)] - line_starts
+            if key_lens.min() == 0:
+                linenum = num_lines + np.argmin(key_lens) + 1
+                raise RuntimeError(f"The key is not found ({path}:{linenum})")
+
+            # Gather the keys as fixed-width bytes: (NLine, MaxKeyLen)
+            max_len = key_lens.max()
+            idx = line_starts[:, None] + np.arange(max_len)
+            mask = np.arange(max_len) < key_lens[:, None]
+            key_bytes = np.where(mask, chunk[np.minimum(idx, len(chunk) - 1)], 0)
+            keys.append(key_bytes.astype(np.uint8).view(f"S{max_len}").ravel())
+            starts.append(line_starts + chunk_start)
+            num_lines += len(line_starts)
+            chunk_start = chunk_end
+        del buf
+
+        if len(starts) > 0:
+            max_len = max(k.itemsize for k in keys)
+            keys = np.concatenate([k.astype(f"S{max_len}") for k in keys])
+            # The byte offset of each line in the file
+            self.starts = np.concatenate(starts)
+        else:
+            keys = np.array([], dtype="S1")
+            self.starts = np.array([], dtype=np.int64)
+
+        # The indices of the lines in the order of the sorted keys
+        self.order = np.argsort(keys, kind="stable")
+        self.keys_sorted = keys[self.order]
+        dup = np.flatnonzero(self.keys_sorted[1:] == self.keys_sorted[:-1])
+        if len(dup) > 0:
+            k = self.keys_sorted[dup[0]].decode("utf-8")
+            linenum = self.order[dup[0] + 1] + 1
+            raise RuntimeError(f"{k} is duplicated ({path}:{linenum})")
+
+    def __getstate__(self):
+        # mmap object can't be pickled
+        state = self.__dict__.copy()
+        state["mm"] = None
+        return state
+
+    def _get_line(self, i: int) -> str:
+        if self.mm is None:
+            with Path(self.path).open("rb") as f:
+                self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        start = self.starts[i]
+        end = self.starts[i + 1] if i + 1 < len(self.starts) else self.file_size
+        return self.mm[start:end].decode("utf-8")
+
+    def _find(self, key: str) -> int:
+        if not isinstance(key, str):
+            return -1
+        bkey = key.encode("utf-8")
+        if len(bkey) > self.keys_sorted.itemsize:
+            return -1
+        j = np.searchsorted(self.keys_sorted, bkey)
+        if j < len(self.keys_sorted) and self.keys_sorted[j] == bkey:
+            return self.order[j]
+        return -1
+
+    def __getitem__(self, key: str) -> str:
+        i = self._find(key)
+        if i < 0:
+            raise KeyError(key)
+        sps = self._get_line(i).rstrip().split(maxsplit=1)
+        return sps[1] if len(sps) == 2 else ""
+
+    def __contains__(self, key) -> bool:
+        return self._find(key) >= 0
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def __iter__(self):
+        for i in range(len(self.starts)):
+            yield self._get_line(i).split(maxsplit=1)[0]
+
+
+def _num_sequence_format(loader_type: str):
     if loader_type == "text_int":
         delimiter = " "
         dtype = int
@@ -62,6 +185,64 @@ def load_num_sequence_text(
         dtype = float
     else:
         raise ValueError(f"Not supported loader_type={loader_type}")
+    return delimiter, dtype
+
+
+class NumSequenceTextReader(collections.abc.Mapping):
+    """Read-only dict-like object for a text file indicating sequences of number
+
+    The lazy version of load_num_sequence_text():
+    each line is parsed when it's accessed.
+
+    Examples:
+        key1 1 2 3
+        key2 34 5 6
+
+        >>> d = NumSequenceTextReader('text', loader_type='text_int')
+        >>> d['key1']
+        [1, 2, 3]
+    """
+
+    def __init__(self, path: Union[Path, str], loader_type: str = "csv_int"):
+        assert check_argument_types()
+        self.path = path
+        self.delimiter, self.dtype = _num_sequence_format(loader_type)
+        self.data = TwoColumnTextIndex(path)
+
+    def __getitem__(self, key: str) -> List[Union[float, int]]:
+        v = self.data[key]
+        try:
+            return [self.dtype(i) for i in v.split(self.delimiter)]
+        except (TypeError, ValueError):
+            logging.error(
+                f'Error happened with path="{self.path}", id="{key}", value="{v}"'
+            )
+            raise
+
+    def __contains__(self, key) -> bool:
+        return key in self.data
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def __iter__(self):
+        return iter(self.data)
+
+
+def load_num_sequence_text(
+    path: Union[Path, str], loader_type: str = "csv_int"
+) -> Dict[str, List[Union[float, int]]]:
+    """Read a text file indicating sequences of number
+
+    Examples:
+        key1 1 2 3
+        key2 34 5 6
+
+        >>> d = load_num_sequence_text('text')
+        >>> np.testing.assert_array_equal(d["key1"], np.array([1, 2, 3]))
+    """
+    assert check_argument_types()
+    delimiter, dtype = _num_sequence_format(loader_type)
 
     # path looks like:
     #   utta 1,0
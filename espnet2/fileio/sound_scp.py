@@ -6,7 +6,7 @@ import numpy as np
 import soundfile
 from typeguard import check_argument_types
 
-from espnet2.fileio.read_text import read_2column_text
+from espnet2.fileio.read_text import TwoColumnTextIndex
 
 
 class SoundScpReader(collections.abc.Mapping):
@@ -36,7 +36,7 @@ class SoundScpReader(collections.abc.Mapping):
         self.dtype = dtype
         self.always_2d = always_2d
         self.normalize = normalize
-        self.data = read_2column_text(fname)
+        self.data = TwoColumnTextIndex(fname)
 
     def __getitem__(self, key):
         wav = self.data[key]
@@ -1,5 +1,7 @@
 from abc import ABC
 from abc import abstractmethod
+from typing import Any
+from typing import List
 from typing import Tuple
 
 import torch
@@ -27,3 +29,18 @@ class AbsLM(torch.nn.Module, BatchScorerInterface, ABC):
         self, input: torch.Tensor, hidden: torch.Tensor
     ) -> Tuple[torch.Tensor, torch.Tensor]:
         raise NotImplementedError
+
+    def batch_score_padded(
+        self,
+        ys: torch.Tensor,
+        states: List[Any],
+        xs: torch.Tensor,
+        xs_lens: torch.Tensor,
+    ) -> Tuple[torch.Tensor, List[Any]]:
+        """Score new token batch for multiple zero-padded utterances.
+
+        LM doesn't depend on the encoded features, so this is the same as
+        `batch_score`.
+
+        """
+        return self.batch_score(ys, states, xs)
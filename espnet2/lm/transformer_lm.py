@@ -1,5 +1,6 @@
 from typing import Any
 from typing import List
+from typing import Optional
 from typing import Tuple
 
 import torch
@@ -8,10 +9,11 @@ import torch.nn as nn
 from espnet.nets.pytorch_backend.transformer.embedding import PositionalEncoding
 from espnet.nets.pytorch_backend.transformer.encoder import Encoder
 from espnet.nets.pytorch_backend.transformer.mask import subsequent_mask
+from espnet.nets.scorer_interface import BatchStackedStateScorerInterface
 from espnet2.lm.abs_model import AbsLM
 
 
-class TransformerLM(AbsLM):
+class TransformerLM(AbsLM, BatchStackedStateScorerInterface):
     def __init__(
         self,
         vocab_size: int,
@@ -120,12 +122,44 @@ class TransformerLM(AbsLM):
             ]
 
         # batch decoding
-        h, _, states = self.encoder.forward_one_step(
-            self.embed(ys), self._target_mask(ys), cache=batch_state
-        )
-        h = self.decoder(h[:, -1])
-        logp = h.log_softmax(dim=-1)
+        logp, states = self.batch_score_stacked(ys, batch_state, xs)
 
         # transpose state of [layer, batch] into [batch, layer]
         state_list = [[states[i][b] for i in range(n_layers)] for b in range(n_batch)]
         return logp, state_list
+
+    def batch_score_stacked(
+        self, ys: torch.Tensor, state: Optional[List[torch.Tensor]], xs: torch.Tensor
+    ) -> Tuple[torch.Tensor, List[torch.Tensor]]:
+        """Score new token batch with the states stacked over the batch.
+
+        Args:
+            ys (torch.Tensor): torch.int64 prefix tokens (n_batch, ylen).
+            state (List[torch.Tensor]): The cache of each layer,
+                whose first dimension is n_batch, or None for the first step.
+            xs (torch.Tensor):
+                The encoder feature that generates ys (n_batch, xlen, n_feat).
+
+        Returns:
+            tuple[torch.Tensor, List[torch.Tensor]]: Tuple of
+                batchfied scores for next token with shape of `(n_batch, vocab_size)`
+                and the cache of each layer for ys.
+
+        """
+        h, _, state = self.encoder.forward_one_step(
+            self.embed(ys), self._target_mask(ys), cache=state
+        )
+        h = self.decoder(h[:, -1])
+        logp = h.log_softmax(dim=-1)
+        return logp, state
+
+    def select_stacked_state(
+        self,
+        state: Optional[List[torch.Tensor]],
+        ids: torch.Tensor,
+        new_ids: torch.Tensor = None,
+    ) -> Optional[List[torch.Tensor]]:
+        """Select the cache of each layer for the hypotheses of ids."""
+        if state is None:
+            return None
+        return [s.index_select(0, ids) for s in state]
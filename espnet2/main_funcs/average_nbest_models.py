@@ -1,6 +1,9 @@
+import inspect
 import logging
 from pathlib import Path
+from typing import Dict
 from typing import Sequence
+from typing import Tuple
 from typing import Union
 import warnings
 
@@ -42,62 +45,100 @@ def average_nbest_models(
         if reporter.has(ph, k)
     ]
 
+    # Checkpoints are memory-mapped if supported by torch.load
+    use_mmap = "mmap" in inspect.signature(torch.load).parameters
+    # The memory-mapped states are cached to be reused among the criterions,
+    # because their storages are paged in from the files lazily.
     _loaded = {}
+    # The averaged models: frozenset of the epochs -> the file name
+    _averaged = {}
+
+    def load_states(e: int) -> Tuple[Dict[str, torch.Tensor], bool]:
+        if e in _loaded:
+            return _loaded[e], True
+        kwargs = {"mmap": True} if use_mmap else {}
+        states = torch.load(output_dir / f"{e}epoch.pth", map_location="cpu", **kwargs)
+        if use_mmap:
+            _loaded[e] = states
+        return states, use_mmap
+
     for ph, cr, epoch_and_values in nbest_epochs:
         _nbests = [i for i in nbests if i <= len(epoch_and_values)]
         if len(_nbests) == 0:
             _nbests = [1]
 
-        for n in _nbests:
+        # The nbest values requiring new averaging
+        to_average = []
+        for n in sorted(set(_nbests)):
             if n == 0:
                 continue
             elif n == 1:
                 # The averaged model is same as the best model
                 e, _ = epoch_and_values[0]
-                op = output_dir / f"{e}epoch.pth"
-                sym_op = output_dir / f"{ph}.{cr}.ave_1best.pth"
-                if sym_op.is_symlink() or sym_op.exists():
-                    sym_op.unlink()
-                sym_op.symlink_to(op.name)
+                _symlink(output_dir / f"{ph}.{cr}.ave_1best.pth", f"{e}epoch.pth")
+                continue
+
+            op = output_dir / f"{ph}.{cr}.ave_{n}best.pth"
+            epochs = frozenset(e for e, _ in epoch_and_values[:n])
+            if epochs in _averaged:
+                # The same epochs are already averaged for another criterion
+                logging.info(f"Reusing {_averaged[epochs]} for {op}")
+                _symlink(op, _averaged[epochs])
+            else:
+                to_average.append(n)
+
+        # 2.a. Averaging model: Accumulate the states one by one in place
+        # and save the average whenever the n-best epochs are accumulated.
+        avg = None
+        for i, (e, _) in enumerate(
+            epoch_and_values[: max(to_average, default=0)], start=1
+        ):
+            states, shared = load_states(e)
+            if avg is None:
+                # Don't modify the cached or memory-mapped states
+                avg = {k: v.clone() for k, v in states.items()} if shared else states
             else:
-                op = output_dir / f"{ph}.{cr}.ave_{n}best.pth"
-                logging.info(
-                    f"Averaging {n}best models: " f'criterion="{ph}.{cr}": {op}'
-                )
-
-                avg = None
-                # 2.a. Averaging model
-                for e, _ in epoch_and_values[:n]:
-                    if e not in _loaded:
-                        _loaded[e] = torch.load(
-                            output_dir / f"{e}epoch.pth",
-                            map_location="cpu",
-                        )
-                    states = _loaded[e]
-
-                    if avg is None:
-                        avg = states
-                    else:
-                        # Accumulated
-                        for k in avg:
-                            avg[k] += states[k]
+                # Accumulated
                 for k in avg:
-                    if str(avg[k].dtype).startswith("torch.int"):
-                        # For int type, not averaged, but only accumulated.
-                        # e.g. BatchNorm.num_batches_tracked
-                        # (If there are any cases that requires averaging
-                        #  or the other reducing method, e.g. max/min, for integer type,
-                        #  please report.)
-                        pass
-                    else:
-                        avg[k] /= n
-
-                # 2.b. Save the ave model and create a symlink
-                torch.save(avg, op)
+                    avg[k] += states[k]
+            del states
+
+            if i not in to_average:
+                continue
+            op = output_dir / f"{ph}.{cr}.ave_{i}best.pth"
+            logging.info(f"Averaging {i}best models: " f'criterion="{ph}.{cr}": {op}')
+            if i == max(to_average):
+                # Averaging in place at the last one
+                ave = avg
+            else:
+                ave = {k: v.clone() for k, v in avg.items()}
+            for k in ave:
+                if str(ave[k].dtype).startswith("torch.int"):
+                    # For int type, not averaged, but only accumulated.
+                    # e.g. BatchNorm.num_batches_tracked
+                    # (If there are any cases that requires averaging
+                    #  or the other reducing method, e.g. max/min, for integer type,
+                    #  please report.)
+                    pass
+                else:
+                    ave[k] /= i
+
+            # 2.b. Save the ave model
+            if op.is_symlink() or op.exists():
+                # Don't write through the symlink created by the previous run
+                op.unlink()
+            torch.save(ave, op)
+            _averaged[frozenset(e for e, _ in epoch_and_values[:i])] = op.name
+            del ave
+        del avg
 
         # 3. *.*.ave.pth is a symlink to the max ave model
-        op = output_dir / f"{ph}.{cr}.ave_{max(_nbests)}best.pth"
-        sym_op = output_dir / f"{ph}.{cr}.ave.pth"
-        if sym_op.is_symlink() or sym_op.exists():
-            sym_op.unlink()
-        sym_op.symlink_to(op.name)
+        _symlink(
+            output_dir / f"{ph}.{cr}.ave.pth", f"{ph}.{cr}.ave_{max(_nbests)}best.pth"
+        )
+
+
+def _symlink(sym_op: Path, target: str):
+    if sym_op.is_symlink() or sym_op.exists():
+        sym_op.unlink()
+    sym_op.symlink_to(target)
@@ -1,11 +1,13 @@
 from collections import defaultdict
 import logging
 from pathlib import Path
+from typing import Callable
 from typing import Dict
 from typing import Iterable
 from typing import List
 from typing import Optional
 from typing import Tuple
+from typing import Union
 
 import numpy as np
 import torch
@@ -13,6 +15,8 @@ from torch.nn.parallel import data_parallel
 from torch.utils.data import DataLoader
 from typeguard import check_argument_types
 
+from espnet.nets.pytorch_backend.nets_utils import make_pad_mask
+from espnet2.bin.aggregate_stats_dirs import aggregate_stats_dirs
 from espnet2.fileio.datadir_writer import DatadirWriter
 from espnet2.fileio.npy_scp import NpyScpWriter
 from espnet2.torch_utils.device_funcs import to_device
@@ -59,13 +63,17 @@ def collect_stats(
                 for name in batch:
                     if name.endswith("_lengths"):
                         continue
-                    for i, (key, data) in enumerate(zip(keys, batch[name])):
-                        if f"{name}_lengths" in batch:
-                            lg = int(batch[f"{name}_lengths"][i])
-                            data = data[:lg]
-                        datadir_writer[f"{name}_shape"][key] = ",".join(
-                            map(str, data.shape)
-                        )
+                    writer = datadir_writer[f"{name}_shape"]
+                    # The shape of each sample except for the length
+                    shape = ",".join(map(str, batch[name].shape[2:]))
+                    if f"{name}_lengths" in batch:
+                        lengths = batch[f"{name}_lengths"].tolist()
+                        for key, lg in zip(keys, lengths):
+                            writer[key] = f"{lg},{shape}" if shape else str(lg)
+                    else:
+                        shape = ",".join(map(str, batch[name].shape[1:]))
+                        for key in keys:
+                            writer[key] = shape
 
                 # 2. Extract feats
                 if ngpu <= 1:
@@ -79,30 +87,42 @@ def collect_stats(
                         module_kwargs=batch,
                     )
 
-                # 3. Calculate sum and square sum
+                # 3. Calculate sum and square sum in the batch
                 for key, v in data.items():
-                    for i, (uttid, seq) in enumerate(zip(keys, v.cpu().numpy())):
-                        # Truncate zero-padding region
-                        if f"{key}_lengths" in data:
-                            length = data[f"{key}_lengths"][i]
-                            # seq: (Length, Dim, ...)
-                            seq = seq[:length]
+                    v = v.double()
+                    if f"{key}_lengths" in data:
+                        # v: (B, Length, Dim, ...)
+                        lengths = data[f"{key}_lengths"]
+                        # Fill zero-padding region
+                        v = v.masked_fill(make_pad_mask(lengths, v, 1), 0.0)
+                        count = int(lengths.sum())
+                    else:
+                        # v: (B, Dim, ...) -> (B, 1, Dim, ...)
+                        v = v[:, None]
+                        lengths = None
+                        count = len(v)
+                    # Accumulate value, its square, and count
+                    sum_dict[key] += v.sum((0, 1))
+                    sq_dict[key] += (v**2).sum((0, 1))
+                    count_dict[key] += count
+
+                    # 4. [Option] Write derived features as npy format file.
+                    if write_collected_feats:
+                        # Instantiate NpyScpWriter for the first iteration
+                        if (key, mode) not in npy_scp_writers:
+                            p = output_dir / mode / "collect_feats"
+                            npy_scp_writers[(key, mode)] = NpyScpWriter(
+                                p / f"data_{key}", p / f"{key}.scp"
+                            )
+                        seqs = data[key].cpu().numpy()
+                        if lengths is None:
+                            seqs = seqs[:, None]
                         else:
-                            # seq: (Dim, ...) -> (1, Dim, ...)
-                            seq = seq[None]
-                        # Accumulate value, its square, and count
-                        sum_dict[key] += seq.sum(0)
-                        sq_dict[key] += (seq ** 2).sum(0)
-                        count_dict[key] += len(seq)
-
-                        # 4. [Option] Write derived features as npy format file.
-                        if write_collected_feats:
-                            # Instantiate NpyScpWriter for the first iteration
-                            if (key, mode) not in npy_scp_writers:
-                                p = output_dir / mode / "collect_feats"
-                                npy_scp_writers[(key, mode)] = NpyScpWriter(
-                                    p / f"data_{key}", p / f"{key}.scp"
-                                )
+                            seqs = [
+                                seq[:length]
+                                for seq, length in zip(seqs, lengths.tolist())
+                            ]
+                        for uttid, seq in zip(keys, seqs):
                             # Save array as npy file
                             npy_scp_writers[(key, mode)][uttid] = seq
 
@@ -113,8 +133,8 @@ def collect_stats(
             np.savez(
                 output_dir / mode / f"{key}_stats.npz",
                 count=count_dict[key],
-                sum=sum_dict[key],
-                sum_square=sq_dict[key],
+                sum=sum_dict[key].cpu().numpy(),
+                sum_square=sq_dict[key].cpu().numpy(),
             )
 
         # batch_keys and stats_keys are used by aggregate_stats_dirs.py
@@ -124,3 +144,107 @@ def collect_stats(
             )
         with (output_dir / mode / "stats_keys").open("w", encoding="utf-8") as f:
             f.write("\n".join(sum_dict) + "\n")
+
+
+def collect_stats_sharded(
+    model: AbsESPnetModel,
+    build_iters: Callable[[str, str], Tuple[Iterable, Iterable]],
+    train_key_file: Union[Path, str],
+    valid_key_file: Union[Path, str],
+    output_dir: Path,
+    num_shards: int,
+    ngpu: Optional[int],
+    log_interval: Optional[int],
+    write_collected_feats: bool,
+) -> None:
+    """Perform on collect_stats mode in parallel processes.
+
+    The keys are split into shards, collect_stats() is performed for each shard
+    in a separate process, and the statistics of the shards are merged
+    by aggregate_stats_dirs().
+
+    Args:
+        build_iters: A picklable function to build the iterators of
+            the training and validation data given their key files
+    """
+    assert check_argument_types()
+    keys = {}
+    for mode, key_file in [("train", train_key_file), ("valid", valid_key_file)]:
+        with open(key_file, encoding="utf-8") as f:
+            keys[mode] = [line.split(maxsplit=1)[0] for line in f if line.strip()]
+    num_shards = min(num_shards, len(keys["train"]), len(keys["valid"]))
+
+    shard_dirs = []
+    key_files = []
+    for i in range(num_shards):
+        shard_dir = output_dir / "shards" / f"shard.{i}"
+        shard_dir.mkdir(parents=True, exist_ok=True)
+        shard_key_files = []
+        for mode in ["train", "valid"]:
+            # Split into contiguous blocks to keep the order of the data
+            n = len(keys[mode])
+            shard_keys = keys[mode][n * i // num_shards : n * (i + 1) // num_shards]
+            p = shard_dir / f"{mode}_keys"
+            p.write_text("".join(f"{k}\n" for k in shard_keys), encoding="utf-8")
+            shard_key_files.append(str(p))
+        shard_dirs.append(shard_dir)
+        key_files.append(shard_key_files)
+
+    # Share the CPU threads among the processes
+    num_threads = max(torch.get_num_threads() // num_shards, 1)
+    ctx = torch.multiprocessing.get_context("spawn")
+    processes = []
+    for shard_dir, (train_key_file, valid_key_file) in zip(shard_dirs, key_files):
+        process = ctx.Process(
+            target=_collect_stats_shard,
+            args=(
+                model,
+                build_iters,
+                train_key_file,
+                valid_key_file,
+                shard_dir,
+                ngpu,
+                log_interval,
+                write_collected_feats,
+                num_threads,
+            ),
+        )
+        process.start()
+        processes.append(process)
+    for process in processes:
+        process.join()
+    for i, process in enumerate(processes):
+        if process.exitcode != 0:
+            raise RuntimeError(
+                f"collect_stats failed for shard.{i}: exitcode={process.exitcode}"
+            )
+
+    aggregate_stats_dirs(
+        input_dir=shard_dirs,
+        output_dir=output_dir,
+        log_level=logging.getLevelName(logging.getLogger().getEffectiveLevel()),
+    )
+
+
+def _collect_stats_shard(
+    model,
+    build_iters,
+    train_key_file,
+    valid_key_file,
+    output_dir,
+    ngpu,
+    log_interval,
+    write_collected_feats,
+    num_threads,
+):
+    torch.set_num_threads(num_threads)
+    train_iter, valid_iter = build_iters(train_key_file, valid_key_file)
+    collect_stats(
+        model=model,
+        train_iter=train_iter,
+        valid_iter=valid_iter,
+        output_dir=output_dir,
+        ngpu=ngpu,
+        log_interval=log_interval,
+        write_collected_feats=write_collected_feats,
+    )
@@ -36,6 +36,7 @@ from espnet2.iterators.multiple_iter_factory import MultipleIterFactory
 from espnet2.iterators.sequence_iter_factory import SequenceIterFactory
 from espnet2.main_funcs.average_nbest_models import average_nbest_models
 from espnet2.main_funcs.collect_stats import collect_stats
+from espnet2.main_funcs.collect_stats import collect_stats_sharded
 from espnet2.optimizers.sgd import SGD
 from espnet2.samplers.build_batch_sampler import BATCH_TYPES
 from espnet2.samplers.build_batch_sampler import build_batch_sampler
@@ -49,6 +50,8 @@ from espnet2.torch_utils.pytorch_version import pytorch_cudnn_version
 from espnet2.torch_utils.set_all_random_seed import set_all_random_seed
 from espnet2.train.abs_espnet_model import AbsESPnetModel
 from espnet2.train.class_choices import ClassChoices
+from espnet2.train.collate_fn import CommonCollateFn
+from espnet2.train.collate_fn import min_shared_memory_slabs
 from espnet2.train.dataset import AbsDataset
 from espnet2.train.dataset import DATA_TYPES
 from espnet2.train.dataset import ESPnetDataset
@@ -432,6 +435,14 @@ class AbsTask(ABC):
             default=False,
             help='Write the output features from the model when "collect stats" mode',
         )
+        group.add_argument(
+            "--collect_stats_num_shards",
+            type=int,
+            default=1,
+            help='The number of processes in "collect stats" mode. '
+            "The data are split into the shards and "
+            "the stats of them are merged at the end",
+        )
 
         group = parser.add_argument_group("Trainer related")
         group.add_argument(
@@ -519,6 +530,30 @@ class AbsTask(ABC):
             help="Just only iterating data loading without "
             "model forwarding and training",
         )
+        group.add_argument(
+            "--prefetch_batches",
+            type=int,
+            default=0,
+            help="The number of the mini-batches sent to the device "
+            "in a background thread during training. 0 disables the prefetching",
+        )
+        group.add_argument(
+            "--profile_modules",
+            type=str,
+            nargs="*",
+            default=[],
+            help="The names of the submodules to be profiled during training, "
+            'e.g. "frontend encoder decoder". Their forward/backward time and '
+            "peak CUDA memory are reported for each step",
+        )
+        group.add_argument(
+            "--profile_trace_iters",
+            type=int,
+            nargs=2,
+            default=None,
+            help="Record a chrome trace of the iterations in [START, END) "
+            "of each training epoch into {output_dir}/profile",
+        )
         group.add_argument(
             "--resume",
             type=str2bool,
@@ -626,6 +661,18 @@ class AbsTask(ABC):
             default=False,
             help="Use multiple iterator mode",
         )
+        group.add_argument(
+            "--shared_memory_slabs",
+            type=int,
+            default=0,
+            help="If > 0, each DataLoader worker pads the mini-batches into "
+            "this number of shared memory buffers reused in round robin. "
+            "Only for CommonCollateFn. It must be larger than the number of "
+            "the mini-batches prefetched by the DataLoader (2 * num_workers) "
+            "plus the ones held by the trainer (2, or prefetch_batches + 3 if "
+            "--prefetch_batches > 0), i.e. >= 2 * num_workers + 3 "
+            "without --prefetch_batches",
+        )
 
         group = parser.add_argument_group("Chunk iterator related")
         group.add_argument(
@@ -701,6 +748,13 @@ class AbsTask(ABC):
             help="The maximum cache size for validation data loader. e.g. 10MB, 20GB. "
             "If None, the 5 percent size of --max_cache_size",
         )
+        group.add_argument(
+            "--cache_policy",
+            type=str,
+            default="lru",
+            choices=["lru", "lfu"],
+            help="The eviction policy of the data loader cache when it's full",
+        )
 
         group = parser.add_argument_group("Optimizer related")
         for i in range(1, cls.num_optimizers + 1):
@@ -1132,35 +1186,36 @@ class AbsTask(ABC):
             else:
                 valid_key_file = None
 
-            collect_stats(
-                model=model,
-                train_iter=cls.build_streaming_iterator(
-                    data_path_and_name_and_type=args.train_data_path_and_name_and_type,
-                    key_file=train_key_file,
-                    batch_size=args.batch_size,
-                    dtype=args.train_dtype,
-                    num_workers=args.num_workers,
-                    allow_variable_data_keys=args.allow_variable_data_keys,
+            if args.collect_stats_num_shards > 1:
+                # Read the keys from the first data file if no key file is given
+                if train_key_file is None:
+                    train_key_file = args.train_data_path_and_name_and_type[0][0]
+                if valid_key_file is None:
+                    valid_key_file = args.valid_data_path_and_name_and_type[0][0]
+                collect_stats_sharded(
+                    model=model,
+                    build_iters=functools.partial(cls.build_collect_stats_iters, args),
+                    train_key_file=train_key_file,
+                    valid_key_file=valid_key_file,
+                    output_dir=output_dir,
+                    num_shards=args.collect_stats_num_shards,
                     ngpu=args.ngpu,
-                    preprocess_fn=cls.build_preprocess_fn(args, train=False),
-                    collate_fn=cls.build_collate_fn(args, train=False),
-                ),
-                valid_iter=cls.build_streaming_iterator(
-                    data_path_and_name_and_type=args.valid_data_path_and_name_and_type,
-                    key_file=valid_key_file,
-                    batch_size=args.valid_batch_size,
-                    dtype=args.train_dtype,
-                    num_workers=args.num_workers,
-                    allow_variable_data_keys=args.allow_variable_data_keys,
+                    log_interval=args.log_interval,
+                    write_collected_feats=args.write_collected_feats,
+                )
+            else:
+                train_iter, valid_iter = cls.build_collect_stats_iters(
+                    args, train_key_file, valid_key_file
+                )
+                collect_stats(
+                    model=model,
+                    train_iter=train_iter,
+                    valid_iter=valid_iter,
+                    output_dir=output_dir,
                     ngpu=args.ngpu,
-                    preprocess_fn=cls.build_preprocess_fn(args, train=False),
-                    collate_fn=cls.build_collate_fn(args, train=False),
-                ),
-                output_dir=output_dir,
-                ngpu=args.ngpu,
-                log_interval=args.log_interval,
-                write_collected_feats=args.write_collected_feats,
-            )
+                    log_interval=args.log_interval,
+                    write_collected_feats=args.write_collected_feats,
+                )
         else:
 
             # 8. Build iterator factories
@@ -1387,6 +1442,8 @@ class AbsTask(ABC):
             float_dtype=args.train_dtype,
             preprocess=iter_options.preprocess_fn,
             max_cache_size=iter_options.max_cache_size,
+            cache_policy=args.cache_policy,
+            shared_cache=args.num_workers > 0,
         )
         cls.check_task_requirements(
             dataset, args.allow_variable_data_keys, train=iter_options.train
@@ -1430,6 +1487,30 @@ class AbsTask(ABC):
                     )
             batches = [batch[rank::world_size] for batch in batches]
 
+        if args.shared_memory_slabs > 0 and args.num_workers > 0:
+            # The current and the previous mini-batches are held by the trainer
+            num_held_batches = 2
+            if iter_options.train and args.prefetch_batches > 0:
+                # DevicePrefetcher doesn't copy the tensors on CPU, so the queued
+                # batches and the one waiting for the free space are also held
+                num_held_batches += args.prefetch_batches + 1
+            min_slabs = min_shared_memory_slabs(args.num_workers, num_held_batches)
+            if args.shared_memory_slabs < min_slabs:
+                raise RuntimeError(
+                    f"--shared_memory_slabs must be >= {min_slabs} "
+                    f"for --num_workers {args.num_workers} and "
+                    f"--prefetch_batches {args.prefetch_batches}, otherwise the "
+                    "mini-batches are overwritten while being used: "
+                    f"{args.shared_memory_slabs}"
+                )
+            if isinstance(iter_options.collate_fn, CommonCollateFn):
+                iter_options.collate_fn.shared_memory_slabs = args.shared_memory_slabs
+            else:
+                logging.warning(
+                    "--shared_memory_slabs is ignored for "
+                    f"{type(iter_options.collate_fn).__name__}"
+                )
+
         return SequenceIterFactory(
             dataset=dataset,
             batches=batches,
@@ -1455,6 +1536,8 @@ class AbsTask(ABC):
             float_dtype=args.train_dtype,
             preprocess=iter_options.preprocess_fn,
             max_cache_size=iter_options.max_cache_size,
+            cache_policy=args.cache_policy,
+            shared_cache=args.num_workers > 0,
         )
         cls.check_task_requirements(
             dataset, args.allow_variable_data_keys, train=iter_options.train
@@ -1632,6 +1715,40 @@ class AbsTask(ABC):
             build_funcs=build_funcs, shuffle=iter_options.train, seed=args.seed
         )
 
+    @classmethod
+    def build_collect_stats_iters(
+        cls,
+        args: argparse.Namespace,
+        train_key_file: Optional[str],
+        valid_key_file: Optional[str],
+    ) -> Tuple[DataLoader, DataLoader]:
+        """Build the iterators of the training and validation data for collect_stats"""
+        assert check_argument_types()
+        return (
+            cls.build_streaming_iterator(
+                data_path_and_name_and_type=args.train_data_path_and_name_and_type,
+                key_file=train_key_file,
+                batch_size=args.batch_size,
+                dtype=args.train_dtype,
+                num_workers=args.num_workers,
+                allow_variable_data_keys=args.allow_variable_data_keys,
+                ngpu=args.ngpu,
+                preprocess_fn=cls.build_preprocess_fn(args, train=False),
+                collate_fn=cls.build_collate_fn(args, train=False),
+            ),
+            cls.build_streaming_iterator(
+                data_path_and_name_and_type=args.valid_data_path_and_name_and_type,
+                key_file=valid_key_file,
+                batch_size=args.valid_batch_size,
+                dtype=args.train_dtype,
+                num_workers=args.num_workers,
+                allow_variable_data_keys=args.allow_variable_data_keys,
+                ngpu=args.ngpu,
+                preprocess_fn=cls.build_preprocess_fn(args, train=False),
+                collate_fn=cls.build_collate_fn(args, train=False),
+            ),
+        )
+
     @classmethod
     def build_streaming_iterator(
         cls,
@@ -1,4 +1,8 @@
+from collections import OrderedDict
+import json
 from pathlib import Path
+import sqlite3
+from typing import Callable
 from typing import Iterable
 from typing import List
 from typing import Union
@@ -75,6 +79,82 @@ class G2p_en:
         return phones
 
 
+class G2pCache:
+    """Memoize the results of G2P for each sentence.
+
+    The results are kept in a bounded LRU cache in memory and, optionally,
+    in a sqlite database, "{cache_dir}/{g2p_type}.db", which can be shared
+    between processes and runs. The unit of the cache is a sentence instead of
+    a word because the G2P tools may refer to the context of the words.
+
+    """
+
+    def __init__(
+        self,
+        g2p: Callable[[str], List[str]],
+        g2p_type: str,
+        cache_size: int = 100000,
+        cache_dir: Union[Path, str] = None,
+    ):
+        assert check_argument_types()
+        self.g2p = g2p
+        self.g2p_type = g2p_type
+        self.cache_size = cache_size
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else None
+        self._memory = OrderedDict()
+        self._db = None
+
+    def __getstate__(self):
+        # sqlite3.Connection can't be pickled
+        state = self.__dict__.copy()
+        state["_db"] = None
+        return state
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._db is None:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(
+                str(self.cache_dir / f"{self.g2p_type}.db"),
+                timeout=60,
+                isolation_level=None,
+            )
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=OFF")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS g2p "
+                "(text TEXT PRIMARY KEY, phones TEXT NOT NULL)"
+            )
+        return self._db
+
+    def __call__(self, text: str) -> List[str]:
+        phones = self._memory.get(text)
+        if phones is not None:
+            self._memory.move_to_end(text)
+            return list(phones)
+
+        if self.cache_dir is not None:
+            row = (
+                self._connect()
+                .execute("SELECT phones FROM g2p WHERE text = ?", (text,))
+                .fetchone()
+            )
+            if row is not None:
+                phones = json.loads(row[0])
+        if phones is None:
+            phones = self.g2p(text)
+            if self.cache_dir is not None:
+                self._connect().execute(
+                    "INSERT OR IGNORE INTO g2p VALUES (?, ?)",
+                    (text, json.dumps(phones, ensure_ascii=False)),
+                )
+
+        if self.cache_size > 0:
+            self._memory[text] = tuple(phones)
+            if len(self._memory) > self.cache_size:
+                self._memory.popitem(last=False)
+        return list(phones)
+
+
 class PhonemeTokenizer(AbsTokenizer):
     def __init__(
         self,
@@ -82,6 +162,8 @@ class PhonemeTokenizer(AbsTokenizer):
         non_linguistic_symbols: Union[Path, str, Iterable[str]] = None,
         space_symbol: str = "<space>",
         remove_non_linguistic_symbols: bool = False,
+        g2p_cache_size: int = 0,
+        g2p_cache_dir: Union[Path, str] = None,
     ):
         assert check_argument_types()
         if g2p_type == "g2p_en":
@@ -98,6 +180,13 @@ class PhonemeTokenizer(AbsTokenizer):
             self.g2p = pypinyin_g2p_phone
         else:
             raise NotImplementedError(f"Not supported: g2p_type={g2p_type}")
+        if g2p_cache_size > 0 or g2p_cache_dir is not None:
+            self.g2p = G2pCache(
+                self.g2p,
+                g2p_type,
+                cache_size=g2p_cache_size,
+                cache_dir=g2p_cache_dir,
+            )
 
         self.g2p_type = g2p_type
         self.space_symbol = space_symbol
@@ -0,0 +1,179 @@
+import queue
+import threading
+from typing import Iterable
+from typing import Union
+
+import torch
+from typeguard import check_argument_types
+
+from espnet2.torch_utils.device_funcs import to_device
+
+
+class _Sentinel:
+    pass
+
+
+class DevicePrefetcher:
+    """Iterator staging the next batches onto the device in a background thread.
+
+    The items of the given iterable are fetched and sent to the device
+    by a background thread while the current step runs.
+    For CUDA devices, the tensors are copied from pinned memory
+    in a dedicated stream, and the consumer stream waits for the copies
+    only when the batch is taken. For CPU, only the data loading and
+    the collate function are overlapped with the computation.
+
+    Examples:
+        >>> for keys, batch in DevicePrefetcher(iterator, "cuda", num_prefetch=2):
+        ...     loss = model(**batch)
+
+    Args:
+        iterable: Yields the batches, e.g. DataLoader.
+        device: The device of the output batches.
+        num_prefetch: The maximum number of the batches staged in advance.
+        pin_memory: Copy the batches into pinned memory before sending to CUDA.
+    """
+
+    def __init__(
+        self,
+        iterable: Iterable,
+        device: Union[str, torch.device],
+        num_prefetch: int = 2,
+        pin_memory: bool = True,
+    ):
+        assert check_argument_types()
+        if num_prefetch <= 0:
+            raise ValueError(f"num_prefetch must be > 0: {num_prefetch}")
+        self.iterable = iterable
+        self.device = torch.device(device)
+        if self.device.type == "cuda" and self.device.index is None:
+            # The background thread doesn't inherit the current device
+            self.device = torch.device("cuda", torch.cuda.current_device())
+        self.num_prefetch = num_prefetch
+        self.use_cuda = self.device.type == "cuda"
+        self.pin_memory = pin_memory and self.use_cuda
+        # The number of the staged batches when the last batch was taken
+        self.queue_depth = 0
+
+        self._queue = None
+        self._thread = None
+        self._stop = threading.Event()
+
+    def __len__(self):
+        return len(self.iterable)
+
+    def __iter__(self):
+        self.close()
+        self._queue = queue.Queue(maxsize=self.num_prefetch)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._worker,
+            args=(iter(self.iterable), self._queue, self._stop),
+            daemon=True,
+        )
+        self._thread.start()
+        return self
+
+    def __next__(self):
+        if self._queue is None:
+            raise StopIteration
+        self.queue_depth = self._queue.qsize()
+        while True:
+            try:
+                item = self._queue.get(timeout=1.0)
+                break
+            except queue.Empty:
+                # The worker may have put the last item just before exiting
+                if not self._thread.is_alive() and self._queue.empty():
+                    self.close()
+                    raise RuntimeError("The prefetching thread died unexpectedly")
+        if isinstance(item, _Sentinel):
+            self.close()
+            raise StopIteration
+        elif isinstance(item, BaseException):
+            self.close()
+            raise item
+
+        data, event = item
+        if event is not None:
+            # Wait for the copy and tell the allocator that
+            # the tensors are used in the current stream
+            stream = torch.cuda.current_stream(self.device)
+            stream.wait_event(event)
+            _record_stream(data, stream)
+        return data
+
+    def close(self):
+        """Stop the background thread."""
+        if self._thread is not None:
+            self._stop.set()
+            # Unblock the worker waiting for the free space
+            while self._thread.is_alive():
+                try:
+                    self._queue.get(timeout=0.01)
+                except queue.Empty:
+                    pass
+            self._thread = None
+        self._queue = None
+
+    def __del__(self):
+        self.close()
+
+    def _worker(self, iterator, q: queue.Queue, stop: threading.Event):
+        try:
+            if self.use_cuda:
+                torch.cuda.set_device(self.device)
+                stream = torch.cuda.Stream(self.device)
+            else:
+                stream = None
+            for data in iterator:
+                if stop.is_set():
+                    return
+                event = None
+                if stream is not None:
+                    if self.pin_memory:
+                        data = _pin_memory(data)
+                    with torch.cuda.stream(stream):
+                        data = to_device(data, self.device, non_blocking=True)
+                        event = torch.cuda.Event()
+                        event.record(stream)
+                else:
+                    data = to_device(data, self.device)
+                if not self._put(q, (data, event), stop):
+                    return
+            self._put(q, _Sentinel(), stop)
+        except BaseException as e:
+            self._put(q, e, stop)
+
+    @staticmethod
+    def _put(q: queue.Queue, item, stop: threading.Event) -> bool:
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+
+def _pin_memory(data):
+    if isinstance(data, torch.Tensor):
+        return data.pin_memory()
+    elif isinstance(data, dict):
+        return {k: _pin_memory(v) for k, v in data.items()}
+    elif isinstance(data, (list, tuple)) and type(data) in (list, tuple):
+        return type(data)(_pin_memory(v) for v in data)
+    else:
+        return data
+
+
+def _record_stream(data, stream):
+    if isinstance(data, torch.Tensor):
+        if data.is_cuda:
+            data.record_stream(stream)
+    elif isinstance(data, dict):
+        for v in data.values():
+            _record_stream(v, stream)
+    elif isinstance(data, (list, tuple)):
+        for v in data:
+            _record_stream(v, stream)
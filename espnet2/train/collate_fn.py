@@ -1,11 +1,13 @@
 from typing import Collection
 from typing import Dict
 from typing import List
+from typing import Optional
 from typing import Tuple
 from typing import Union
 
 import numpy as np
 import torch
+from torch.utils.data import get_worker_info
 from typeguard import check_argument_types
 from typeguard import check_return_type
 
@@ -13,18 +15,32 @@ from espnet.nets.pytorch_backend.nets_utils import pad_list
 
 
 class CommonCollateFn:
-    """Functor class of common_collate_fn()"""
+    """Functor class of common_collate_fn()
+
+    If shared_memory_slabs > 0, each DataLoader worker pads the batches
+    into a pool of shared memory buffers, which are allocated at the first use
+    and reused in round robin, instead of allocating new tensors for every batch
+    and copying them into shared memory when sending them to the main process.
+    Note that the returned tensors are overwritten after the worker
+    creates "shared_memory_slabs" more batches, so it must be larger than
+    the number of the batches prefetched by the workers plus the batches
+    held by the main process. See min_shared_memory_slabs().
+    """
 
     def __init__(
         self,
         float_pad_value: Union[float, int] = 0.0,
         int_pad_value: int = -32768,
         not_sequence: Collection[str] = (),
+        shared_memory_slabs: int = 0,
     ):
         assert check_argument_types()
         self.float_pad_value = float_pad_value
         self.int_pad_value = int_pad_value
         self.not_sequence = set(not_sequence)
+        self.shared_memory_slabs = shared_memory_slabs
+        self._slabs = None
+        self._slab_index = 0
 
     def __repr__(self):
         return (
@@ -40,17 +56,54 @@ class CommonCollateFn:
             float_pad_value=self.float_pad_value,
             int_pad_value=self.int_pad_value,
             not_sequence=self.not_sequence,
+            slab=self._next_slab(),
         )
 
+    def __getstate__(self):
+        # The buffers are allocated in each worker process
+        state = self.__dict__.copy()
+        state["_slabs"] = None
+        return state
+
+    def _next_slab(self) -> Optional[Dict[str, torch.Tensor]]:
+        # Shared memory is useless without worker processes
+        if self.shared_memory_slabs <= 0 or get_worker_info() is None:
+            return None
+        if self._slabs is None:
+            self._slabs = [{} for _ in range(self.shared_memory_slabs)]
+        slab = self._slabs[self._slab_index]
+        self._slab_index = (self._slab_index + 1) % self.shared_memory_slabs
+        return slab
+
+
+def min_shared_memory_slabs(
+    num_workers: int, num_held_batches: int, prefetch_factor: int = 2
+) -> int:
+    """Return the minimum shared_memory_slabs keeping the live batches intact.
+
+    Args:
+        num_workers: The number of the DataLoader workers.
+        num_held_batches: The maximum number of the batches referred to
+            by the main process at once.
+        prefetch_factor: The number of the batches prefetched by each worker.
+    """
+    # Assume the worst case that all the prefetched batches of the loader
+    # are created by a single worker
+    return num_workers * prefetch_factor + num_held_batches + 1
+
 
 def common_collate_fn(
     data: Collection[Tuple[str, Dict[str, np.ndarray]]],
     float_pad_value: Union[float, int] = 0.0,
     int_pad_value: int = -32768,
     not_sequence: Collection[str] = (),
+    slab: Optional[Dict[str, torch.Tensor]] = None,
 ) -> Tuple[List[str], Dict[str, torch.Tensor]]:
     """Concatenate ndarray-list to an array and convert to torch.Tensor.
 
+    If "slab" is given, the padded tensors are created as views of
+    the shared memory buffers in it, which are allocated or enlarged if needed.
+
     Examples:
         >>> from espnet2.samplers.constant_batch_sampler import ConstantBatchSampler,
         >>> import espnet2.tasks.abs_task
@@ -91,7 +144,10 @@ def common_collate_fn(
         # tensor_list: Batch x (Length, ...)
         tensor_list = [torch.from_numpy(a) for a in array_list]
         # tensor: (Batch, Length, ...)
-        tensor = pad_list(tensor_list, pad_value)
+        if slab is None:
+            tensor = pad_list(tensor_list, pad_value)
+        else:
+            tensor = _pad_list_into_slab(tensor_list, pad_value, slab, key)
         output[key] = tensor
 
         # lens: (Batch,)
@@ -102,3 +158,25 @@ def common_collate_fn(
     output = (uttids, output)
     assert check_return_type(output)
     return output
+
+
+def _pad_list_into_slab(
+    tensor_list: List[torch.Tensor],
+    pad_value: Union[float, int],
+    slab: Dict[str, torch.Tensor],
+    key: str,
+) -> torch.Tensor:
+    max_len = max(t.size(0) for t in tensor_list)
+    shape = (len(tensor_list), max_len) + tuple(tensor_list[0].shape[1:])
+    numel = int(np.prod(shape))
+    buffer = slab.get(key)
+    if buffer is None or buffer.dtype != tensor_list[0].dtype or len(buffer) < numel:
+        # Allocate with a margin to avoid enlarging it for every longer batch
+        buffer = torch.empty(numel + numel // 4, dtype=tensor_list[0].dtype)
+        slab[key] = buffer.share_memory_()
+
+    tensor = buffer[:numel].view(shape)
+    tensor.fill_(pad_value)
+    for i, t in enumerate(tensor_list):
+        tensor[i, : t.size(0)] = t
+    return tensor
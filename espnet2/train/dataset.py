@@ -24,12 +24,13 @@ from typeguard import check_argument_types
 from typeguard import check_return_type
 
 from espnet2.fileio.npy_scp import NpyScpReader
+from espnet2.fileio.packed_array import PackedArrayReader
 from espnet2.fileio.rand_gen_dataset import FloatRandomGenerateDataset
 from espnet2.fileio.rand_gen_dataset import IntRandomGenerateDataset
-from espnet2.fileio.read_text import load_num_sequence_text
-from espnet2.fileio.read_text import read_2column_text
+from espnet2.fileio.read_text import NumSequenceTextReader
+from espnet2.fileio.read_text import TwoColumnTextIndex
 from espnet2.fileio.sound_scp import SoundScpReader
-from espnet2.utils.sized_dict import SizedDict
+from espnet2.utils.sized_dict import SizedCache
 
 
 class AdapterForSoundScpReader(collections.abc.Mapping):
@@ -154,8 +155,18 @@ DATA_TYPES = {
         "   utterance_id_B /some/where/b.npy\n"
         "   ...",
     ),
+    "packed": dict(
+        func=PackedArrayReader,
+        kwargs=[],
+        help="A directory of the packed array format created by "
+        "espnet2.bin.pack_arrays. The arrays are read from memory-mapped shards."
+        "\n\n"
+        "   /some/where/feats/shard.0.bin\n"
+        "   /some/where/feats/shard.0.idx.npy\n"
+        "   ...",
+    ),
     "text_int": dict(
-        func=functools.partial(load_num_sequence_text, loader_type="text_int"),
+        func=functools.partial(NumSequenceTextReader, loader_type="text_int"),
         kwargs=[],
         help="A text file in which is written a sequence of interger numbers "
         "separated by space."
@@ -165,7 +176,7 @@ DATA_TYPES = {
         "   ...",
     ),
     "csv_int": dict(
-        func=functools.partial(load_num_sequence_text, loader_type="csv_int"),
+        func=functools.partial(NumSequenceTextReader, loader_type="csv_int"),
         kwargs=[],
         help="A text file in which is written a sequence of interger numbers "
         "separated by comma."
@@ -175,7 +186,7 @@ DATA_TYPES = {
         "   ...",
     ),
     "text_float": dict(
-        func=functools.partial(load_num_sequence_text, loader_type="text_float"),
+        func=functools.partial(NumSequenceTextReader, loader_type="text_float"),
         kwargs=[],
         help="A text file in which is written a sequence of float numbers "
         "separated by space."
@@ -185,7 +196,7 @@ DATA_TYPES = {
         "   ...",
     ),
     "csv_float": dict(
-        func=functools.partial(load_num_sequence_text, loader_type="csv_float"),
+        func=functools.partial(NumSequenceTextReader, loader_type="csv_float"),
         kwargs=[],
         help="A text file in which is written a sequence of float numbers "
         "separated by comma."
@@ -195,7 +206,7 @@ DATA_TYPES = {
         "   ...",
     ),
     "text": dict(
-        func=read_2column_text,
+        func=TwoColumnTextIndex,
         kwargs=[],
         help="Return text as is. The text must be converted to ndarray "
         "by 'preprocess'."
@@ -271,6 +282,8 @@ class ESPnetDataset(AbsDataset):
         float_dtype: str = "float32",
         int_dtype: str = "long",
         max_cache_size: Union[float, int, str] = 0.0,
+        cache_policy: str = "lru",
+        shared_cache: bool = True,
     ):
         assert check_argument_types()
         if len(path_name_type_list) == 0:
@@ -302,7 +315,11 @@ class ESPnetDataset(AbsDataset):
             max_cache_size = humanfriendly.parse_size(max_cache_size)
         self.max_cache_size = max_cache_size
         if max_cache_size > 0:
-            self.cache = SizedDict(shared=True)
+            # NOTE: The cache must live in a manager process to be shared
+            #   among the worker processes of DataLoader
+            self.cache = SizedCache(
+                max_cache_size, policy=cache_policy, shared=shared_cache
+            )
         else:
             self.cache = None
 
@@ -368,9 +385,10 @@ class ESPnetDataset(AbsDataset):
             d = next(iter(self.loader_dict.values()))
             uid = list(d)[uid]
 
-        if self.cache is not None and uid in self.cache:
-            data = self.cache[uid]
-            return uid, data
+        if self.cache is not None:
+            data = self.cache.get(uid)
+            if data is not None:
+                return uid, data
 
         data = {}
         # 1. Load data from each loaders
@@ -422,7 +440,9 @@ class ESPnetDataset(AbsDataset):
                 raise NotImplementedError(f"Not supported dtype: {value.dtype}")
             data[name] = value
 
-        if self.cache is not None and self.cache.size < self.max_cache_size:
+        if self.cache is not None:
+            # The least recently (or frequently) used entries are evicted
+            # if the total size exceeds max_cache_size
             self.cache[uid] = data
 
         retval = uid, data
@@ -0,0 +1,213 @@
+from distutils.version import LooseVersion
+from functools import partial
+import logging
+from pathlib import Path
+import time
+from typing import Dict
+from typing import Sequence
+from typing import Union
+
+import torch
+from typeguard import check_argument_types
+
+is_torch_1_4_plus = LooseVersion(torch.__version__) >= LooseVersion("1.4.0")
+is_torch_1_8_1_plus = LooseVersion(torch.__version__) >= LooseVersion("1.8.1")
+
+
+class ModuleProfiler:
+    """Measure the forward/backward time and the peak memory of the submodules.
+
+    The hooks attached to the named submodules accumulate the following stats
+    for each step, which are given to the Reporter by pop_stats():
+
+    - {name}_forward_time: The wall time of forward().
+    - {name}_backward_time: The wall time from the arrival of the gradient
+      of the outputs to the computation of the gradients of the inputs and
+      the parameters.
+    - {name}_peak_mem_MB: The peak allocated CUDA memory in forward().
+
+    CUDA is synchronized in the hooks for the correct time,
+    so this class makes the training slower.
+
+    Examples:
+        >>> profiler = ModuleProfiler(model, ["frontend", "encoder"])
+        >>> loss, stats, weight = model(**batch)
+        >>> loss.backward()
+        >>> reporter.register(profiler.pop_stats())
+        >>> profiler.remove()
+
+    Args:
+        model: The model having the submodules.
+        module_names: The names of the submodules, e.g. "encoder".
+            The prefix "module." for DistributedDataParallel can be omitted.
+    """
+
+    def __init__(self, model: torch.nn.Module, module_names: Sequence[str]):
+        assert check_argument_types()
+        modules = dict(model.named_modules())
+        self.use_cuda = any(p.is_cuda for p in model.parameters())
+        self.module_names = list(module_names)
+        self.stats = {}
+        self._stack = []
+        self._backward_start = {}
+        self._backward_end = {}
+        self._handles = []
+
+        for name in self.module_names:
+            module = modules.get(name, modules.get(f"module.{name}"))
+            if module is None:
+                raise ValueError(
+                    f"{name} is not found in {type(model).__name__}: "
+                    f"{[k for k, _ in model.named_children()]}"
+                )
+            self._handles.append(
+                module.register_forward_pre_hook(partial(self._forward_pre_hook, name))
+            )
+            self._handles.append(
+                module.register_forward_hook(partial(self._forward_hook, name))
+            )
+            for p in module.parameters():
+                if p.requires_grad:
+                    self._handles.append(
+                        p.register_hook(partial(self._backward_end_hook, name))
+                    )
+
+    def _now(self) -> float:
+        if self.use_cuda:
+            torch.cuda.synchronize()
+        return time.perf_counter()
+
+    def _forward_pre_hook(self, name: str, module, inputs):
+        if self.use_cuda:
+            # Keep the peak of the outer module before resetting it
+            if len(self._stack) > 0:
+                self._stack[-1][2] = max(
+                    self._stack[-1][2], torch.cuda.max_memory_allocated()
+                )
+            if is_torch_1_4_plus:
+                torch.cuda.reset_peak_memory_stats()
+            else:
+                torch.cuda.reset_max_memory_allocated()
+        if is_torch_1_4_plus:
+            # Named range for the chrome trace
+            record = torch.autograd.profiler.record_function(name)
+            record.__enter__()
+        else:
+            record = None
+        self._stack.append([name, record, 0, self._now()])
+
+        if torch.is_grad_enabled():
+            for x in _tensors(inputs):
+                if x.requires_grad:
+                    x.register_hook(partial(self._backward_end_hook, name))
+
+    def _forward_hook(self, name: str, module, inputs, outputs):
+        now = self._now()
+        _, record, peak, start = self._stack.pop()
+        if record is not None:
+            record.__exit__(None, None, None)
+        self._add(f"{name}_forward_time", now - start)
+        if self.use_cuda:
+            peak = max(peak, torch.cuda.max_memory_allocated())
+            key = f"{name}_peak_mem_MB"
+            self.stats[key] = max(self.stats.get(key, 0.0), peak / 2**20)
+
+        if torch.is_grad_enabled():
+            for y in _tensors(outputs):
+                if y.requires_grad:
+                    y.register_hook(partial(self._backward_start_hook, name))
+
+    def _backward_start_hook(self, name: str, grad):
+        if name not in self._backward_start:
+            self._backward_start[name] = self._now()
+
+    def _backward_end_hook(self, name: str, grad):
+        self._backward_end[name] = self._now()
+
+    def _add(self, key: str, value: float):
+        self.stats[key] = self.stats.get(key, 0.0) + value
+
+    def pop_stats(self) -> Dict[str, float]:
+        """Return the stats since the previous call and clear them."""
+        for name, start in self._backward_start.items():
+            end = self._backward_end.get(name)
+            if end is not None and end >= start:
+                self._add(f"{name}_backward_time", end - start)
+        stats = self.stats
+        self.stats = {}
+        self._stack = []
+        self._backward_start = {}
+        self._backward_end = {}
+        return stats
+
+    def remove(self):
+        """Remove the hooks."""
+        for h in self._handles:
+            h.remove()
+        self._handles = []
+
+
+class TraceWindow:
+    """Record a chrome trace of the iterations in [start, end).
+
+    Examples:
+        >>> trace = TraceWindow(10, 20, "exp/profile/train.1ep.trace.json")
+        >>> for iiter, batch in enumerate(iterator, 1):
+        ...     trace.step(iiter)
+        ...     ...
+        >>> trace.close()
+
+    Args:
+        start: The first iteration to be recorded.
+        end: The iteration to stop the recording.
+        path: The output file for chrome://tracing.
+    """
+
+    def __init__(self, start: int, end: int, path: Union[Path, str]):
+        assert check_argument_types()
+        if start >= end:
+            raise ValueError(f"start must be smaller than end: {start} >= {end}")
+        self.start = start
+        self.end = end
+        self.path = Path(path)
+        self._profiler = None
+
+    def step(self, iiter: int):
+        """Call at the beginning of each iteration."""
+        if iiter == self.start:
+            if is_torch_1_8_1_plus:
+                activities = [torch.profiler.ProfilerActivity.CPU]
+                if torch.cuda.is_available():
+                    activities.append(torch.profiler.ProfilerActivity.CUDA)
+                self._profiler = torch.profiler.profile(activities=activities)
+                self._profiler.start()
+            else:
+                self._profiler = torch.autograd.profiler.profile(
+                    use_cuda=torch.cuda.is_available()
+                )
+                self._profiler.__enter__()
+        elif iiter == self.end:
+            self.close()
+
+    def close(self):
+        """Stop the recording and write the trace if it's running."""
+        if self._profiler is not None:
+            if is_torch_1_8_1_plus:
+                self._profiler.stop()
+            else:
+                self._profiler.__exit__(None, None, None)
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._profiler.export_chrome_trace(str(self.path))
+            logging.info(f"Chrome trace is written to {self.path}")
+            self._profiler = None
+
+
+def _tensors(data):
+    if isinstance(data, torch.Tensor):
+        yield data
+    elif isinstance(data, dict):
+        for v in data.values():
+            yield from _tensors(v)
+    elif isinstance(data, (list, tuple)):
+        for v in data:
+            yield from _tensors(v)
@@ -250,6 +250,10 @@ class SubReporter:
                 retval = next(iterator)
                 t = time.perf_counter() - start
                 self.register({name: t})
+                # e.g. DevicePrefetcher reports the number of the staged batches
+                queue_depth = getattr(iterator, "queue_depth", None)
+                if queue_depth is not None:
+                    self.register({"prefetch_queue_depth": queue_depth})
                 yield retval
             except StopIteration:
                 break
@@ -12,6 +12,7 @@ from typing import List
 from typing import Optional
 from typing import Sequence
 from typing import Tuple
+from typing import Union
 
 import humanfriendly
 import numpy as np
@@ -28,10 +29,13 @@ from espnet2.schedulers.abs_scheduler import AbsScheduler
 from espnet2.schedulers.abs_scheduler import AbsValEpochStepScheduler
 from espnet2.torch_utils.add_gradient_noise import add_gradient_noise
 from espnet2.torch_utils.device_funcs import to_device
+from espnet2.torch_utils.device_prefetcher import DevicePrefetcher
 from espnet2.torch_utils.recursive_op import recursive_average
 from espnet2.torch_utils.set_all_random_seed import set_all_random_seed
 from espnet2.train.abs_espnet_model import AbsESPnetModel
 from espnet2.train.distributed_utils import DistributedOption
+from espnet2.train.module_profiler import ModuleProfiler
+from espnet2.train.module_profiler import TraceWindow
 from espnet2.train.reporter import Reporter
 from espnet2.train.reporter import SubReporter
 from espnet2.utils.build_dataclass import build_dataclass
@@ -60,6 +64,24 @@ else:
     GradScaler = None
 
 
+def _has_equal_length(iterator, like: torch.Tensor) -> bool:
+    """Check whether the iterators of all the processes have the same length.
+
+    Args:
+        iterator: The iterator of this process. It's regarded as
+            having a different length if len() is not supported.
+        like: Decide the device of the tensor for all_reduce()
+    """
+    try:
+        length = len(iterator)
+    except TypeError:
+        length = -1
+    # [max(length), max(-length)] = [max(length), -min(length)]
+    lengths = like.new_tensor([length, -length])
+    torch.distributed.all_reduce(lengths, ReduceOp.MAX)
+    return length >= 0 and lengths[0].item() == -lengths[1].item()
+
+
 @dataclasses.dataclass
 class TrainerOptions:
     ngpu: int
@@ -70,6 +92,10 @@ class TrainerOptions:
     grad_clip_type: float
     log_interval: Optional[int]
     no_forward_run: bool
+    prefetch_batches: int = 0
+    profile_modules: Sequence[str] = ()
+    profile_trace_iters: Optional[Sequence[int]] = None
+    output_dir: Union[Path, str, None] = None
 
 
 class Trainer:
@@ -359,139 +385,207 @@ class Trainer:
         model.train()
         all_steps_are_invalid = True
         # [For distributed] Because iteration counts are not always equals between
-        # processes, send stop-flag to the other processes if iterator is finished
+        # processes, send stop-flag to the other processes if iterator is finished.
+        # The stop-flag is not needed if all the processes have the same length,
+        # e.g. the mini-batches of the sequence iterator are split between them.
         iterator_stop = torch.tensor(0).to("cuda" if ngpu > 0 else "cpu")
+        sync_stop = distributed and not _has_equal_length(iterator, iterator_stop)
 
-        start_time = time.perf_counter()
-        for iiter, (_, batch) in enumerate(
-            reporter.measure_iter_time(iterator, "iter_time"), 1
-        ):
-            assert isinstance(batch, dict), type(batch)
+        # The cache of ESPnetDataset if max_cache_size > 0
+        cache = getattr(getattr(iterator, "dataset", None), "cache", None)
+        cache_stats = cache.stats() if cache is not None else None
 
+        if options.profile_trace_iters is not None:
+            if options.output_dir is None:
+                raise RuntimeError("output_dir is required for profile_trace_iters")
             if distributed:
-                torch.distributed.all_reduce(iterator_stop, ReduceOp.SUM)
-                if iterator_stop > 0:
-                    break
-
-            batch = to_device(batch, "cuda" if ngpu > 0 else "cpu")
-            if no_forward_run:
-                all_steps_are_invalid = False
-                continue
-
-            with autocast(scaler is not None):
-                with reporter.measure_time("forward_time"):
-                    loss, stats, weight = model(**batch)
-                stats = {k: v for k, v in stats.items() if v is not None}
-                if ngpu > 1 or distributed:
-                    # Apply weighted averaging for loss and stats
-                    loss = (loss * weight.type(loss.dtype)).sum()
-
-                    # if distributed, this method can also apply all_reduce()
-                    stats, weight = recursive_average(stats, weight, distributed)
-
-                    # Now weight is summation over all workers
-                    loss /= weight
-                if distributed:
-                    # NOTE(kamo): Multiply world_size because DistributedDataParallel
-                    # automatically normalizes the gradient by world_size.
-                    loss *= torch.distributed.get_world_size()
-
-                loss /= accum_grad
-
-            reporter.register(stats, weight)
-
-            with reporter.measure_time("backward_time"):
-                if scaler is not None:
-                    # Scales loss.  Calls backward() on scaled loss
-                    # to create scaled gradients.
-                    # Backward passes under autocast are not recommended.
-                    # Backward ops run in the same dtype autocast chose
-                    # for corresponding forward ops.
-                    scaler.scale(loss).backward()
-                else:
-                    loss.backward()
-
-            if iiter % accum_grad == 0:
-                if scaler is not None:
-                    # Unscales the gradients of optimizer's assigned params in-place
-                    scaler.unscale_(optimizer)
-
-                # gradient noise injection
-                if grad_noise:
-                    add_gradient_noise(
-                        model,
-                        reporter.get_total_count(),
-                        duration=100,
-                        eta=1.0,
-                        scale_factor=0.55,
-                    )
-
-                # compute the gradient norm to check if it is normal or not
-                grad_norm = torch.nn.utils.clip_grad_norm_(
-                    model.parameters(),
-                    max_norm=grad_clip,
-                    norm_type=grad_clip_type,
+                # Each rank records its own trace
+                name = (
+                    f"train.{reporter.get_epoch()}ep."
+                    f"rank{torch.distributed.get_rank()}.trace.json"
                 )
-                # PyTorch<=1.4, clip_grad_norm_ returns float value
-                if not isinstance(grad_norm, torch.Tensor):
-                    grad_norm = torch.tensor(grad_norm)
-
-                if not torch.isfinite(grad_norm):
-                    logging.warning(
-                        f"The grad norm is {grad_norm}. Skipping updating the model."
-                    )
+            else:
+                name = f"train.{reporter.get_epoch()}ep.trace.json"
+            trace_window = TraceWindow(
+                *options.profile_trace_iters,
+                Path(options.output_dir) / "profile" / name,
+            )
+        else:
+            trace_window = None
 
-                    # Must invoke scaler.update() if unscale_() is used in the iteration
-                    # to avoid the following error:
-                    #   RuntimeError: unscale_() has already been called
-                    #   on this optimizer since the last update().
-                    # Note that if the gradient has inf/nan values,
-                    # scaler.step skips optimizer.step().
+        # NOTE: Attach the hooks and start the prefetch thread just before
+        #   the loop so that they're released by "finally" whatever happens
+        if len(options.profile_modules) > 0:
+            module_profiler = ModuleProfiler(model, options.profile_modules)
+        else:
+            module_profiler = None
+        if options.prefetch_batches > 0:
+            # Stage the next batches onto the device in a background thread.
+            # "iter_time" is then the time waiting for the prefetcher.
+            prefetcher = DevicePrefetcher(
+                iterator,
+                "cuda" if ngpu > 0 else "cpu",
+                num_prefetch=options.prefetch_batches,
+            )
+            iterator = prefetcher
+        else:
+            prefetcher = None
+
+        try:
+            start_time = time.perf_counter()
+            for iiter, (_, batch) in enumerate(
+                reporter.measure_iter_time(iterator, "iter_time"), 1
+            ):
+                assert isinstance(batch, dict), type(batch)
+                if trace_window is not None:
+                    trace_window.step(iiter)
+
+                if sync_stop:
+                    torch.distributed.all_reduce(iterator_stop, ReduceOp.SUM)
+                    if iterator_stop > 0:
+                        break
+
+                batch = to_device(batch, "cuda" if ngpu > 0 else "cpu")
+                if no_forward_run:
+                    all_steps_are_invalid = False
+                    continue
+
+                with autocast(scaler is not None):
+                    with reporter.measure_time("forward_time"):
+                        loss, stats, weight = model(**batch)
+                    stats = {k: v for k, v in stats.items() if v is not None}
+                    if ngpu > 1 or distributed:
+                        # Apply weighted averaging for loss and stats
+                        loss = (loss * weight.type(loss.dtype)).sum()
+
+                        # if distributed, this method can also apply all_reduce()
+                        stats, weight = recursive_average(stats, weight, distributed)
+
+                        # Now weight is summation over all workers
+                        loss /= weight
+                    if distributed:
+                        # NOTE(kamo): Multiply world_size because
+                        # DistributedDataParallel automatically normalizes
+                        # the gradient by world_size.
+                        loss *= torch.distributed.get_world_size()
+
+                    loss /= accum_grad
+
+                reporter.register(stats, weight)
+
+                if cache is not None and iiter % log_interval == 0:
+                    # Reading the stats is a round trip to the manager process,
+                    # so register the hit-rate of the lookups in the log interval
+                    prev_stats, cache_stats = cache_stats, cache.stats()
+                    hits = cache_stats["hits"] - prev_stats["hits"]
+                    lookups = hits + cache_stats["misses"] - prev_stats["misses"]
+                    if lookups > 0:
+                        reporter.register(dict(cache_hit_rate=hits / lookups), lookups)
+
+                with reporter.measure_time("backward_time"):
+                    if scaler is not None:
+                        # Scales loss.  Calls backward() on scaled loss
+                        # to create scaled gradients.
+                        # Backward passes under autocast are not recommended.
+                        # Backward ops run in the same dtype autocast chose
+                        # for corresponding forward ops.
+                        scaler.scale(loss).backward()
+                    else:
+                        loss.backward()
+
+                if module_profiler is not None:
+                    reporter.register(module_profiler.pop_stats())
+
+                if iiter % accum_grad == 0:
                     if scaler is not None:
-                        scaler.step(optimizer)
-                        scaler.update()
+                        # Unscales the gradients of optimizer's assigned params in-place
+                        scaler.unscale_(optimizer)
+
+                    # gradient noise injection
+                    if grad_noise:
+                        add_gradient_noise(
+                            model,
+                            reporter.get_total_count(),
+                            duration=100,
+                            eta=1.0,
+                            scale_factor=0.55,
+                        )
 
-                else:
-                    all_steps_are_invalid = False
-                    with reporter.measure_time("optim_step_time"):
+                    # compute the gradient norm to check if it is normal or not
+                    grad_norm = torch.nn.utils.clip_grad_norm_(
+                        model.parameters(),
+                        max_norm=grad_clip,
+                        norm_type=grad_clip_type,
+                    )
+                    # PyTorch<=1.4, clip_grad_norm_ returns float value
+                    if not isinstance(grad_norm, torch.Tensor):
+                        grad_norm = torch.tensor(grad_norm)
+
+                    if not torch.isfinite(grad_norm):
+                        logging.warning(
+                            f"The grad norm is {grad_norm}. "
+                            "Skipping updating the model."
+                        )
+
+                        # Must invoke scaler.update() if unscale_() is used
+                        # in the iteration to avoid the following error:
+                        #   RuntimeError: unscale_() has already been called
+                        #   on this optimizer since the last update().
+                        # Note that if the gradient has inf/nan values,
+                        # scaler.step skips optimizer.step().
                         if scaler is not None:
-                            # scaler.step() first unscales the gradients of
-                            # the optimizer's assigned params.
                             scaler.step(optimizer)
-                            # Updates the scale for next iteration.
                             scaler.update()
-                        else:
-                            optimizer.step()
-                    if isinstance(scheduler, AbsBatchStepScheduler):
-                        scheduler.step()
-                optimizer.zero_grad()
-
-                # Register lr and train/load time[sec/step],
-                # where step refers to accum_grad * mini-batch
-                reporter.register(
-                    dict(
-                        {
-                            f"lr_{i}": pg["lr"]
-                            for i, pg in enumerate(optimizer.param_groups)
-                            if "lr" in pg
-                        },
-                        train_time=time.perf_counter() - start_time,
-                    ),
-                )
-                start_time = time.perf_counter()
 
-            # NOTE(kamo): Call log_message() after next()
-            reporter.next()
-            if iiter % log_interval == 0:
-                logging.info(reporter.log_message(-log_interval))
-                if summary_writer is not None:
-                    reporter.tensorboard_add_scalar(summary_writer, -log_interval)
+                    else:
+                        all_steps_are_invalid = False
+                        with reporter.measure_time("optim_step_time"):
+                            if scaler is not None:
+                                # scaler.step() first unscales the gradients of
+                                # the optimizer's assigned params.
+                                scaler.step(optimizer)
+                                # Updates the scale for next iteration.
+                                scaler.update()
+                            else:
+                                optimizer.step()
+                        if isinstance(scheduler, AbsBatchStepScheduler):
+                            scheduler.step()
+                    optimizer.zero_grad()
+
+                    # Register lr and train/load time[sec/step],
+                    # where step refers to accum_grad * mini-batch
+                    reporter.register(
+                        dict(
+                            {
+                                f"lr_{i}": pg["lr"]
+                                for i, pg in enumerate(optimizer.param_groups)
+                                if "lr" in pg
+                            },
+                            train_time=time.perf_counter() - start_time,
+                        ),
+                    )
+                    start_time = time.perf_counter()
 
-        else:
-            if distributed:
-                iterator_stop.fill_(1)
-                torch.distributed.all_reduce(iterator_stop, ReduceOp.SUM)
+                # NOTE(kamo): Call log_message() after next()
+                reporter.next()
+                if iiter % log_interval == 0:
+                    logging.info(reporter.log_message(-log_interval))
+                    if summary_writer is not None:
+                        reporter.tensorboard_add_scalar(summary_writer, -log_interval)
 
+            else:
+                if sync_stop:
+                    iterator_stop.fill_(1)
+                    torch.distributed.all_reduce(iterator_stop, ReduceOp.SUM)
+        finally:
+            # Stop the prefetch thread and detach the hooks
+            # even if the step raises, e.g. on CUDA OOM
+            if prefetcher is not None:
+                prefetcher.close()
+            if module_profiler is not None:
+                module_profiler.remove()
+            if trace_window is not None:
+                trace_window.close()
         return all_steps_are_invalid
 
     @classmethod
@@ -511,11 +605,14 @@ class Trainer:
         model.eval()
 
         # [For distributed] Because iteration counts are not always equals between
-        # processes, send stop-flag to the other processes if iterator is finished
+        # processes, send stop-flag to the other processes if iterator is finished.
+        # The stop-flag is not needed if all the processes have the same length,
+        # e.g. the mini-batches of the sequence iterator are split between them.
         iterator_stop = torch.tensor(0).to("cuda" if ngpu > 0 else "cpu")
+        sync_stop = distributed and not _has_equal_length(iterator, iterator_stop)
         for (_, batch) in iterator:
             assert isinstance(batch, dict), type(batch)
-            if distributed:
+            if sync_stop:
                 torch.distributed.all_reduce(iterator_stop, ReduceOp.SUM)
                 if iterator_stop > 0:
                     break
@@ -534,7 +631,7 @@ class Trainer:
             reporter.next()
 
         else:
-            if distributed:
+            if sync_stop:
                 iterator_stop.fill_(1)
                 torch.distributed.all_reduce(iterator_stop, ReduceOp.SUM)
 
@@ -210,3 +210,25 @@ class ESPnetTTSModel(AbsESPnetModel):
         else:
             outs_denorm = outs
         return outs, outs_denorm, probs, att_ws
+
+    def batch_inference(
+        self,
+        text: torch.Tensor,
+        text_lengths: torch.Tensor,
+        spembs: torch.Tensor = None,
+        **decode_config,
+    ) -> Tuple[torch.Tensor, torch.Tensor, torch.Tensor]:
+        if decode_config.pop("use_teacher_forcing", False):
+            raise NotImplementedError(
+                "batch inference does not support teacher forcing"
+            )
+        outs, outs_lengths = self.tts.batch_inference(
+            text=text, text_lengths=text_lengths, spembs=spembs, **decode_config
+        )
+
+        if self.normalize is not None:
+            # NOTE: normalize.inverse is in-place operation
+            outs_denorm = self.normalize.inverse(outs.clone(), outs_lengths)[0]
+        else:
+            outs_denorm = outs
+        return outs, outs_denorm, outs_lengths
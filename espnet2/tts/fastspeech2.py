@@ -405,7 +405,7 @@ class FastSpeech2(AbsTTS):
         olens = speech_lengths
 
         # forward propagation
-        before_outs, after_outs, d_outs, p_outs, e_outs = self._forward(
+        before_outs, after_outs, d_outs, p_outs, e_outs, _ = self._forward(
             xs, ilens, ys, olens, ds, ps, es, spembs=spembs, is_inference=False
         )
 
@@ -486,13 +486,17 @@ class FastSpeech2(AbsTTS):
         d_masks = make_pad_mask(ilens).to(xs.device)
 
         if self.stop_gradient_from_pitch_predictor:
-            p_outs = self.pitch_predictor(hs.detach(), d_masks.unsqueeze(-1))
+            p_outs = self.pitch_predictor(
+                hs.detach(), d_masks.unsqueeze(-1), is_inference
+            )
         else:
-            p_outs = self.pitch_predictor(hs, d_masks.unsqueeze(-1))
+            p_outs = self.pitch_predictor(hs, d_masks.unsqueeze(-1), is_inference)
         if self.stop_gradient_from_energy_predictor:
-            e_outs = self.energy_predictor(hs.detach(), d_masks.unsqueeze(-1))
+            e_outs = self.energy_predictor(
+                hs.detach(), d_masks.unsqueeze(-1), is_inference
+            )
         else:
-            e_outs = self.energy_predictor(hs, d_masks.unsqueeze(-1))
+            e_outs = self.energy_predictor(hs, d_masks.unsqueeze(-1), is_inference)
 
         if is_inference:
             d_outs = self.duration_predictor.inference(hs, d_masks)  # (B, Tmax)
@@ -500,14 +504,18 @@ class FastSpeech2(AbsTTS):
             p_embs = self.pitch_embed(p_outs.transpose(1, 2)).transpose(1, 2)
             e_embs = self.energy_embed(e_outs.transpose(1, 2)).transpose(1, 2)
             hs = hs + e_embs + p_embs
-            hs = self.length_regulator(hs, d_outs, alpha)  # (B, Lmax, adim)
+            hs, olens_in, h_masks = self.length_regulator(
+                hs, d_outs, alpha, return_lengths=True
+            )  # (B, Lmax, adim)
         else:
             d_outs = self.duration_predictor(hs, d_masks)
             # use groundtruth in training
             p_embs = self.pitch_embed(ps.transpose(1, 2)).transpose(1, 2)
             e_embs = self.energy_embed(es.transpose(1, 2)).transpose(1, 2)
             hs = hs + e_embs + p_embs
-            hs = self.length_regulator(hs, ds)  # (B, Lmax, adim)
+            hs, olens_in, h_masks = self.length_regulator(
+                hs, ds, return_lengths=True
+            )  # (B, Lmax, adim)
 
         # forward decoder
         if olens is not None and not is_inference:
@@ -517,7 +525,8 @@ class FastSpeech2(AbsTTS):
                 olens_in = olens
             h_masks = self._source_mask(olens_in)
         else:
-            h_masks = None
+            # use the lengths of the sequences expanded by the length regulator
+            h_masks = h_masks.unsqueeze(-2)
         zs, _ = self.decoder(hs, h_masks)  # (B, Lmax, adim)
         before_outs = self.feat_out(zs).view(
             zs.size(0), -1, self.odim
@@ -531,7 +540,7 @@ class FastSpeech2(AbsTTS):
                 before_outs.transpose(1, 2)
             ).transpose(1, 2)
 
-        return before_outs, after_outs, d_outs, p_outs, e_outs
+        return before_outs, after_outs, d_outs, p_outs, e_outs, olens_in
 
     def inference(
         self,
@@ -601,6 +610,48 @@ class FastSpeech2(AbsTTS):
 
         return outs[0], None, None
 
+    def batch_inference(
+        self,
+        text: torch.Tensor,
+        text_lengths: torch.Tensor,
+        spembs: torch.Tensor = None,
+        alpha: float = 1.0,
+    ) -> Tuple[torch.Tensor, torch.Tensor]:
+        """Generate the sequences of features given a batch of character sequences.
+
+        The convolutions in the encoder, the decoder and the postnet see
+        the padded frames as in training with mini-batches, so the outputs
+        around the end of each sequence can slightly differ from ``inference()``.
+
+        Args:
+            text (LongTensor): Batch of padded character ids (B, Tmax).
+            text_lengths (LongTensor): Batch of lengths of each input (B,).
+            spembs (Tensor, optional): Batch of speaker embeddings (B, spk_embed_dim).
+            alpha (float, optional): Alpha to control the speed.
+
+        Returns:
+            Tensor: Batch of padded output sequences of features (B, Lmax, odim).
+            LongTensor: Batch of lengths of each output sequence (B,).
+
+        """
+        if self.use_gst:
+            raise NotImplementedError("batch inference does not support GST")
+
+        # add eos at the last of each sequence
+        xs = F.pad(text, [0, 1], "constant", self.padding_idx)
+        xs[torch.arange(xs.size(0), device=xs.device), text_lengths] = self.eos
+        ilens = text_lengths + 1
+
+        _, outs, *_, olens_in = self._forward(
+            xs,
+            ilens,
+            spembs=spembs,
+            is_inference=True,
+            alpha=alpha,
+        )  # (B, Lmax, odim)
+
+        return outs, olens_in * self.reduction_factor
+
     def _integrate_with_spk_embed(
         self, hs: torch.Tensor, spembs: torch.Tensor
     ) -> torch.Tensor:
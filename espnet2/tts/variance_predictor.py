@@ -64,13 +64,21 @@ class VariancePredictor(torch.nn.Module):
             ]
         self.linear = torch.nn.Linear(n_chans, 1)
 
-    def forward(self, xs: torch.Tensor, x_masks: torch.Tensor = None) -> torch.Tensor:
+    def forward(
+        self,
+        xs: torch.Tensor,
+        x_masks: torch.Tensor = None,
+        is_inference: bool = False,
+    ) -> torch.Tensor:
         """Calculate forward propagation.
 
         Args:
             xs (Tensor): Batch of input sequences (B, Tmax, idim).
             x_masks (ByteTensor, optional):
                 Batch of masks indicating padded part (B, Tmax).
+            is_inference (bool, optional): Whether to mask the padded part
+                before each convolution so that the batched inference doesn't
+                depend on the padding length.
 
         Returns:
             Tensor: Batch of predicted sequences (B, Tmax, 1).
@@ -78,6 +86,9 @@ class VariancePredictor(torch.nn.Module):
         """
         xs = xs.transpose(1, -1)  # (B, idim, Tmax)
         for f in self.conv:
+            if is_inference and x_masks is not None:
+                # NOTE: training keeps the original forward graph
+                xs = xs.masked_fill(x_masks.transpose(1, 2), 0.0)
             xs = f(xs)  # (B, C, Tmax)
 
         xs = self.linear(xs.transpose(1, 2))  # (B, Tmax, 1)
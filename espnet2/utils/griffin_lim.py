@@ -8,15 +8,23 @@
 import logging
 
 from distutils.version import LooseVersion
+from functools import lru_cache
 from functools import partial
 from typeguard import check_argument_types
 from typing import Optional
+from typing import Tuple
+from typing import Union
 
 import librosa
 import numpy as np
+import torch
+
+from espnet.nets.pytorch_backend.nets_utils import pad_list
 
 EPS = 1e-10
 
+is_torch_1_8_plus = LooseVersion(torch.__version__) >= LooseVersion("1.8.0")
+
 
 def logmel2linear(
     lmspc: np.ndarray,
@@ -44,11 +52,78 @@ def logmel2linear(
     fmin = 0 if fmin is None else fmin
     fmax = fs / 2 if fmax is None else fmax
     mspc = np.power(10.0, lmspc)
-    mel_basis = librosa.filters.mel(fs, n_fft, n_mels, fmin, fmax)
-    inv_mel_basis = np.linalg.pinv(mel_basis)
+    inv_mel_basis = _inv_mel_basis(fs, n_fft, n_mels, fmin, fmax)
     return np.maximum(EPS, np.dot(inv_mel_basis, mspc.T).T)
 
 
+@lru_cache(maxsize=8)
+def _inv_mel_basis(
+    fs: int, n_fft: int, n_mels: int, fmin: float, fmax: float
+) -> np.ndarray:
+    mel_basis = librosa.filters.mel(
+        sr=fs, n_fft=n_fft, n_mels=n_mels, fmin=fmin, fmax=fmax
+    )
+    return np.linalg.pinv(mel_basis)
+
+
+@lru_cache(maxsize=8)
+def _inv_mel_basis_tensor(
+    fs: int,
+    n_fft: int,
+    n_mels: int,
+    fmin: float,
+    fmax: float,
+    device: torch.device,
+    dtype: torch.dtype,
+) -> torch.Tensor:
+    return torch.tensor(
+        _inv_mel_basis(fs, n_fft, n_mels, fmin, fmax).T, device=device, dtype=dtype
+    )
+
+
+@lru_cache(maxsize=8)
+def _window_tensor(
+    window: Optional[str],
+    win_length: int,
+    device: torch.device,
+    dtype: torch.dtype,
+) -> torch.Tensor:
+    if window is None:
+        return torch.ones(win_length, device=device, dtype=dtype)
+    return getattr(torch, f"{window}_window")(win_length, device=device, dtype=dtype)
+
+
+def logmel2linear_batch(
+    lmspc: torch.Tensor,
+    fs: int,
+    n_fft: int,
+    n_mels: int,
+    fmin: int = None,
+    fmax: int = None,
+) -> torch.Tensor:
+    """Convert log Mel filterbank to linear spectrogram in torch.
+
+    Args:
+        lmspc: Batch of log Mel filterbanks (B, T, n_mels).
+        fs: Sampling frequency.
+        n_fft: The number of FFT points.
+        n_mels: The number of mel basis.
+        f_min: Minimum frequency to analyze.
+        f_max: Maximum frequency to analyze.
+
+    Returns:
+        Batch of linear spectrograms (B, T, n_fft // 2 + 1).
+
+    """
+    assert lmspc.size(-1) == n_mels
+    fmin = 0 if fmin is None else fmin
+    fmax = fs / 2 if fmax is None else fmax
+    inv_mel_basis = _inv_mel_basis_tensor(
+        fs, n_fft, n_mels, fmin, fmax, lmspc.device, lmspc.dtype
+    )
+    return torch.clamp(torch.pow(10.0, lmspc) @ inv_mel_basis, min=EPS)
+
+
 def griffin_lim(
     spc: np.ndarray,
     n_fft: int,
@@ -105,6 +180,75 @@ def griffin_lim(
     return y
 
 
+def griffin_lim_batch(
+    spcs: torch.Tensor,
+    spcs_lengths: torch.Tensor,
+    n_fft: int,
+    n_shift: int,
+    win_length: int = None,
+    window: Optional[str] = "hann",
+    n_iter: int = 32,
+    momentum: float = 0.99,
+) -> Tuple[torch.Tensor, torch.Tensor]:
+    """Convert padded linear spectrograms into waveforms using fast Griffin-Lim.
+
+    This is the same algorithm as librosa.griffinlim with random initial phases.
+    The padded frames are regarded as silence, so the results are
+    slightly different from the ones of the unpadded spectrograms.
+
+    Args:
+        spcs: Batch of linear spectrograms (B, Tmax, n_fft // 2 + 1).
+        spcs_lengths: Batch of the number of frames (B,).
+        n_fft: The number of FFT points.
+        n_shift: Shift size in points.
+        win_length: Window length in points.
+        window: Window function type.
+        n_iter: The number of iterations.
+        momentum: The momentum of fast Griffin-Lim. 0 gives Griffin-Lim.
+
+    Returns:
+        Batch of reconstructed waveforms (B, Nmax).
+        Batch of the lengths of the waveforms (B,).
+
+    """
+    assert spcs.size(2) == n_fft // 2 + 1
+    if win_length is None:
+        win_length = n_fft
+    win = _window_tensor(window, win_length, spcs.device, spcs.dtype)
+    stft_kwargs = dict(
+        n_fft=n_fft, hop_length=n_shift, win_length=win_length, window=win
+    )
+    # Clamp for the empty spectrograms
+    wav_lengths = ((spcs_lengths - 1) * n_shift).clamp(min=0)
+    length = (spcs.size(1) - 1) * n_shift
+
+    # (B, F, T)
+    mags = spcs.abs().transpose(1, 2)
+    frame_masks = (
+        torch.arange(spcs.size(1), device=spcs.device)[None, :]
+        < spcs_lengths.to(spcs.device)[:, None]
+    )
+    mags = mags * frame_masks.unsqueeze(1).to(mags.dtype)
+
+    angles = torch.polar(
+        torch.ones_like(mags), 2 * np.pi * torch.rand_like(mags)
+    )  # (B, F, T)
+    rebuilt = torch.zeros_like(angles)
+    for _ in range(n_iter):
+        tprev = rebuilt
+        inverse = torch.istft(mags * angles, length=length, **stft_kwargs)
+        rebuilt = torch.stft(inverse, return_complex=True, **stft_kwargs)
+        angles = rebuilt - (momentum / (1 + momentum)) * tprev
+        angles = angles / (angles.abs() + 1e-16)
+
+    wavs = torch.istft(mags * angles, length=length, **stft_kwargs)
+    wav_masks = (
+        torch.arange(length, device=wavs.device)[None, :]
+        < wav_lengths.to(wavs.device)[:, None]
+    )
+    return wavs * wav_masks.to(wavs.dtype), wav_lengths
+
+
 # TODO(kan-bayashi): write as torch.nn.Module
 class Spectrogram2Waveform(object):
     """Spectrogram to waveform conversion module."""
@@ -120,6 +264,7 @@ class Spectrogram2Waveform(object):
         fmin: int = None,
         fmax: int = None,
         griffin_lim_iters: Optional[int] = 32,
+        griffin_lim_momentum: float = 0.99,
     ):
         """Initialize module.
 
@@ -133,6 +278,8 @@ class Spectrogram2Waveform(object):
             f_min: Minimum frequency to analyze.
             f_max: Maximum frequency to analyze.
             griffin_lim_iters: The number of iterations.
+            griffin_lim_momentum: The momentum of fast Griffin-Lim,
+                which is used in the torch implementation.
 
         """
         assert check_argument_types()
@@ -152,12 +299,34 @@ class Spectrogram2Waveform(object):
             window=window,
             n_iter=griffin_lim_iters,
         )
+        self.logmel2linear_batch = (
+            partial(
+                logmel2linear_batch,
+                fs=fs,
+                n_fft=n_fft,
+                n_mels=n_mels,
+                fmin=fmin,
+                fmax=fmax,
+            )
+            if n_mels is not None
+            else None
+        )
+        self.griffin_lim_batch = partial(
+            griffin_lim_batch,
+            n_fft=n_fft,
+            n_shift=n_shift,
+            win_length=win_length,
+            window=window,
+            n_iter=griffin_lim_iters,
+            momentum=griffin_lim_momentum,
+        )
         self.params = dict(
             n_fft=n_fft,
             n_shift=n_shift,
             win_length=win_length,
             window=window,
             n_iter=griffin_lim_iters,
+            momentum=griffin_lim_momentum,
         )
         if n_mels is not None:
             self.params.update(fs=fs, n_mels=n_mels, fmin=fmin, fmax=fmax)
@@ -169,7 +338,7 @@ class Spectrogram2Waveform(object):
         retval += ")"
         return retval
 
-    def __call__(self, spc):
+    def __call__(self, spc: Union[np.ndarray, torch.Tensor]):
         """Convert spectrogram to waveform.
 
         Args:
@@ -177,9 +346,49 @@ class Spectrogram2Waveform(object):
                 or linear spectrogram (T, n_fft // 2 + 1).
 
         Returns:
-            Reconstructed waveform (N,).
+            Reconstructed waveform (N,). The type is the same as the input.
 
         """
-        if self.logmel2linear is not None:
-            spc = self.logmel2linear(spc)
-        return self.griffin_lim(spc)
+        if not is_torch_1_8_plus or len(spc) <= 1:
+            # NOTE: griffin_lim() uses center=False for a single frame
+            is_tensor = isinstance(spc, torch.Tensor)
+            if is_tensor:
+                spc = spc.cpu().numpy()
+            if self.logmel2linear is not None:
+                spc = self.logmel2linear(spc)
+            wav = self.griffin_lim(spc)
+            return torch.from_numpy(wav) if is_tensor else wav
+
+        if isinstance(spc, np.ndarray):
+            spcs = torch.from_numpy(spc).unsqueeze(0)
+            wavs, _ = self.batch(spcs, torch.tensor([len(spc)]))
+            return wavs[0].numpy()
+        wavs, _ = self.batch(spc.unsqueeze(0), torch.tensor([len(spc)]))
+        return wavs[0]
+
+    def batch(
+        self, spcs: torch.Tensor, spcs_lengths: torch.Tensor
+    ) -> Tuple[torch.Tensor, torch.Tensor]:
+        """Convert padded spectrograms to waveforms.
+
+        Args:
+            spcs: Batch of log Mel filterbanks (B, Tmax, n_mels)
+                or linear spectrograms (B, Tmax, n_fft // 2 + 1).
+            spcs_lengths: Batch of the number of frames (B,).
+
+        Returns:
+            Batch of reconstructed waveforms (B, Nmax).
+            Batch of the lengths of the waveforms (B,).
+
+        """
+        if not is_torch_1_8_plus:
+            wavs = [
+                self(spc[:length]).cpu()
+                for spc, length in zip(spcs, spcs_lengths.tolist())
+            ]
+            wavs_lengths = torch.tensor([len(wav) for wav in wavs])
+            return pad_list(wavs, 0.0), wavs_lengths
+
+        if self.logmel2linear_batch is not None:
+            spcs = self.logmel2linear_batch(spcs)
+        return self.griffin_lim_batch(spcs, spcs_lengths)
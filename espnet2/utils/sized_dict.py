@@ -1,6 +1,10 @@
 import collections
+from multiprocessing.managers import BaseManager
 import sys
+import threading
 
+import numpy as np
+import torch
 from torch import multiprocessing
 
 
@@ -73,3 +77,205 @@ class SizedDict(collections.abc.MutableMapping):
 
     def __len__(self):
         return len(self.cache)
+
+
+def get_nbytes(obj) -> int:
+    """Returns the size of the array payload of the object in bytes
+
+    Unlike get_size(), the contents of ndarray and Tensor are counted by
+    their nbytes without walking their Python attributes,
+    so this is cheap enough to be called for every insertion.
+
+    """
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    elif isinstance(obj, torch.Tensor):
+        return obj.element_size() * obj.nelement()
+    elif isinstance(obj, dict):
+        return sum(get_nbytes(k) + get_nbytes(v) for k, v in obj.items())
+    elif isinstance(obj, (list, set, tuple)):
+        return sum(get_nbytes(i) for i in obj)
+    else:
+        return sys.getsizeof(obj)
+
+
+class _CacheStore:
+    """Key-value store bounded by the total size of the values
+
+    If shared, the instance lives in the manager process and
+    its methods are invoked via a proxy from the other processes.
+
+    """
+
+    def __init__(self, max_size: float, policy: str = "lru"):
+        if policy not in ("lru", "lfu"):
+            raise ValueError(f"policy must be 'lru' or 'lfu': {policy}")
+        self.max_size = max_size
+        self.policy = policy
+        # The order of this dict is the order of the last access time
+        self.data = collections.OrderedDict()
+        self.sizes = {}
+        self.counts = {}
+        # For LFU, the keys are grouped by the access counts and each group is
+        # ordered by the last access time: {count: OrderedDict(key: None)}
+        self.buckets = {}
+        self.min_count = 0
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self.lock:
+            if key not in self.data:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self.data.move_to_end(key)
+            self._count_up(key)
+            return self.data[key]
+
+    def put(self, key, value, size: int) -> bool:
+        with self.lock:
+            if key in self.data:
+                self._remove(key)
+            if size > self.max_size:
+                return False
+            while self.size + size > self.max_size:
+                self._evict()
+            self.data[key] = value
+            self.sizes[key] = size
+            self.counts[key] = 1
+            self.buckets.setdefault(1, collections.OrderedDict())[key] = None
+            self.min_count = 1
+            self.size += size
+            return True
+
+    def delete(self, key):
+        with self.lock:
+            self._remove(key)
+
+    def contains(self, key) -> bool:
+        with self.lock:
+            return key in self.data
+
+    def keys(self) -> list:
+        with self.lock:
+            return list(self.data)
+
+    def stats(self) -> dict:
+        with self.lock:
+            return dict(
+                hits=self.hits,
+                misses=self.misses,
+                size=self.size,
+                num_entries=len(self.data),
+            )
+
+    def _count_up(self, key):
+        count = self.counts[key]
+        bucket = self.buckets[count]
+        del bucket[key]
+        if len(bucket) == 0:
+            del self.buckets[count]
+            if self.min_count == count:
+                self.min_count = count + 1
+        self.counts[key] = count + 1
+        self.buckets.setdefault(count + 1, collections.OrderedDict())[key] = None
+
+    def _remove(self, key):
+        del self.data[key]
+        count = self.counts.pop(key)
+        bucket = self.buckets[count]
+        del bucket[key]
+        if len(bucket) == 0:
+            del self.buckets[count]
+            if self.min_count == count:
+                # Rarely happens except for the eviction, which inserts a new one
+                self.min_count = min(self.buckets) if len(self.buckets) > 0 else 0
+        self.size -= self.sizes.pop(key)
+
+    def _evict(self):
+        if self.policy == "lru":
+            key = next(iter(self.data))
+        else:
+            # Select the least frequently used one.
+            # The least recently used one is selected among the ties
+            key = next(iter(self.buckets[self.min_count]))
+        self._remove(key)
+
+
+class _CacheManager(BaseManager):
+    pass
+
+
+_CacheManager.register("CacheStore", _CacheStore)
+
+
+class SizedCache(collections.abc.MutableMapping):
+    """Dict-like cache bounded by the total nbytes of the values
+
+    The entries are evicted in LRU or LFU order when the total size
+    exceeds max_size, and the number of hits and misses are counted.
+
+    If shared, the store lives in a manager process, so that the entries are
+    shared among the worker processes of DataLoader. The ndarrays are pickled
+    for each access as Manager().dict() does. They are not moved to
+    the shared memory as torch.Tensor because each of them would keep
+    a file descriptor open and the manager would hit "ulimit -n" soon.
+    Use shared=False if the dataset is read only in the main process,
+    i.e. num_workers == 0, to avoid the round trip to the manager.
+
+    Examples:
+        >>> cache = SizedCache(max_size=1000)
+        >>> cache["a"] = {"speech": np.zeros(100, dtype=np.float32)}
+        >>> cache.get("a")
+        {'speech': array([0., 0., ..., 0.], dtype=float32)}
+        >>> cache.get("b")
+        >>> cache.stats()["hits"], cache.stats()["misses"]
+        (1, 1)
+
+    """
+
+    def __init__(self, max_size: float, policy: str = "lru", shared: bool = False):
+        self.shared = shared
+        if shared:
+            # NOTE: The proxy object keeps the reference of the manager
+            manager = _CacheManager()
+            manager.start()
+            self.store = manager.CacheStore(max_size, policy)
+        else:
+            self.store = _CacheStore(max_size, policy)
+
+    def get(self, key, default=None):
+        return self.store.get(key, default)
+
+    def stats(self) -> dict:
+        """Returns the counters of hits and misses and the current size"""
+        return self.store.stats()
+
+    @property
+    def size(self) -> int:
+        return self.stats()["size"]
+
+    def __setitem__(self, key, value):
+        size = get_nbytes(key) + get_nbytes(value)
+        self.store.put(key, value, size)
+
+    def __getitem__(self, key):
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __delitem__(self, key):
+        self.store.delete(key)
+
+    def __iter__(self):
+        return iter(self.store.keys())
+
+    def __contains__(self, key):
+        return self.store.contains(key)
+
+    def __len__(self):
+        return self.stats()["num_entries"]
@@ -182,3 +182,35 @@ def test_TransformerDecoder_batch_beam_search(
             maxlenratio=0.0,
             minlenratio=0.0,
         )
+
+
+@pytest.mark.parametrize("normalize_before", [True, False])
+@pytest.mark.parametrize("concat_after", [True, False])
+def test_TransformerDecoder_kv_cache(normalize_before, concat_after):
+    vocab_size = 6
+    decoder = TransformerDecoder(
+        vocab_size=vocab_size,
+        encoder_output_size=4,
+        normalize_before=normalize_before,
+        concat_after=concat_after,
+        linear_units=10,
+        num_blocks=2,
+    )
+    decoder.eval()
+    assert decoder.use_kv_cache
+
+    n_batch = 3
+    ys = torch.randint(vocab_size, (n_batch, 5))
+    enc = torch.randn(n_batch, 10, 4)
+    with torch.no_grad():
+        ys_out, _ = decoder(enc, torch.tensor([10, 8, 6]), ys, torch.tensor([5] * 3))
+        states = [None] * n_batch
+        for i in range(1, ys.size(1) + 1):
+            logp, states = decoder.batch_score_padded(
+                ys[:, :i], states, enc, torch.tensor([10, 8, 6])
+            )
+            torch.testing.assert_allclose(
+                logp, torch.log_softmax(ys_out[:, i - 1], dim=-1)
+            )
+    # keys and values for each token are cached in each layer
+    assert states[0][0].shape == (4, 5, 2)
@@ -4,11 +4,13 @@ import string
 
 import numpy as np
 import pytest
+import torch
 
 from espnet.nets.beam_search import Hypothesis
 from espnet2.bin.asr_inference import get_parser
 from espnet2.bin.asr_inference import main
 from espnet2.bin.asr_inference import Speech2Text
+from espnet2.bin.asr_inference import Speech2TextStreaming
 from espnet2.tasks.asr import ASRTask
 from espnet2.tasks.lm import LMTask
 
@@ -80,3 +82,174 @@ def test_Speech2Text(asr_config_file, lm_config_file):
         assert isinstance(token[0], str)
         assert isinstance(token_int[0], int)
         assert isinstance(hyp, Hypothesis)
+
+
+@pytest.fixture()
+def asr_transformer_config_file(tmp_path: Path, token_list):
+    # Write default configuration file
+    ASRTask.main(
+        cmd=[
+            "--dry_run",
+            "true",
+            "--output_dir",
+            str(tmp_path / "asr_transformer"),
+            "--token_list",
+            str(token_list),
+            "--token_type",
+            "char",
+            "--decoder",
+            "transformer",
+        ]
+    )
+    return tmp_path / "asr_transformer" / "config.yaml"
+
+
+@pytest.mark.parametrize("use_transformer_decoder", [True, False])
+def test_Speech2Text_batch_decode(
+    asr_config_file, asr_transformer_config_file, use_transformer_decoder
+):
+    speech2text = Speech2Text(
+        asr_train_config=asr_transformer_config_file
+        if use_transformer_decoder
+        else asr_config_file,
+        beam_size=2,
+        batch_size=2,
+    )
+    speech = np.random.randn(2, 10000)
+    speech_lengths = np.array([8000, 10000])
+    results_list = speech2text.batch_decode(speech, speech_lengths)
+    assert len(results_list) == 2
+    for results in results_list:
+        for text, token, token_int, hyp in results:
+            assert isinstance(text, str)
+            assert isinstance(hyp, Hypothesis)
+
+
+@pytest.mark.parametrize("use_lm", [True, False])
+def test_Speech2Text_ctc_prefix_beam_search(asr_config_file, lm_config_file, use_lm):
+    speech2text = Speech2Text(
+        asr_train_config=asr_config_file,
+        lm_train_config=lm_config_file if use_lm else None,
+        beam_size=3,
+        ctc_weight=1.0,
+        ctc_prefix_beam_search=True,
+        nbest=2,
+    )
+    speech = np.random.randn(2, 10000)
+    speech_lengths = np.array([8000, 10000])
+    results_list = speech2text.batch_decode(speech, speech_lengths)
+    assert len(results_list) == 2
+    for i, results in enumerate(results_list):
+        desired = speech2text(speech[i, : speech_lengths[i]])
+        assert [r[2] for r in results] == [r[2] for r in desired]
+        for text, token, token_int, hyp in results:
+            assert isinstance(text, str)
+            assert isinstance(hyp, Hypothesis)
+
+
+def test_Speech2Text_ctc_prefix_beam_search_invalid_weight(asr_config_file):
+    with pytest.raises(ValueError):
+        Speech2Text(
+            asr_train_config=asr_config_file,
+            ctc_weight=0.5,
+            ctc_prefix_beam_search=True,
+        )
+
+
+@pytest.fixture()
+def asr_streaming_config_file(tmp_path: Path, token_list):
+    # Write default configuration file
+    ASRTask.main(
+        cmd=[
+            "--dry_run",
+            "true",
+            "--output_dir",
+            str(tmp_path / "asr_streaming"),
+            "--token_list",
+            str(token_list),
+            "--token_type",
+            "char",
+            "--normalize",
+            "none",
+            "--encoder",
+            "transformer",
+            "--encoder_conf",
+            "output_size=16",
+            "--encoder_conf",
+            "linear_units=16",
+            "--decoder",
+            "transformer",
+            "--decoder_conf",
+            "linear_units=16",
+        ]
+    )
+    return tmp_path / "asr_streaming" / "config.yaml"
+
+
+def test_Speech2TextStreaming_extract_feats(asr_streaming_config_file):
+    speech2text = Speech2Text(asr_train_config=asr_streaming_config_file)
+    session = Speech2TextStreaming(speech2text)
+    speech = torch.randn(10000)
+    desired, _ = speech2text.asr_model._extract_feats(
+        speech[None], torch.tensor([len(speech)])
+    )
+    feats = []
+    for i in range(0, len(speech), 100):
+        f = session._extract_feats(speech[i : i + 100], i + 100 >= len(speech))
+        if f is not None:
+            feats.append(f)
+    torch.testing.assert_allclose(torch.cat(feats), desired[0])
+
+
+@pytest.mark.parametrize("ctc_weight", [0.0, 0.5])
+def test_Speech2TextStreaming_whole_utterance(asr_streaming_config_file, ctc_weight):
+    speech2text = Speech2Text(
+        asr_train_config=asr_streaming_config_file, beam_size=2, ctc_weight=ctc_weight
+    )
+    session = Speech2TextStreaming(speech2text, block_size=1000)
+    speech = np.random.randn(10000)
+    # Equivalent to Speech2Text if the whole utterance is in a block
+    desired = speech2text(speech)
+    results = session(speech, is_final=True)
+    assert [r[2] for r in results] == [r[2] for r in desired]
+
+
+@pytest.mark.parametrize("ctc_weight", [0.0, 0.5, 1.0])
+def test_Speech2TextStreaming(asr_streaming_config_file, ctc_weight):
+    speech2text = Speech2Text(
+        asr_train_config=asr_streaming_config_file, beam_size=2, ctc_weight=ctc_weight
+    )
+    session = Speech2TextStreaming(speech2text, block_size=4, look_ahead=2)
+    speech = np.random.randn(20000)
+    for i in range(0, len(speech), 1600):
+        results = session(speech[i : i + 1600], is_final=i + 1600 >= len(speech))
+        for text, token, token_int, hyp in results:
+            assert isinstance(text, str)
+            assert isinstance(hyp, Hypothesis)
+    # The session is reset after the final chunk
+    assert session.encoder_out is None
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_Speech2TextStreaming_nbest(asr_streaming_config_file, seed):
+    torch.manual_seed(seed)
+    speech2text = Speech2Text(
+        asr_train_config=asr_streaming_config_file, beam_size=3, ctc_weight=0.0
+    )
+    # Make <eos> competitive to end some hypotheses earlier than the others
+    speech2text.asr_model.decoder.output_layer.bias.data[-1] += 1.0
+    session = Speech2TextStreaming(speech2text, block_size=1000)
+    speech = torch.randn(3000)
+    enc, _ = speech2text.asr_model.encode(speech[None], torch.tensor([len(speech)]))
+    desired = speech2text.beam_search(x=enc[0], maxlenratio=0.0, minlenratio=0.0)
+    assert len(set(len(h.yseq) for h in desired)) > 1
+
+    # Decode the encoder output as a non-final block and then the final one
+    session.encoder_out = enc[0]
+    session._decode(is_final=False)
+    session._decode(is_final=True)
+    nbest = sorted(session.ended_hyps, key=lambda h: h.score, reverse=True)
+    assert [h.yseq.tolist() for h in nbest] == [h.yseq.tolist() for h in desired]
+    np.testing.assert_allclose(
+        [float(h.score) for h in nbest], [float(h.score) for h in desired], rtol=1e-5
+    )
@@ -1,9 +1,15 @@
 from argparse import ArgumentParser
+from pathlib import Path
 
+import numpy as np
 import pytest
+import torch
 
 from espnet2.bin.enh_inference import get_parser
 from espnet2.bin.enh_inference import main
+from espnet2.fileio.sound_scp import SoundScpReader
+from espnet2.fileio.sound_scp import SoundScpWriter
+from espnet2.tasks.enh import EnhancementTask
 
 
 def test_get_parser():
@@ -13,3 +19,69 @@ def test_get_parser():
 def test_main():
     with pytest.raises(SystemExit):
         main()
+
+
+@pytest.fixture()
+def config_file(tmp_path: Path):
+    # Write default configuration file
+    EnhancementTask.main(
+        cmd=[
+            "--dry_run",
+            "true",
+            "--output_dir",
+            str(tmp_path / "enh"),
+        ]
+    )
+    config_file = tmp_path / "enh" / "config.yaml"
+    model, _ = EnhancementTask.build_model_from_file(config_file)
+    torch.save(model.state_dict(), tmp_path / "enh" / "model.pth")
+    return config_file
+
+
+@pytest.fixture()
+def mixture_scp(tmp_path: Path):
+    writer = SoundScpWriter(tmp_path / "wavs", tmp_path / "wav.scp")
+    rng = np.random.RandomState(0)
+    for key, length in [("a", 1600), ("b", 2000), ("c", 1200)]:
+        writer[key] = 8000, (rng.randn(length) * 0.1).astype(np.float32)
+    writer.close()
+    return tmp_path / "wav.scp"
+
+
+@pytest.mark.parametrize("normalize_output_wav", [True, False])
+def test_inference_batch(
+    tmp_path: Path, config_file, mixture_scp, normalize_output_wav
+):
+    def run(batch_size):
+        output_dir = tmp_path / f"out_bs{batch_size}"
+        main(
+            cmd=[
+                "--output_dir",
+                str(output_dir),
+                "--batch_size",
+                str(batch_size),
+                "--data_path_and_name_and_type",
+                f"{mixture_scp},speech_mix,sound",
+                "--enh_train_config",
+                str(config_file),
+                "--enh_model_file",
+                str(config_file.parent / "model.pth"),
+                "--normalize_output_wav",
+                str(normalize_output_wav),
+            ]
+        )
+        return SoundScpReader(output_dir / "spk1.scp", normalize=True)
+
+    reader1 = run(1)
+    reader2 = run(2)
+    for key, length in [("a", 1600), ("b", 2000), ("c", 1200)]:
+        _, w1 = reader1[key]
+        _, w2 = reader2[key]
+        # The outputs are trimmed to the length of each mixture
+        assert len(w1) == len(w2) == length
+        if normalize_output_wav:
+            # The outputs are normalized for each utterance
+            np.testing.assert_allclose(abs(w2).max(), 0.9, atol=1e-3)
+        else:
+            # The last STFT frames can differ due to the zero-padding
+            np.testing.assert_allclose(w1[:-512], w2[:-512], atol=1e-3)
@@ -1,9 +1,16 @@
 from argparse import ArgumentParser
+from pathlib import Path
 
+import numpy as np
 import pytest
+import soundfile as sf
+import torch
 
+from espnet2.bin.enh_scoring import batch_si_snr
 from espnet2.bin.enh_scoring import get_parser
 from espnet2.bin.enh_scoring import main
+from espnet2.bin.enh_scoring import scoring
+from espnet2.enh.espnet_model import ESPnetEnhancementModel
 
 
 def test_get_parser():
@@ -13,3 +20,73 @@ def test_get_parser():
 def test_main():
     with pytest.raises(SystemExit):
         main()
+
+
+@pytest.fixture()
+def scp_files(tmp_path: Path):
+    rng = np.random.RandomState(0)
+    ref_scp, inf_scp = [], []
+    for spk in range(2):
+        for name, scp_list in [("ref", ref_scp), ("inf", inf_scp)]:
+            scp = tmp_path / f"{name}{spk + 1}.scp"
+            with scp.open("w") as f:
+                for i, length in enumerate([8000, 6000, 7000]):
+                    wav = tmp_path / f"{name}{spk + 1}_utt{i}.wav"
+                    sf.write(wav, rng.uniform(-0.5, 0.5, length), 8000)
+                    f.write(f"utt{i} {wav}\n")
+            scp_list.append(str(scp))
+    return ref_scp, inf_scp
+
+
+def test_batch_si_snr():
+    rng = np.random.RandomState(0)
+    refs = [rng.randn(2, n) for n in [100, 80]]
+    # swap the speakers of the second utterance
+    infs = [refs[0] + 0.1 * rng.randn(2, 100), refs[1][::-1] + 0.1 * rng.randn(2, 80)]
+    scores = batch_si_snr(refs, infs)
+    for ref, inf, score, perm in zip(refs, infs, scores, [[0, 1], [1, 0]]):
+        expected = [
+            -ESPnetEnhancementModel.si_snr_loss_zeromean(
+                torch.from_numpy(ref[s][None]), torch.from_numpy(inf[t][None])
+            ).item()
+            for s, t in enumerate(perm)
+        ]
+        np.testing.assert_allclose(score, expected, rtol=1e-4)
+
+
+@pytest.mark.parametrize("scoring_type", ["bss_eval", "si_snr"])
+@pytest.mark.parametrize("num_workers, batch_size", [(0, 2), (2, 1)])
+def test_scoring(tmp_path: Path, scp_files, scoring_type, num_workers, batch_size):
+    ref_scp, inf_scp = scp_files
+    kwargs = dict(
+        dtype="float32",
+        log_level="INFO",
+        key_file=ref_scp[0],
+        ref_scp=ref_scp,
+        inf_scp=inf_scp,
+        ref_channel=0,
+        scoring_type=scoring_type,
+    )
+    scoring(output_dir=str(tmp_path / "serial"), **kwargs)
+    scoring(
+        output_dir=str(tmp_path / "parallel"),
+        num_workers=num_workers,
+        batch_size=batch_size,
+        prefetch_factor=1,
+        **kwargs,
+    )
+    names = ["SI_SNR"] if scoring_type == "si_snr" else ["STOI", "SDR", "SAR", "SIR"]
+    for name in names:
+        for spk in range(2):
+            serial = (tmp_path / "serial" / f"{name}_spk{spk + 1}").read_text()
+            parallel = (tmp_path / "parallel" / f"{name}_spk{spk + 1}").read_text()
+            assert [line.split()[0] for line in serial.splitlines()] == [
+                "utt0",
+                "utt1",
+                "utt2",
+            ]
+            np.testing.assert_allclose(
+                [float(line.split()[1]) for line in serial.splitlines()],
+                [float(line.split()[1]) for line in parallel.splitlines()],
+                rtol=1e-5,
+            )
@@ -0,0 +1,47 @@
+from argparse import ArgumentParser
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from espnet2.bin.pack_arrays import get_parser
+from espnet2.bin.pack_arrays import main
+from espnet2.fileio.npy_scp import NpyScpWriter
+from espnet2.fileio.packed_array import PackedArrayReader
+
+
+def test_get_parser():
+    assert isinstance(get_parser(), ArgumentParser)
+
+
+def test_main():
+    with pytest.raises(SystemExit):
+        main()
+
+
+def test_pack_arrays(tmp_path: Path):
+    desired = {}
+    scps = []
+    for n in range(2):
+        with NpyScpWriter(tmp_path / f"npy{n}", tmp_path / f"feats{n}.scp") as w:
+            for i in range(3):
+                key = f"utt{n}_{i}"
+                desired[key] = np.random.randn(i + 1, 4).astype(np.float32)
+                w[key] = desired[key]
+        scps.append(str(tmp_path / f"feats{n}.scp"))
+
+    main(
+        cmd=[
+            "--scps",
+            *scps,
+            "--output_dir",
+            str(tmp_path / "packed"),
+            "--shard_size",
+            "4",
+        ]
+    )
+    reader = PackedArrayReader(tmp_path / "packed")
+    assert len(reader.indices) == 2
+    assert sorted(reader) == sorted(desired)
+    for k, v in desired.items():
+        np.testing.assert_array_equal(reader[k], v)
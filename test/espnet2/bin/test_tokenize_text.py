@@ -13,3 +13,27 @@ def test_get_parser():
 def test_main():
     with pytest.raises(SystemExit):
         main()
+
+
+@pytest.mark.parametrize("num_workers", [0, 2])
+def test_tokenize(tmp_path, num_workers):
+    lines = [f"utt{i} hello world {i}" for i in range(25)]
+    (tmp_path / "text").write_text("".join(line + "\n" for line in lines))
+    main(
+        [
+            "--input",
+            str(tmp_path / "text"),
+            "--output",
+            str(tmp_path / "tokens"),
+            "--field",
+            "2-",
+            "--token_type",
+            "word",
+            "--num_workers",
+            str(num_workers),
+            "--chunk_size",
+            "4",
+        ]
+    )
+    expected = [line.split(maxsplit=1)[1] for line in lines]
+    assert (tmp_path / "tokens").read_text().splitlines() == expected
@@ -2,8 +2,11 @@ from argparse import ArgumentParser
 from pathlib import Path
 import string
 
+import numpy as np
 import pytest
+import torch
 
+from espnet.nets.pytorch_backend.nets_utils import pad_list
 from espnet2.bin.tts_inference import get_parser
 from espnet2.bin.tts_inference import main
 from espnet2.bin.tts_inference import Text2Speech
@@ -58,3 +61,62 @@ def test_Text2Speech(config_file):
     text2speech = Text2Speech(train_config=config_file)
     text = "aiueo"
     text2speech(text)
+
+
+@pytest.fixture()
+def fastspeech_config_file(tmp_path: Path, token_list):
+    # Write the statistics of 80-dim features for GlobalMVN
+    stats_file = tmp_path / "feats_stats.npz"
+    np.savez(
+        stats_file,
+        count=np.array(10),
+        sum=np.full(80, 5.0),
+        sum_square=np.full(80, 30.0),
+    )
+    # Write default configuration file
+    TTSTask.main(
+        cmd=[
+            "--dry_run",
+            "true",
+            "--output_dir",
+            str(tmp_path / "fastspeech"),
+            "--token_list",
+            str(token_list),
+            "--token_type",
+            "char",
+            "--cleaner",
+            "none",
+            "--g2p",
+            "none",
+            "--normalize",
+            "global_mvn",
+            "--normalize_conf",
+            f"stats_file={stats_file}",
+            "--tts",
+            "fastspeech",
+            "--tts_conf",
+            "adim=4",
+        ]
+    )
+    return tmp_path / "fastspeech" / "config.yaml"
+
+
+@pytest.mark.parametrize("speed_control_alpha", [1.0, 1.5])
+def test_Text2Speech_batch(fastspeech_config_file, speed_control_alpha):
+    text2speech = Text2Speech(
+        train_config=fastspeech_config_file, speed_control_alpha=speed_control_alpha
+    )
+    assert text2speech.use_batch_inference
+    texts = ["aiueo", "ab", "abcdefgh"]
+    tokens = [
+        torch.from_numpy(text2speech.preprocess_fn("<dummy>", {"text": t})["text"])
+        for t in texts
+    ]
+    text_lengths = torch.tensor([len(t) for t in tokens])
+    text = pad_list(tokens, 0)
+    wav, outs, outs_denorm, *_ = text2speech(text, text_lengths=text_lengths)
+    for i, t in enumerate(texts):
+        _, outs_i, outs_denorm_i, *_ = text2speech(t)
+        assert outs[i].shape == outs_i.shape
+        torch.testing.assert_allclose(outs[i], outs_i)
+        torch.testing.assert_allclose(outs_denorm[i], outs_denorm_i)
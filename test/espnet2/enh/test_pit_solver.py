@@ -0,0 +1,52 @@
+from itertools import permutations
+
+import pytest
+import torch
+
+from espnet2.enh.pit_solver import pairwise_loss
+from espnet2.enh.pit_solver import solve_pit
+
+
+def mse(ref, inf):
+    return ((ref - inf) ** 2).mean(dim=1)
+
+
+@pytest.mark.parametrize("num_spk", [1, 2, 3, 5])
+@pytest.mark.parametrize("max_exhaustive_spk", [0, 4])
+def test_solve_pit(num_spk, max_exhaustive_spk):
+    torch.manual_seed(0)
+    ref = [torch.randn(4, 10) for _ in range(num_spk)]
+    inf = [torch.randn(4, 10, requires_grad=True) for _ in range(num_spk)]
+    loss, perm = solve_pit(
+        pairwise_loss(ref, inf, mse), max_exhaustive_spk=max_exhaustive_spk
+    )
+    assert perm.shape == (4, num_spk)
+
+    # brute force
+    losses = torch.stack(
+        [
+            sum(mse(ref[s], inf[t]) for s, t in enumerate(p)) / num_spk
+            for p in permutations(range(num_spk))
+        ],
+        dim=1,
+    )
+    torch.testing.assert_allclose(loss, losses.min(dim=1)[0])
+    for b in range(4):
+        expected = sum(mse(ref[s], inf[t])[b] for s, t in enumerate(perm[b])) / num_spk
+        torch.testing.assert_allclose(loss[b], expected)
+
+    loss.mean().backward()
+    assert all(i.grad is not None for i in inf)
+
+
+def test_solve_pit_given_perm():
+    torch.manual_seed(0)
+    ref = [torch.randn(2, 10) for _ in range(3)]
+    inf = [torch.randn(2, 10) for _ in range(3)]
+    perm = torch.tensor([[2, 0, 1], [0, 1, 2]])
+    loss, perm_out = solve_pit(pairwise_loss(ref, inf, mse), perm=perm)
+    assert (perm_out == perm).all()
+    torch.testing.assert_allclose(
+        loss[0],
+        (mse(ref[0], inf[2]) + mse(ref[1], inf[0]) + mse(ref[2], inf[1]))[0] / 3,
+    )
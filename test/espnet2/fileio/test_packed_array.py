@@ -0,0 +1,84 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from espnet2.fileio.packed_array import PackedArrayReader
+from espnet2.fileio.packed_array import PackedArrayWriter
+
+
+@pytest.mark.parametrize("shard_size", [1, 2, 10])
+def test_PackedArrayWriter(tmp_path: Path, shard_size):
+    desired = {
+        "abc": np.random.randn(1),
+        "def": np.random.randn(1, 1, 10),
+        "a": np.random.randint(0, 10, (3, 4)).astype(np.int16),
+        "empty": np.zeros((0, 5), dtype=np.float32),
+        "xyz": np.asfortranarray(np.random.randn(5, 3).astype(np.float32)),
+    }
+    with PackedArrayWriter(tmp_path / "packed", shard_size=shard_size) as writer:
+        for k, v in desired.items():
+            writer[k] = v
+    target = PackedArrayReader(tmp_path / "packed")
+
+    for k in desired:
+        t = target[k]
+        d = desired[k]
+        assert t.dtype == d.dtype
+        np.testing.assert_array_equal(t, d)
+
+    assert len(target) == len(desired)
+    assert "abc" in target
+    assert "ghi" not in target
+    assert "abcdefghijkl" not in target
+    assert sorted(target) == sorted(desired)
+    with pytest.raises(KeyError):
+        target["ghi"]
+
+
+def test_PackedArrayWriter_duplicated(tmp_path: Path):
+    with pytest.raises(RuntimeError):
+        with PackedArrayWriter(tmp_path) as writer:
+            writer["a"] = np.zeros(1)
+            writer["a"] = np.zeros(1)
+
+
+def test_PackedArrayWriter_existing(tmp_path: Path):
+    with PackedArrayWriter(tmp_path) as writer:
+        writer["a"] = np.zeros(1)
+    with pytest.raises(RuntimeError):
+        PackedArrayWriter(tmp_path)
+
+
+def test_PackedArrayReader_not_found(tmp_path: Path):
+    with pytest.raises(FileNotFoundError):
+        PackedArrayReader(tmp_path)
+
+
+def test_PackedArrayWriter_duplicated_between_shards(tmp_path: Path):
+    with pytest.raises(RuntimeError):
+        with PackedArrayWriter(tmp_path, shard_size=1) as writer:
+            writer["a"] = np.zeros(1)
+            writer["a"] = np.zeros(1)
+
+
+@pytest.mark.parametrize("duplicated", [False, True])
+def test_PackedArrayReader_without_global_index(tmp_path: Path, duplicated):
+    desired = {f"utt{i}": np.full(i + 1, i) for i in range(5)}
+    for i, (k, v) in enumerate(desired.items()):
+        with PackedArrayWriter(tmp_path / str(i)) as writer:
+            writer[k] = v
+            if duplicated:
+                writer["dup"] = v
+        # Gather the shards written separately
+        (tmp_path / str(i) / "shard.0.bin").rename(tmp_path / f"shard.{i}.bin")
+        (tmp_path / str(i) / "shard.0.idx.npy").rename(tmp_path / f"shard.{i}.idx.npy")
+
+    if duplicated:
+        with pytest.raises(RuntimeError):
+            PackedArrayReader(tmp_path)
+    else:
+        target = PackedArrayReader(tmp_path)
+        for k, v in desired.items():
+            np.testing.assert_array_equal(target[k], v)
+        assert "utt10" not in target
@@ -4,7 +4,9 @@ import numpy as np
 import pytest
 
 from espnet2.fileio.read_text import load_num_sequence_text
+from espnet2.fileio.read_text import NumSequenceTextReader
 from espnet2.fileio.read_text import read_2column_text
+from espnet2.fileio.read_text import TwoColumnTextIndex
 
 
 def test_read_2column_text(tmp_path: Path):
@@ -52,3 +54,64 @@ def test_load_num_sequence_text_invalid(tmp_path: Path):
         f.write("abc 2 4\n")
     with pytest.raises(RuntimeError):
         load_num_sequence_text(p)
+
+
+@pytest.mark.parametrize("chunk_size", [4, 2**26])
+def test_TwoColumnTextIndex(tmp_path: Path, chunk_size):
+    p = tmp_path / "dummy.scp"
+    with p.open("w") as f:
+        f.write("def /some/path/b.wav\n")
+        f.write("abc /some/path/a.wav\n")
+        f.write("ghi\n")
+        f.write("jkl foo  bar ")
+    d = TwoColumnTextIndex(p, chunk_size=chunk_size)
+    assert d == read_2column_text(p)
+    assert list(d) == ["def", "abc", "ghi", "jkl"]
+    assert d["jkl"] == "foo  bar"
+    assert "abc" in d
+    assert "ab" not in d
+    assert "abcdefg" not in d
+    assert len(d) == 4
+    with pytest.raises(KeyError):
+        d["xyz"]
+
+
+def test_TwoColumnTextIndex_empty(tmp_path: Path):
+    p = tmp_path / "dummy.scp"
+    p.touch()
+    assert len(TwoColumnTextIndex(p)) == 0
+
+
+def test_TwoColumnTextIndex_duplicated(tmp_path: Path):
+    p = tmp_path / "dummy.scp"
+    with p.open("w") as f:
+        f.write("abc 1\n")
+        f.write("def 2\n")
+        f.write("abc 3\n")
+    with pytest.raises(RuntimeError):
+        TwoColumnTextIndex(p)
+
+
+@pytest.mark.parametrize(
+    "loader_type", ["text_int", "text_float", "csv_int", "csv_float"]
+)
+def test_NumSequenceTextReader(loader_type: str, tmp_path: Path):
+    p = tmp_path / "dummy.txt"
+    delimiter = "," if "csv" in loader_type else " "
+    with p.open("w") as f:
+        f.write("abc " + delimiter.join(["0", "1", "2"]) + "\n")
+        f.write("def " + delimiter.join(["3", "4", "5"]) + "\n")
+    target = NumSequenceTextReader(p, loader_type=loader_type)
+    desired = load_num_sequence_text(p, loader_type=loader_type)
+    assert list(target) == list(desired)
+    for k in desired:
+        np.testing.assert_array_equal(target[k], desired[k])
+
+
+def test_NumSequenceTextReader_invalid(tmp_path: Path):
+    p = tmp_path / "dummy.txt"
+    with p.open("w") as f:
+        f.write("abc 12.3.3.,4.44\n")
+    target = NumSequenceTextReader(p)
+    with pytest.raises(ValueError):
+        target["abc"]
@@ -65,3 +65,38 @@ def test_average_nbest_models_0epoch_reporter(output_dir, nbest):
             best_model_criterion=[("valid", "acc", "max")],
             nbest=nbest,
         )
+
+
+def test_average_nbest_models_values(tmp_path):
+    reporter = Reporter()
+    for epoch, (acc, loss) in enumerate([(0.4, 3.0), (0.6, 1.0), (0.5, 2.0)], 1):
+        reporter.set_epoch(epoch)
+        with reporter.observe("valid") as sub:
+            sub.register({"acc": acc, "loss": loss})
+            sub.next()
+        torch.save(
+            {"w": torch.full((2,), float(epoch)), "n": torch.tensor(epoch)},
+            tmp_path / f"{epoch}epoch.pth",
+        )
+
+    for _ in range(2):
+        average_nbest_models(
+            reporter=reporter,
+            output_dir=tmp_path,
+            best_model_criterion=[("valid", "acc", "max"), ("valid", "loss", "min")],
+            nbest=[1, 2, 3],
+        )
+        for cr in ["acc", "loss"]:
+            # The best epochs: [2, 3, 1] for both criterions
+            for n, expected in [(1, 2.0), (2, 2.5), (3, 2.0)]:
+                states = torch.load(tmp_path / f"valid.{cr}.ave_{n}best.pth")
+                torch.testing.assert_allclose(states["w"], torch.full((2,), expected))
+            # Integer values are accumulated
+            states = torch.load(tmp_path / f"valid.{cr}.ave.pth")
+            assert states["n"] == 6
+            # The checkpoints are not modified
+            for epoch in [1, 2, 3]:
+                states = torch.load(tmp_path / f"{epoch}epoch.pth")
+                assert (states["w"] == epoch).all()
+        # The averaged models for valid.acc are reused
+        assert (tmp_path / "valid.loss.ave_2best.pth").is_symlink()
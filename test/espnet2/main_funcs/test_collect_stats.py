@@ -0,0 +1,96 @@
+import numpy as np
+import pytest
+import torch
+
+from espnet2.main_funcs.collect_stats import collect_stats
+from espnet2.main_funcs.collect_stats import collect_stats_sharded
+from espnet2.train.abs_espnet_model import AbsESPnetModel
+
+
+class DummyModel(AbsESPnetModel):
+    def forward(self, x, x_lengths, **kwargs):
+        pass
+
+    def collect_feats(self, x, x_lengths, **kwargs):
+        return {"feats": x * 2, "feats_lengths": x_lengths}
+
+
+def make_data(keys):
+    rng = np.random.RandomState(0)
+    return {k: rng.randn(rng.randint(3, 10), 4).astype(np.float32) for k in keys}
+
+
+def build_iter(data, keys, batch_size=3):
+    batches = []
+    for i in range(0, len(keys), batch_size):
+        bkeys = keys[i : i + batch_size]
+        xs = [torch.from_numpy(data[k]) for k in bkeys]
+        batches.append(
+            (
+                bkeys,
+                {
+                    "x": torch.nn.utils.rnn.pad_sequence(xs, batch_first=True),
+                    "x_lengths": torch.tensor([len(x) for x in xs]),
+                },
+            )
+        )
+    return batches
+
+
+def build_iters(train_key_file, valid_key_file):
+    iters = []
+    for key_file in [train_key_file, valid_key_file]:
+        with open(key_file) as f:
+            keys = [line.strip() for line in f]
+        iters.append(build_iter(make_data(KEYS), keys))
+    return iters
+
+
+KEYS = [f"utt{i}" for i in range(7)]
+
+
+def check_stats(output_dir, data):
+    for mode in ["train", "valid"]:
+        stats = np.load(output_dir / mode / "feats_stats.npz")
+        feats = np.concatenate([2 * x for x in data.values()])
+        assert stats["count"] == len(feats)
+        np.testing.assert_allclose(stats["sum"], feats.sum(0), rtol=1e-5)
+        np.testing.assert_allclose(stats["sum_square"], (feats**2).sum(0), rtol=1e-5)
+        with (output_dir / mode / "x_shape").open() as f:
+            shapes = dict(line.split() for line in f)
+        assert shapes == {k: f"{len(x)},4" for k, x in data.items()}
+
+
+@pytest.mark.parametrize("write_collected_feats", [False, True])
+def test_collect_stats(tmp_path, write_collected_feats):
+    data = make_data(KEYS)
+    collect_stats(
+        model=DummyModel(),
+        train_iter=build_iter(data, KEYS),
+        valid_iter=build_iter(data, KEYS),
+        output_dir=tmp_path,
+        ngpu=0,
+        log_interval=None,
+        write_collected_feats=write_collected_feats,
+    )
+    check_stats(tmp_path, data)
+    if write_collected_feats:
+        feats = np.load(tmp_path / "train/collect_feats/data_feats/utt1.npy")
+        np.testing.assert_allclose(feats, 2 * data["utt1"])
+
+
+def test_collect_stats_sharded(tmp_path):
+    key_file = tmp_path / "keys"
+    key_file.write_text("".join(f"{k}\n" for k in KEYS))
+    collect_stats_sharded(
+        model=DummyModel(),
+        build_iters=build_iters,
+        train_key_file=key_file,
+        valid_key_file=key_file,
+        output_dir=tmp_path,
+        num_shards=3,
+        ngpu=0,
+        log_interval=None,
+        write_collected_feats=False,
+    )
+    check_stats(tmp_path, make_data(KEYS))
@@ -59,3 +59,27 @@ def test_build_batch_sampler_invalid_fold_lengths(shape_files):
             fold_lengths=[800, 40, 100],
             type="seq",
         )
+
+
+@pytest.mark.parametrize("type", ["folded", "length", "numel"])
+@pytest.mark.parametrize("world_size", [2, 3])
+@pytest.mark.parametrize("batch_bins", [1000, 60000])
+def test_build_batch_sampler_equal_iters_per_rank(
+    shape_files, type, world_size, batch_bins
+):
+    sampler = build_batch_sampler(
+        batch_bins=batch_bins,
+        batch_size=world_size,
+        shape_files=shape_files,
+        fold_lengths=[800, 40],
+        type=type,
+        min_batch_size=world_size,
+    )
+    batches = list(sampler)
+    # Each mini-batch is split between the ranks as the distributed mode of AbsTask
+    # and then all the ranks must have the same number of non-empty mini-batches
+    # so that the Trainer can skip the stop-flag synchronization
+    for rank in range(world_size):
+        per_rank = [batch[rank::world_size] for batch in batches]
+        assert len(per_rank) == len(batches)
+        assert all(len(b) > 0 for b in per_rank)
@@ -1,5 +1,8 @@
+import pickle
+
 import pytest
 
+from espnet2.text.phoneme_tokenizer import G2pCache
 from espnet2.text.phoneme_tokenizer import PhonemeTokenizer
 
 params = ["g2p_en", "g2p_en_no_space"]
@@ -105,3 +108,54 @@ def test_text2tokens(phoneme_tokenizer: PhonemeTokenizer):
 
 def test_token2text(phoneme_tokenizer: PhonemeTokenizer):
     assert phoneme_tokenizer.tokens2text(["a", "b", "c"]) == "abc"
+
+
+class CountingG2p:
+    def __init__(self):
+        self.num_calls = 0
+
+    def __call__(self, text):
+        self.num_calls += 1
+        return list(text.replace(" ", ""))
+
+
+def test_G2pCache_memory():
+    g2p = CountingG2p()
+    cache = G2pCache(g2p, "dummy", cache_size=2)
+    assert cache("ab c") == ["a", "b", "c"]
+    assert cache("ab c") == ["a", "b", "c"]
+    assert g2p.num_calls == 1
+
+    # The returned list can be modified
+    cache("ab c").append("d")
+    assert cache("ab c") == ["a", "b", "c"]
+
+    # "ab c" is the least recently used
+    cache("de")
+    cache("fg")
+    cache("ab c")
+    assert g2p.num_calls == 4
+
+
+def test_G2pCache_disk(tmp_path):
+    g2p = CountingG2p()
+    cache = G2pCache(g2p, "dummy", cache_size=0, cache_dir=tmp_path)
+    assert cache("ab c") == ["a", "b", "c"]
+    assert (tmp_path / "dummy.db").exists()
+
+    # Reuse the stored results after pickling
+    cache2 = pickle.loads(pickle.dumps(cache))
+    assert cache2("ab c") == ["a", "b", "c"]
+    assert cache2.g2p.num_calls == 1
+
+
+@pytest.mark.skipif("pypinyin_g2p" not in params, reason="Require pypinyin")
+def test_PhonemeTokenizer_g2p_cache(tmp_path):
+    tokenizer = PhonemeTokenizer(
+        g2p_type="pypinyin_g2p", g2p_cache_size=10, g2p_cache_dir=tmp_path
+    )
+    assert isinstance(tokenizer.g2p, G2pCache)
+    expected = PhonemeTokenizer(g2p_type="pypinyin_g2p").text2tokens("卡尔普")
+    assert tokenizer.text2tokens("卡尔普") == expected
+    assert tokenizer.text2tokens("卡尔普") == expected
+    assert (tmp_path / "pypinyin_g2p.db").exists()
@@ -0,0 +1,91 @@
+import numpy as np
+import pytest
+import torch
+from torch.utils.data import DataLoader
+
+from espnet2.torch_utils.device_prefetcher import DevicePrefetcher
+from espnet2.train.collate_fn import CommonCollateFn
+from espnet2.train.collate_fn import min_shared_memory_slabs
+
+
+def make_batches(n):
+    return [([f"utt{i}"], {"x": torch.full((2, 3), i), "y": [i]}) for i in range(n)]
+
+
+@pytest.mark.parametrize("num_prefetch", [1, 3])
+def test_DevicePrefetcher(num_prefetch):
+    batches = make_batches(5)
+    prefetcher = DevicePrefetcher(batches, "cpu", num_prefetch=num_prefetch)
+    assert len(prefetcher) == 5
+    outs = list(prefetcher)
+    assert [k for k, _ in outs] == [k for k, _ in batches]
+    for (_, b), (_, o) in zip(batches, outs):
+        assert torch.equal(b["x"], o["x"])
+        assert b["y"] == o["y"]
+    assert 0 <= prefetcher.queue_depth <= num_prefetch
+
+    # Can be iterated again
+    assert len(list(prefetcher)) == 5
+
+
+@pytest.mark.parametrize("num_prefetch", [1, 4])
+def test_DevicePrefetcher_shared_memory_slabs(num_prefetch):
+    data = [(f"utt{i}", {"x": np.full((3,), i, dtype=np.float32)}) for i in range(20)]
+    # The same number of the held batches as build_sequence_iter_factory()
+    collate_fn = CommonCollateFn(
+        shared_memory_slabs=min_shared_memory_slabs(1, num_prefetch + 3)
+    )
+    loader = DataLoader(data, batch_size=1, num_workers=1, collate_fn=collate_fn)
+    prev = None
+    for i, (keys, batch) in enumerate(
+        DevicePrefetcher(loader, "cpu", num_prefetch=num_prefetch)
+    ):
+        assert (batch["x"] == i).all()
+        if prev is not None:
+            assert (prev["x"] == i - 1).all()
+        prev = batch
+
+
+def test_DevicePrefetcher_exception():
+    def gen():
+        yield from make_batches(2)
+        raise ValueError("foo")
+
+    prefetcher = DevicePrefetcher(gen(), "cpu")
+    it = iter(prefetcher)
+    next(it)
+    next(it)
+    with pytest.raises(ValueError):
+        next(it)
+
+
+def test_DevicePrefetcher_dead_worker(monkeypatch):
+    # The worker thread exits without putting anything on the queue
+    monkeypatch.setattr(DevicePrefetcher, "_worker", lambda self, *args: None)
+    prefetcher = DevicePrefetcher(make_batches(2), "cpu")
+    it = iter(prefetcher)
+    with pytest.raises(RuntimeError):
+        next(it)
+    assert prefetcher._thread is None
+
+
+def test_DevicePrefetcher_close():
+    prefetcher = DevicePrefetcher(make_batches(100), "cpu", num_prefetch=1)
+    for i, _ in enumerate(prefetcher):
+        if i == 2:
+            break
+    prefetcher.close()
+    assert prefetcher._thread is None
+
+
+def test_DevicePrefetcher_invalid_num_prefetch():
+    with pytest.raises(ValueError):
+        DevicePrefetcher([], "cpu", num_prefetch=0)
+
+
+@pytest.mark.skipif(not torch.cuda.is_available(), reason="Require cuda")
+def test_DevicePrefetcher_cuda():
+    batches = make_batches(3)
+    for (_, b), (_, o) in zip(batches, DevicePrefetcher(batches, "cuda")):
+        assert o["x"].is_cuda
+        assert torch.equal(b["x"], o["x"].cpu())
@@ -1,8 +1,12 @@
+from collections import deque
+
 import numpy as np
 import pytest
+from torch.utils.data import DataLoader
 
 from espnet2.train.collate_fn import common_collate_fn
 from espnet2.train.collate_fn import CommonCollateFn
+from espnet2.train.collate_fn import min_shared_memory_slabs
 
 
 @pytest.mark.parametrize(
@@ -121,3 +125,61 @@ def test_CommonCollateFn_repr(float_pad_value, int_pad_value, not_sequence):
             not_sequence=not_sequence,
         )
     )
+
+
+def test_common_collate_fn_slab():
+    data = [
+        ("id", dict(a=np.random.randn(3, 5), b=np.random.randn(4).astype(np.long))),
+        ("id2", dict(a=np.random.randn(2, 5), b=np.random.randn(3).astype(np.long))),
+    ]
+    slab = {}
+    desired = common_collate_fn(data, int_pad_value=-1)
+    t = common_collate_fn(data, int_pad_value=-1, slab=slab)
+    for k in desired[1]:
+        np.testing.assert_array_equal(t[1][k], desired[1][k])
+    assert t[1]["a"].is_shared()
+
+    # The buffer is reused for a smaller batch
+    buffer = slab["a"]
+    t = common_collate_fn(data[1:], int_pad_value=-1, slab=slab)
+    assert slab["a"] is buffer
+    np.testing.assert_array_equal(t[1]["a"], data[1][1]["a"][None])
+
+
+def test_CommonCollateFn_shared_memory_slabs():
+    data = [
+        (f"id{i}", dict(a=np.random.randn(i + 1, 2).astype(np.float32)))
+        for i in range(8)
+    ]
+    batches = [[0, 1], [2, 3, 4], [5], [6, 7]]
+    collate_fn = CommonCollateFn(shared_memory_slabs=4)
+    loader = DataLoader(
+        dataset=data, batch_sampler=batches, num_workers=2, collate_fn=collate_fn
+    )
+    for batch, (keys, t) in zip(batches, loader):
+        desired = common_collate_fn([data[i] for i in batch])
+        assert keys == desired[0]
+        np.testing.assert_array_equal(t["a"], desired[1]["a"])
+        np.testing.assert_array_equal(t["a_lengths"], desired[1]["a_lengths"])
+
+
+@pytest.mark.parametrize("num_workers, num_held_batches", [(1, 1), (1, 4), (2, 4)])
+def test_CommonCollateFn_shared_memory_slabs_held_batches(
+    num_workers, num_held_batches
+):
+    data = [
+        (f"id{i}", dict(a=np.full((i % 3 + 1,), i, dtype=np.float32)))
+        for i in range(30)
+    ]
+    collate_fn = CommonCollateFn(
+        shared_memory_slabs=min_shared_memory_slabs(num_workers, num_held_batches)
+    )
+    loader = DataLoader(
+        dataset=data, batch_size=1, num_workers=num_workers, collate_fn=collate_fn
+    )
+    # The consumer keeps referring to the last batches
+    held = deque(maxlen=num_held_batches)
+    for i, (keys, t) in enumerate(loader):
+        held.append((i, t))
+        for j, t in held:
+            assert (t["a"] == j).all()
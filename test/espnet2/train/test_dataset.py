@@ -5,6 +5,7 @@ import pytest
 import soundfile
 
 from espnet2.fileio.npy_scp import NpyScpWriter
+from espnet2.fileio.packed_array import PackedArrayWriter
 from espnet2.fileio.sound_scp import SoundScpWriter
 from espnet2.train.dataset import ESPnetDataset
 
@@ -48,6 +49,25 @@ def test_ESPnetDataset_sound_scp(sound_scp):
     assert data["data1"].shape == (80000,)
 
 
+@pytest.mark.parametrize("shared_cache", [True, False])
+def test_ESPnetDataset_cache(sound_scp, shared_cache):
+    # Only one utterance can be kept in the cache
+    dataset = ESPnetDataset(
+        path_name_type_list=[(sound_scp, "data1", "sound")],
+        max_cache_size="700KB",
+        shared_cache=shared_cache,
+    )
+    assert dataset.cache.shared == shared_cache
+    _, data1 = dataset["a"]
+    _, data2 = dataset["a"]
+    np.testing.assert_array_equal(data1["data1"], data2["data1"])
+    _, data = dataset["b"]
+    assert data["data1"].shape == (80000,)
+    assert list(dataset.cache) == ["b"]
+    stats = dataset.cache.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 2)
+
+
 @pytest.fixture
 def pipe_wav(tmp_path):
     p = tmp_path / "wav.scp"
@@ -139,6 +159,31 @@ def test_ESPnetDataset_npy_scp(npy_scp):
     )
 
 
+@pytest.fixture
+def packed_dir(tmp_path):
+    p = tmp_path / "packed"
+    with PackedArrayWriter(p) as w:
+        w["a"] = np.random.randn(100, 80)
+        w["b"] = np.random.randn(150, 80)
+    return str(p)
+
+
+def test_ESPnetDataset_packed(packed_dir):
+    dataset = ESPnetDataset(
+        path_name_type_list=[(packed_dir, "data4", "packed")],
+        preprocess=preprocess,
+    )
+    print(dataset)
+    print(dataset.names())
+
+    _, data = dataset["a"]
+    assert data["data4"].shape == (100, 80)
+    assert data["data4"].dtype == np.float32
+
+    _, data = dataset["b"]
+    assert data["data4"].shape == (150, 80)
+
+
 @pytest.fixture
 def h5file_1(tmp_path):
     p = tmp_path / "file.h5"
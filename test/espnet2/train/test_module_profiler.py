@@ -0,0 +1,102 @@
+import pytest
+import torch
+
+from espnet2.train import module_profiler
+from espnet2.train.module_profiler import ModuleProfiler
+from espnet2.train.module_profiler import TraceWindow
+
+
+class Model(torch.nn.Module):
+    def __init__(self):
+        super().__init__()
+        self.frontend = torch.nn.Identity()
+        self.encoder = torch.nn.Sequential(torch.nn.Linear(3, 4), torch.nn.ReLU())
+        self.decoder = torch.nn.Linear(4, 1)
+
+    def forward(self, x):
+        return self.decoder(self.encoder(self.frontend(x))).sum()
+
+
+@pytest.mark.parametrize(
+    "use_record_function",
+    [
+        pytest.param(
+            True,
+            marks=pytest.mark.skipif(
+                not module_profiler.is_torch_1_4_plus,
+                reason="record_function requires pytorch>=1.4",
+            ),
+        ),
+        False,
+    ],
+)
+def test_ModuleProfiler(monkeypatch, use_record_function):
+    monkeypatch.setattr(module_profiler, "is_torch_1_4_plus", use_record_function)
+    model = Model()
+    profiler = ModuleProfiler(model, ["frontend", "encoder", "encoder.0", "decoder"])
+    model(torch.randn(2, 3)).backward()
+    stats = profiler.pop_stats()
+    for name in ["frontend", "encoder", "encoder.0", "decoder"]:
+        assert stats[f"{name}_forward_time"] >= 0
+    for name in ["encoder", "encoder.0", "decoder"]:
+        assert stats[f"{name}_backward_time"] >= 0
+    # The input of frontend doesn't require grad
+    assert "frontend_backward_time" not in stats
+    assert profiler.pop_stats() == {}
+
+    profiler.remove()
+    model(torch.randn(2, 3)).backward()
+    assert profiler.pop_stats() == {}
+
+
+def test_ModuleProfiler_accumulate():
+    model = Model()
+    profiler = ModuleProfiler(model, ["decoder"])
+    model(torch.randn(2, 3))
+    t1 = profiler.stats["decoder_forward_time"]
+    model(torch.randn(2, 3))
+    assert profiler.stats["decoder_forward_time"] > t1
+
+
+def test_ModuleProfiler_unknown_module():
+    with pytest.raises(ValueError):
+        ModuleProfiler(Model(), ["foo"])
+
+
+def test_ModuleProfiler_ddp_prefix():
+    class Wrapper(torch.nn.Module):
+        def __init__(self):
+            super().__init__()
+            self.module = Model()
+
+    ModuleProfiler(Wrapper(), ["encoder"]).remove()
+
+
+@pytest.mark.parametrize(
+    "use_torch_profiler",
+    [
+        pytest.param(
+            True,
+            marks=pytest.mark.skipif(
+                not module_profiler.is_torch_1_8_1_plus,
+                reason="torch.profiler requires pytorch>=1.8.1",
+            ),
+        ),
+        False,
+    ],
+)
+def test_TraceWindow(tmp_path, monkeypatch, use_torch_profiler):
+    monkeypatch.setattr(module_profiler, "is_torch_1_8_1_plus", use_torch_profiler)
+    path = tmp_path / "profile" / "trace.json"
+    trace = TraceWindow(2, 4, path)
+    model = Model()
+    for iiter in range(1, 6):
+        trace.step(iiter)
+        model(torch.randn(2, 3)).backward()
+    trace.close()
+    assert path.exists()
+
+
+def test_TraceWindow_invalid():
+    with pytest.raises(ValueError):
+        TraceWindow(3, 3, "trace.json")
@@ -464,3 +464,24 @@ def test_measure_iter_time():
     with reporter.observe("train", 2) as sub:
         for _ in sub.measure_iter_time(range(3), "foo"):
             sub.next()
+
+
+def test_measure_iter_time_queue_depth():
+    class DummyIterator:
+        def __init__(self):
+            self.queue_depth = 0
+
+        def __iter__(self):
+            return self
+
+        def __next__(self):
+            self.queue_depth += 1
+            if self.queue_depth > 3:
+                raise StopIteration
+            return self.queue_depth
+
+    reporter = Reporter()
+    with reporter.observe("train", 2) as sub:
+        for _ in sub.measure_iter_time(DummyIterator(), "foo"):
+            sub.next()
+    assert reporter.get_value("train", "prefetch_queue_depth") == 2
@@ -0,0 +1,180 @@
+from concurrent.futures.process import ProcessPoolExecutor
+
+import pytest
+import torch
+
+from espnet2.torch_utils.device_funcs import force_gatherable
+from espnet2.torch_utils.device_prefetcher import DevicePrefetcher
+from espnet2.train.abs_espnet_model import AbsESPnetModel
+from espnet2.train.reporter import Reporter
+from espnet2.train.trainer import Trainer
+from espnet2.train.trainer import TrainerOptions
+
+
+class DummyModel(AbsESPnetModel):
+    def __init__(self):
+        super().__init__()
+        self.linear = torch.nn.Linear(3, 1)
+        self.num_forward = 0
+
+    def forward(self, x):
+        self.num_forward += 1
+        loss = self.linear(x).pow(2).mean()
+        stats = {"loss": loss.detach()}
+        return force_gatherable((loss, stats, x.size(0)), loss.device)
+
+    def collect_feats(self, x):
+        return {}
+
+
+class FailingModel(DummyModel):
+    def forward(self, x):
+        if self.num_forward == 2:
+            raise RuntimeError("CUDA out of memory")
+        return super().forward(x)
+
+
+def make_options(**kwargs):
+    return TrainerOptions(
+        ngpu=0,
+        train_dtype="float32",
+        grad_noise=False,
+        accum_grad=1,
+        grad_clip=1.0,
+        grad_clip_type=2.0,
+        log_interval=None,
+        no_forward_run=False,
+        **kwargs,
+    )
+
+
+def run_one_epoch(rank, world_size, init_method, num_batches, iterable, **kwargs):
+    torch.distributed.init_process_group(
+        backend="gloo", init_method=init_method, world_size=world_size, rank=rank
+    )
+    try:
+        model = torch.nn.parallel.DistributedDataParallel(DummyModel())
+        batches = [([f"utt{i}"], {"x": torch.randn(2, 3)}) for i in range(num_batches)]
+        # iter() hides the length of the batches
+        iterator = batches if iterable else iter(batches)
+        options = make_options(**kwargs)
+        reporter = Reporter()
+        with reporter.observe("train") as sub:
+            Trainer.train_one_epoch(
+                model=model,
+                iterator=iterator,
+                optimizers=[torch.optim.SGD(model.parameters(), lr=0.1)],
+                schedulers=[None],
+                scaler=None,
+                reporter=sub,
+                summary_writer=None,
+                options=options,
+            )
+        return model.module.num_forward
+    finally:
+        torch.distributed.destroy_process_group()
+
+
+@pytest.mark.parametrize(
+    "num_batches, iterable, expected",
+    [
+        # Equal lengths: No stop-flag synchronization
+        ((4, 4), True, (4, 4)),
+        # Different lengths: Stopped by the shortest one
+        ((3, 5), True, (3, 3)),
+        # Unknown lengths
+        ((3, 5), False, (3, 3)),
+    ],
+)
+def test_train_one_epoch_distributed(tmp_path, num_batches, iterable, expected):
+    init_method = f"file://{tmp_path}/init"
+    with ProcessPoolExecutor(max_workers=2) as e:
+        futures = [
+            e.submit(run_one_epoch, rank, 2, init_method, n, iterable)
+            for rank, n in enumerate(num_batches)
+        ]
+        assert tuple(f.result(timeout=60) for f in futures) == expected
+
+
+def test_train_one_epoch_distributed_trace(tmp_path):
+    init_method = f"file://{tmp_path}/init"
+    with ProcessPoolExecutor(max_workers=2) as e:
+        futures = [
+            e.submit(
+                run_one_epoch,
+                rank,
+                2,
+                init_method,
+                3,
+                True,
+                profile_trace_iters=[1, 2],
+                output_dir=tmp_path,
+            )
+            for rank in range(2)
+        ]
+        for f in futures:
+            f.result(timeout=60)
+    # Each rank writes its own trace
+    assert (tmp_path / "profile" / "train.0ep.rank0.trace.json").exists()
+    assert (tmp_path / "profile" / "train.0ep.rank1.trace.json").exists()
+
+
+def test_train_one_epoch_profile(tmp_path):
+    model = DummyModel()
+    batches = [([f"utt{i}"], {"x": torch.randn(2, 3)}) for i in range(4)]
+    reporter = Reporter()
+    reporter.set_epoch(1)
+    with reporter.observe("train") as sub:
+        Trainer.train_one_epoch(
+            model=model,
+            iterator=batches,
+            optimizers=[torch.optim.SGD(model.parameters(), lr=0.1)],
+            schedulers=[None],
+            scaler=None,
+            reporter=sub,
+            summary_writer=None,
+            options=make_options(
+                profile_modules=["linear"],
+                profile_trace_iters=[2, 3],
+                output_dir=tmp_path,
+            ),
+        )
+    assert reporter.get_value("train", "linear_forward_time") > 0
+    assert reporter.get_value("train", "linear_backward_time") > 0
+    assert (tmp_path / "profile" / "train.1ep.trace.json").exists()
+
+
+def test_train_one_epoch_cleanup_on_error(tmp_path, monkeypatch):
+    prefetchers = []
+
+    def build_prefetcher(*args, **kwargs):
+        prefetchers.append(DevicePrefetcher(*args, **kwargs))
+        return prefetchers[-1]
+
+    monkeypatch.setattr("espnet2.train.trainer.DevicePrefetcher", build_prefetcher)
+    model = FailingModel()
+    batches = [([f"utt{i}"], {"x": torch.randn(2, 3)}) for i in range(8)]
+    reporter = Reporter()
+    reporter.set_epoch(1)
+    with pytest.raises(RuntimeError, match="out of memory"):
+        with reporter.observe("train") as sub:
+            Trainer.train_one_epoch(
+                model=model,
+                iterator=batches,
+                optimizers=[torch.optim.SGD(model.parameters(), lr=0.1)],
+                schedulers=[None],
+                scaler=None,
+                reporter=sub,
+                summary_writer=None,
+                options=make_options(
+                    prefetch_batches=2,
+                    profile_modules=["linear"],
+                    profile_trace_iters=[1, 5],
+                    output_dir=tmp_path,
+                ),
+            )
+    # The prefetch thread is stopped and the hooks are detached
+    assert prefetchers[0]._thread is None
+    assert len(model.linear._forward_pre_hooks) == 0
+    assert len(model.linear._forward_hooks) == 0
+    assert (tmp_path / "profile" / "train.1ep.trace.json").exists()
@@ -2,6 +2,7 @@ import pytest
 import torch
 
 from espnet2.tts.fastspeech2 import FastSpeech2
+from espnet2.tts.variance_predictor import VariancePredictor
 
 
 @pytest.mark.parametrize("reduction_factor", [1, 3])
@@ -100,3 +101,20 @@ def test_fastspeech2(
         inputs.update(pitch=torch.tensor([2, 2, 0], dtype=torch.float).unsqueeze(-1))
         inputs.update(energy=torch.tensor([2, 2, 0], dtype=torch.float).unsqueeze(-1))
         model.inference(**inputs, use_teacher_forcing=True)
+
+
+def test_variance_predictor_masks_padding_only_in_inference():
+    predictor = VariancePredictor(idim=4, n_layers=2, n_chans=4, kernel_size=3)
+    predictor.eval()
+    xs = torch.randn(1, 5, 4)
+    masks = torch.tensor([[False, False, False, True, True]]).unsqueeze(-1)
+    xs_noisy = xs.clone()
+    xs_noisy[:, 3:] = 100.0
+    with torch.no_grad():
+        ys = predictor(xs, masks, is_inference=True)
+        ys_noisy = predictor(xs_noisy, masks, is_inference=True)
+        torch.testing.assert_allclose(ys, ys_noisy)
+        # the training graph is left as is, so the padding leaks through the conv
+        ys = predictor(xs, masks)
+        ys_noisy = predictor(xs_noisy, masks)
+        assert not torch.allclose(ys, ys_noisy)
@@ -0,0 +1,83 @@
+import librosa
+import numpy as np
+import pytest
+import torch
+
+from espnet2.utils.griffin_lim import _window_tensor
+from espnet2.utils.griffin_lim import griffin_lim_batch
+from espnet2.utils.griffin_lim import is_torch_1_8_plus
+from espnet2.utils.griffin_lim import Spectrogram2Waveform
+
+pytestmark = pytest.mark.skipif(not is_torch_1_8_plus, reason="Require torch 1.8+")
+
+
+def make_spc(n_samples, n_fft=256, n_shift=64, seed=0):
+    t = np.arange(n_samples) / 8000
+    rng = np.random.RandomState(seed)
+    wav = np.sin(2 * np.pi * 440 * t) + 0.01 * rng.randn(n_samples)
+    return np.abs(librosa.stft(wav, n_fft=n_fft, hop_length=n_shift)).T.astype(
+        np.float32
+    )
+
+
+def spectral_convergence(wav, spc, n_fft=256, n_shift=64):
+    rebuilt = np.abs(librosa.stft(wav, n_fft=n_fft, hop_length=n_shift)).T
+    n = min(len(rebuilt), len(spc))
+    return np.linalg.norm(rebuilt[:n] - spc[:n]) / np.linalg.norm(spc[:n])
+
+
+def test_griffin_lim_batch():
+    torch.manual_seed(0)
+    spcs = [make_spc(4000), make_spc(2000, seed=1)]
+    lengths = torch.tensor([len(s) for s in spcs])
+    padded = torch.zeros(2, max(lengths), spcs[0].shape[1])
+    for i, s in enumerate(spcs):
+        padded[i, : len(s)] = torch.from_numpy(s)
+    wavs, wav_lengths = griffin_lim_batch(padded, lengths, 256, 64, n_iter=32)
+    assert wav_lengths.tolist() == [(len(s) - 1) * 64 for s in spcs]
+    assert wavs.shape == (2, wav_lengths.max())
+    assert (wavs[1, wav_lengths[1] :] == 0).all()
+
+    for wav, wlen, spc in zip(wavs, wav_lengths, spcs):
+        sc = spectral_convergence(wav[:wlen].numpy(), spc)
+        sc_librosa = spectral_convergence(
+            librosa.griffinlim(spc.T, n_iter=32, hop_length=64), spc
+        )
+        assert sc < max(2 * sc_librosa, 0.1)
+
+
+def test_griffin_lim_batch_empty():
+    spcs = torch.from_numpy(make_spc(2000))[None].repeat(2, 1, 1)
+    wavs, wav_lengths = griffin_lim_batch(
+        spcs, torch.tensor([10, 0]), 256, 64, n_iter=4
+    )
+    assert wav_lengths.tolist() == [9 * 64, 0]
+
+
+@pytest.mark.parametrize("n_mels", [None, 20])
+def test_Spectrogram2Waveform(n_mels):
+    spc2wav = Spectrogram2Waveform(
+        n_fft=256, n_shift=64, fs=8000, n_mels=n_mels, griffin_lim_iters=4
+    )
+    spc = make_spc(2000)
+    if n_mels is not None:
+        mel_basis = librosa.filters.mel(sr=8000, n_fft=256, n_mels=n_mels)
+        spc = np.log10(np.maximum(1e-10, spc @ mel_basis.T)).astype(np.float32)
+
+    wav = spc2wav(spc)
+    assert isinstance(wav, np.ndarray)
+    assert wav.shape == ((len(spc) - 1) * 64,)
+
+    wav = spc2wav(torch.from_numpy(spc))
+    assert isinstance(wav, torch.Tensor)
+    assert wav.shape == ((len(spc) - 1) * 64,)
+
+    spcs = torch.from_numpy(np.stack([spc, spc]))
+    wavs, wav_lengths = spc2wav.batch(spcs, torch.tensor([len(spc), len(spc) - 3]))
+    assert wav_lengths.tolist() == [(len(spc) - 1) * 64, (len(spc) - 4) * 64]
+
+
+def test_window_tensor_cache():
+    w1 = _window_tensor("hann", 256, torch.device("cpu"), torch.float32)
+    w2 = _window_tensor("hann", 256, torch.device("cpu"), torch.float32)
+    assert w1 is w2
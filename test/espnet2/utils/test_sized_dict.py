@@ -1,10 +1,19 @@
 import multiprocessing
 import sys
 
+try:
+    import resource
+except ImportError:
+    resource = None
+
 import numpy as np
+import pytest
+import torch
 import torch.multiprocessing
 
+from espnet2.utils.sized_dict import get_nbytes
 from espnet2.utils.sized_dict import get_size
+from espnet2.utils.sized_dict import SizedCache
 from espnet2.utils.sized_dict import SizedDict
 
 
@@ -68,3 +77,107 @@ def test_SizedDict_contains():
 def test_SizedDict_len():
     d = SizedDict(data={"a": 2, "b": 5, "c": 10})
     assert len(d) == 3
+
+
+def test_get_nbytes():
+    x = np.random.randn(10)
+    assert get_nbytes(x) == 80
+    assert get_nbytes(torch.randn(10)) == 40
+    assert get_nbytes({"a": x}) == sys.getsizeof("a") + 80
+
+
+@pytest.mark.parametrize("shared", [True, False])
+def test_SizedCache_lru(shared):
+    d = SizedCache(max_size=250, shared=shared)
+    d[0] = np.zeros(10)
+    d[1] = np.zeros(10)
+    assert d.get(0) is not None
+    # Evict the least recently used one
+    d[2] = np.zeros(10)
+    assert list(d) == [0, 2]
+    assert d.size == 2 * (sys.getsizeof(0) + 80)
+
+
+def test_SizedCache_lfu():
+    d = SizedCache(max_size=250, policy="lfu")
+    d[0] = np.zeros(10)
+    d[1] = np.zeros(10)
+    d.get(1)
+    d.get(1)
+    d.get(0)
+    # Evict the least frequently used one
+    d[2] = np.zeros(10)
+    assert sorted(d) == [1, 2]
+
+
+def test_SizedCache_lfu_random_operations():
+    np.random.seed(0)
+    d = SizedCache(max_size=4 * (sys.getsizeof(0) + 8), policy="lfu")
+    # Naive LFU for reference: {key: count} ordered by the last access time
+    counts = {}
+    for _ in range(500):
+        key = int(np.random.randint(8))
+        op = np.random.randint(3)
+        if op == 0:
+            assert (d.get(key) is not None) == (key in counts)
+            if key in counts:
+                counts[key] = counts.pop(key) + 1
+        elif op == 1:
+            counts.pop(key, None)
+            if len(counts) == 4:
+                min_count = min(counts.values())
+                del counts[next(k for k, c in counts.items() if c == min_count)]
+            d[key] = np.zeros(1)
+            counts[key] = 1
+        elif key in counts:
+            del d[key]
+            del counts[key]
+        assert sorted(d) == sorted(counts)
+
+
+def test_SizedCache_too_large():
+    d = SizedCache(max_size=50)
+    d["a"] = np.zeros(10)
+    assert "a" not in d
+    assert len(d) == 0
+
+
+def test_SizedCache_stats():
+    d = SizedCache(max_size=1000)
+    d["a"] = {"x": np.zeros(10)}
+    np.testing.assert_array_equal(d["a"]["x"], np.zeros(10))
+    assert d.get("b") is None
+    stats = d.stats()
+    assert (stats["hits"], stats["misses"], stats["num_entries"]) == (1, 1, 1)
+
+
+def _get(d, q):
+    q.put(d["a"]["x"].sum())
+
+
+def test_SizedCache_shared():
+    d = SizedCache(max_size=1000, shared=True)
+    d["a"] = {"x": np.ones(10, dtype=np.float32)}
+    assert isinstance(d["a"]["x"], np.ndarray)
+
+    mp = multiprocessing.get_context("forkserver")
+    q = mp.Queue()
+    p = mp.Process(target=_get, args=(d, q))
+    p.start()
+    p.join()
+    assert q.get() == 10
+    assert d.stats()["hits"] == 2
+
+
+@pytest.mark.skipif(resource is None, reason="Requires the resource module")
+def test_SizedCache_shared_many_entries_with_low_fd_limit():
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (min(256, hard), hard))
+    try:
+        d = SizedCache(max_size=1e9, shared=True)
+        for i in range(3000):
+            d[str(i)] = {"speech": np.full(10, i, dtype=np.float32)}
+        for i in range(3000):
+            np.testing.assert_array_equal(d[str(i)]["speech"], np.full(10, i))
+    finally:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (soft, hard))
@@ -189,3 +189,109 @@ def test_batch_beam_search_equal(
         numpy.testing.assert_allclose(
             expected.score.cpu(), actual.score.cpu(), rtol=1e-6
         )
+
+
+@pytest.mark.parametrize(
+    "ctc_weight, maxlenratio",
+    [(ctc, ratio) for ctc in (0.0, 0.5, 1.0) for ratio in (0.0, 0.5)],
+)
+def test_batch_beam_search_multi_utt_equal(ctc_weight, maxlenratio):
+    from espnet.nets.batch_beam_search_multi_utt import BatchBeamSearchMultiUtt
+    from espnet.nets.scorers.ctc import CTCPrefixScorer
+    from espnet2.asr.ctc import CTC
+    from espnet2.asr.decoder.transformer_decoder import TransformerDecoder
+    from espnet2.lm.seq_rnn_lm import SequentialRNNLM
+
+    torch.manual_seed(123)
+    vocab_size = 10
+    eos = vocab_size - 1
+    adim = 8
+    scorers = dict(
+        decoder=TransformerDecoder(vocab_size, adim, linear_units=8, num_blocks=2),
+        lm=SequentialRNNLM(vocab_size, unit=8, nlayers=1),
+        ctc=CTCPrefixScorer(CTC(vocab_size, adim), eos),
+        length_bonus=LengthBonus(vocab_size),
+    )
+    kwargs = dict(
+        beam_size=3,
+        vocab_size=vocab_size,
+        weights=dict(
+            decoder=1.0 - ctc_weight, ctc=ctc_weight, lm=0.3, length_bonus=0.1
+        ),
+        scorers=scorers,
+        sos=eos,
+        eos=eos,
+        pre_beam_score_key=None if ctc_weight == 1.0 else "full",
+    )
+    beam = BatchBeamSearch(**kwargs).eval()
+    multi_utt_beam = BatchBeamSearchMultiUtt(**kwargs).eval()
+
+    xs_lens = torch.tensor([7, 12, 5, 9])
+    xs = torch.randn(len(xs_lens), max(xs_lens), adim)
+    with torch.no_grad():
+        expected_list = [
+            beam(x=x[:xlen], maxlenratio=maxlenratio) for x, xlen in zip(xs, xs_lens)
+        ]
+        actual_list = multi_utt_beam.batch_forward(
+            xs=xs, xs_lens=xs_lens, maxlenratio=maxlenratio
+        )
+
+    assert len(expected_list) == len(actual_list)
+    for expected_nbest, actual_nbest in zip(expected_list, actual_list):
+        assert len(expected_nbest) == len(actual_nbest)
+        for expected, actual in zip(expected_nbest, actual_nbest):
+            assert expected.yseq.tolist() == actual.yseq.tolist()
+            numpy.testing.assert_allclose(
+                float(expected.score), float(actual.score), rtol=1e-5
+            )
+
+
+@pytest.mark.parametrize(
+    "ctc_weight, maxlenratio",
+    [(ctc, ratio) for ctc in (0.0, 0.5, 1.0) for ratio in (0.0, 0.5)],
+)
+def test_batch_beam_search_stacked_states_equal(ctc_weight, maxlenratio):
+    from espnet.nets.scorers.ctc import CTCPrefixScorer
+    from espnet2.asr.ctc import CTC
+    from espnet2.asr.decoder.transformer_decoder import TransformerDecoder
+    from espnet2.lm.transformer_lm import TransformerLM
+
+    class ListStateBatchBeamSearch(BatchBeamSearch):
+        use_stacked_states = False
+
+    torch.manual_seed(123)
+    vocab_size = 10
+    eos = vocab_size - 1
+    adim = 8
+    scorers = dict(
+        decoder=TransformerDecoder(vocab_size, adim, linear_units=8, num_blocks=2),
+        lm=TransformerLM(vocab_size, embed_unit=8, att_unit=8, head=2, unit=8, layer=2),
+        ctc=CTCPrefixScorer(CTC(vocab_size, adim), eos),
+        length_bonus=LengthBonus(vocab_size),
+    )
+    kwargs = dict(
+        beam_size=3,
+        vocab_size=vocab_size,
+        weights=dict(
+            decoder=1.0 - ctc_weight, ctc=ctc_weight, lm=0.3, length_bonus=0.1
+        ),
+        scorers=scorers,
+        sos=eos,
+        eos=eos,
+        pre_beam_score_key=None if ctc_weight == 1.0 else "full",
+    )
+    list_beam = ListStateBatchBeamSearch(**kwargs).eval()
+    beam = BatchBeamSearch(**kwargs).eval()
+    assert beam.use_stacked_states
+
+    x = torch.randn(12, adim)
+    with torch.no_grad():
+        list_nbest = list_beam(x=x, maxlenratio=maxlenratio)
+        nbest = beam(x=x, maxlenratio=maxlenratio)
+
+    assert len(list_nbest) == len(nbest)
+    for expected, actual in zip(list_nbest, nbest):
+        assert expected.yseq.tolist() == actual.yseq.tolist()
+        numpy.testing.assert_allclose(
+            float(expected.score), float(actual.score), rtol=1e-5
+        )
@@ -0,0 +1,118 @@
+from collections import defaultdict
+
+import numpy as np
+import pytest
+import torch
+
+from espnet.nets.ctc_prefix_beam_search import CTCPrefixBeamSearch
+from espnet.nets.pytorch_backend.lm.default import ClassifierWithState
+from espnet.nets.pytorch_backend.lm.default import RNNLM
+from espnet.nets.scorers.rnnlm import RNNLMScorer
+from espnet2.lm.seq_rnn_lm import SequentialRNNLM
+from espnet2.lm.transformer_lm import TransformerLM
+
+
+class IdentityCTC(torch.nn.Module):
+    def log_softmax(self, x):
+        return x
+
+
+def prefix_beam_search(logp, beam_size, lm=None, lm_weight=0.0, penalty=0.0):
+    """Naive CTC prefix beam search with dict for reference."""
+    sos = eos = logp.shape[1] - 1
+
+    def lm_score(prefix, end):
+        if lm is None:
+            return 0.0
+        ys = [sos] + list(prefix) + ([eos] if end else [])
+        score, state = 0.0, None
+        for i in range(1, len(ys)):
+            lp, state = lm.score(torch.tensor(ys[:i]), state, None)
+            score += float(lp[ys[i]])
+        return score
+
+    def total(prefix, p, end=False):
+        return (
+            np.logaddexp(*p) + lm_weight * lm_score(prefix, end) + penalty * len(prefix)
+        )
+
+    beams = {(): (0.0, -np.inf)}
+    for lp in logp:
+        next_beams = defaultdict(lambda: [-np.inf, -np.inf])
+        for prefix, (p_b, p_nb) in beams.items():
+            p = next_beams[prefix]
+            p[0] = np.logaddexp(p[0], np.logaddexp(p_b, p_nb) + lp[0])
+            if len(prefix) > 0:
+                p[1] = np.logaddexp(p[1], p_nb + lp[prefix[-1]])
+            for c in range(1, len(lp)):
+                src = (
+                    p_b
+                    if len(prefix) > 0 and prefix[-1] == c
+                    else np.logaddexp(p_b, p_nb)
+                )
+                p = next_beams[prefix + (c,)]
+                p[1] = np.logaddexp(p[1], src + lp[c])
+        beams = dict(sorted(next_beams.items(), key=lambda kv: -total(*kv))[:beam_size])
+    return sorted(
+        [(prefix, total(prefix, p, True)) for prefix, p in beams.items()],
+        key=lambda x: -x[1],
+    )
+
+
+@pytest.mark.parametrize("lm_type", [None, "transformer", "rnn", "legacy_rnn"])
+def test_ctc_prefix_beam_search(lm_type):
+    torch.manual_seed(0)
+    n_vocab = 6
+    xs_lens = torch.tensor([12, 7, 10])
+    xs = torch.randn(len(xs_lens), max(xs_lens), n_vocab, dtype=torch.float64)
+    xs = (xs * 2).log_softmax(dim=-1)
+    if lm_type == "transformer":
+        lm = TransformerLM(n_vocab, embed_unit=8, att_unit=8, head=2, unit=8, layer=2)
+    elif lm_type == "rnn":
+        lm = SequentialRNNLM(n_vocab, unit=8, nlayers=1)
+    elif lm_type == "legacy_rnn":
+        lm = ClassifierWithState(RNNLM(n_vocab, 2, 8))
+    else:
+        lm = None
+    if lm is not None:
+        lm.double().eval()
+    if lm_type == "legacy_rnn":
+        lm = RNNLMScorer(lm)
+    lm_weight = 0.0 if lm is None else 0.5
+
+    beam_search = CTCPrefixBeamSearch(
+        IdentityCTC(),
+        beam_size=3,
+        sos=n_vocab - 1,
+        eos=n_vocab - 1,
+        lm=lm,
+        lm_weight=lm_weight,
+        penalty=0.3,
+        pre_beam_size=n_vocab,
+    )
+    with torch.no_grad():
+        nbest_list = beam_search.batch_forward(xs, xs_lens)
+        desired_list = [
+            prefix_beam_search(
+                x[:xlen].numpy(), 3, lm=lm, lm_weight=lm_weight, penalty=0.3
+            )
+            for x, xlen in zip(xs, xs_lens)
+        ]
+
+    for nbest, desired in zip(nbest_list, desired_list):
+        assert len(nbest) == len(desired)
+        for hyp, (prefix, score) in zip(nbest, desired):
+            assert hyp.yseq.tolist() == [n_vocab - 1, *prefix, n_vocab - 1]
+            np.testing.assert_allclose(float(hyp.score), score, rtol=1e-6)
+
+
+def test_ctc_prefix_beam_search_single_utterance():
+    torch.manual_seed(0)
+    xs_lens = torch.tensor([20, 15])
+    xs = torch.randn(len(xs_lens), max(xs_lens), 10).log_softmax(dim=-1)
+    beam_search = CTCPrefixBeamSearch(IdentityCTC(), beam_size=4, sos=9, eos=9)
+    nbest_list = beam_search.batch_forward(xs, xs_lens)
+    for x, xlen, nbest in zip(xs, xs_lens, nbest_list):
+        desired = beam_search(x[:xlen])
+        assert [h.yseq.tolist() for h in nbest] == [h.yseq.tolist() for h in desired]
+        assert len(nbest) == 4
@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+import torch
+
+from espnet.nets.ctc_prefix_score import CTCPrefixScore
+from espnet.nets.ctc_prefix_score import CTCPrefixScoreTH
+
+
+def prepare(n_batch=2, n_frames=20, odim=6):
+    torch.manual_seed(0)
+    x = torch.randn(n_batch, n_frames, odim).log_softmax(dim=-1)
+    xlens = torch.tensor([n_frames - 5 * i for i in range(n_batch)])
+    return x, xlens
+
+
+@pytest.mark.parametrize("use_scoring_ids", [False, True])
+def test_ctc_prefix_score_th(use_scoring_ids):
+    x, xlens = prepare()
+    n_batch, _, odim = x.shape
+    n_hyps = 2
+    eos = odim - 1
+    scorer = CTCPrefixScoreTH(x, xlens, 0, eos)
+    refs = [
+        CTCPrefixScore(x[b, : xlens[b]].numpy(), 0, eos, np) for b in range(n_batch)
+    ]
+
+    ys = [[eos, 1], [eos, 2]] * n_batch
+    ref_states = [r.initial_state() for r in refs for _ in range(n_hyps)]
+    state = None
+    for y in ([[eos]] * (n_batch * n_hyps), ys):
+        if use_scoring_ids:
+            scoring_ids = torch.tensor([[1, 2, 3, eos]] * (n_batch * n_hyps))
+        else:
+            scoring_ids = None
+        scores, new_state = scorer(y, state, scoring_ids)
+
+        cs = np.arange(odim) if scoring_ids is None else scoring_ids[0].numpy()
+        for i, yi in enumerate(y):
+            ref_psi, _ = refs[i // n_hyps](np.array(yi), cs, ref_states[i])
+            psi = new_state[1][i, torch.as_tensor(cs)]
+            # exclude blank
+            np.testing.assert_allclose(psi[cs != 0], ref_psi[cs != 0], rtol=1e-4)
+
+        # select the hypotheses: (1, 2) for each utterance
+        best_ids = torch.tensor([[1, odim + 2]] * n_batch)
+        state = scorer.index_select_state(new_state, best_ids)
+        ref_states = [
+            refs[i // n_hyps](np.array([eos]), np.array([yi[-1]]), ref_states[i])[1][0]
+            for i, yi in enumerate(ys)
+        ]
+
+
+def test_ctc_prefix_score_th_window():
+    x, xlens = prepare(n_batch=1, n_frames=50)
+    odim = x.size(-1)
+    full = CTCPrefixScoreTH(x, xlens, 0, odim - 1)
+    windowed = CTCPrefixScoreTH(x, xlens, 0, odim - 1, margin=100)
+    y = [[odim - 1]] * 2
+    state_full = state_windowed = None
+    for _ in range(3):
+        scores_full, state_full = full(y, state_full)
+        scores_windowed, state_windowed = windowed(y, state_windowed)
+        # the window covers the whole utterance
+        torch.testing.assert_allclose(scores_windowed, scores_full)
+        best_ids = torch.tensor([[1, odim + 2]])
+        state_full = full.index_select_state(state_full, best_ids)
+        state_windowed = windowed.index_select_state(state_windowed, best_ids)
+        y = [y[0] + [1], y[1] + [2]]
+
+    # the forward probabilities out of the window aren't computed
+    narrow = CTCPrefixScoreTH(x, xlens, 0, odim - 1, margin=5)
+    scores, (r, _, f_min, f_max, _) = narrow([[odim - 1]] * 2, None)
+    assert (r[f_max + 5 :] == narrow.logzero).all()
+    assert torch.isfinite(scores).all()
@@ -136,6 +136,49 @@ def test_transformer_trainable_and_decodable(model_dict):
         print(nbest[0]["yseq"][1:-1])
 
 
+@pytest.mark.parametrize(
+    "model_dict",
+    [
+        ({"maskctc_n_iterations": 1, "maskctc_probability_threshold": 0.0}),
+        ({"maskctc_n_iterations": 2, "maskctc_probability_threshold": 0.5}),
+        ({"maskctc_n_iterations": 0, "maskctc_probability_threshold": 0.99}),
+    ],
+)
+def test_transformer_batch_decodable(model_dict):
+    # "linear" doesn't mix the padded frames into the encoder outputs
+    args = make_arg(transformer_input_layer="linear", **model_dict)
+    model, x, ilens, y, data = prepare(args)
+    recog_args = argparse.Namespace(
+        maskctc_n_iterations=args.maskctc_n_iterations,
+        maskctc_probability_threshold=args.maskctc_probability_threshold,
+    )
+
+    with torch.no_grad():
+        xs = [x[i, :ilen].numpy() for i, ilen in enumerate(ilens)]
+        nbest_list = model.recognize_maskctc_batch(xs, recog_args, args.char_list)
+        for x_i, nbest in zip(xs, nbest_list):
+            desired = model.recognize_maskctc(x_i, recog_args, args.char_list)
+            assert nbest[0]["yseq"] == desired[0]["yseq"]
+
+
+@pytest.mark.parametrize("use_scatter_reduce", [True, False])
+def test_segment_max(monkeypatch, use_scatter_reduce):
+    from espnet.nets.pytorch_backend import e2e_asr_transformer
+
+    monkeypatch.setattr(
+        e2e_asr_transformer,
+        "is_torch_1_12_plus",
+        use_scatter_reduce and e2e_asr_transformer.is_torch_1_12_plus,
+    )
+    probs = torch.rand(2, 6)
+    segment_ids = torch.tensor([[0, 0, 1, 2, 2, 2], [0, 1, 1, 1, 4, 4]])
+    out = e2e_asr_transformer._segment_max(probs, segment_ids, 5)
+    for b in range(2):
+        for i in range(5):
+            p = probs[b][segment_ids[b] == i]
+            assert out[b, i] == (p.max() if len(p) > 0 else -1.0)
+
+
 if __name__ == "__main__":
     test_transformer_trainable_and_decodable(
         {"maskctc_n_iterations": 0, "maskctc_probability_threshold": 0.5}
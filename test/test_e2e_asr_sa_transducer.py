@@ -173,6 +173,8 @@ def test_sa_transducer_mask(module):
         ({}, {"beam_size": 4}),
         ({}, {"beam_size": 4, "nbest": 4}),
         ({}, {"beam_size": 5, "score_norm_transducer": False}),
+        ({}, {"beam_size": 4, "transducer_search_type": "tsd"}),
+        ({}, {"beam_size": 4, "transducer_search_type": "tsd", "max_sym_exp": 3}),
         ({"num_save_attention": 1}, {}),
         ({"dropout_rate_encoder": 0.1, "dropout_rate_decoder": 0.1}, {}),
         ({"eunits": 16, "elayers": 2, "joint_dim": 2}, {}),
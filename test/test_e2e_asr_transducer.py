@@ -167,6 +167,8 @@ def prepare_inputs(backend, idim, odim, ilens, olens, is_cuda=False):
         ({"rnnt_mode": "rnnt-att"}, {"score_norm_transducer": False}),
         ({}, {"nbest": 2}),
         ({"rnnt_mode": "rnnt-att"}, {"nbest": 2}),
+        ({}, {"beam_size": 4, "transducer_search_type": "tsd"}),
+        ({"dtype": "gru"}, {"transducer_search_type": "tsd", "max_sym_exp": 3}),
         ({"beam_size": 1, "report_cer": True, "report_wer": True}, {}),
         (
             {
@@ -292,3 +294,27 @@ def test_pytorch_calculate_all_attentions(atype, backend="pytorch"):
 
     att_ws = model.calculate_all_attentions(*batch)[0]
     print(att_ws.shape)
+
+
+@pytest.mark.parametrize("dec_type", ["lstm", "gru", "transformer"])
+def test_transducer_batch_score(dec_type):
+    from espnet.nets.pytorch_backend.transducer.rnn_decoders import DecoderRNNT
+    from espnet.nets.pytorch_backend.transducer.transformer_decoder import Decoder
+
+    odim = 5
+    if dec_type == "transformer":
+        decoder = Decoder(odim, 8, attention_dim=8, attention_heads=2, num_blocks=2)
+    else:
+        decoder = DecoderRNNT(8, odim, dec_type, 2, 8, 0, 8, 8)
+    decoder.eval()
+
+    cache = {}
+    init_hyp = {"yseq": [0], "dec_state": decoder.init_state()}
+    _, states = decoder.batch_score([init_hyp], cache)
+    hyps = [{"yseq": [0, k], "dec_state": states[0]} for k in range(1, odim)]
+    # The outputs of the batch are same as the ones computed one by one
+    ys, _ = decoder.batch_score(hyps, cache)
+    for hyp, y in zip(hyps, ys):
+        y_single, _ = decoder.batch_score([hyp], {})
+        torch.testing.assert_allclose(y_single[0], y)
+    assert len(cache) == odim
@@ -253,3 +253,52 @@ def test_v0_3_transformer_input_compatibility():
     prefix = "decoder."
     rename_state_dict(prefix + "after_norm.", prefix + "output_norm.", state_dict)
     model.load_state_dict(state_dict)
+
+
+@pytest.mark.parametrize("beam_size", [1, 3])
+def test_transformer_pure_ctc_recognize(beam_size):
+    args = make_arg(mtlalpha=1.0, ctc_type="builtin")
+    model, x, ilens, y, data = prepare("pytorch", args)
+    model.eval()
+    recog_args = argparse.Namespace(
+        beam_size=beam_size,
+        penalty=0.0,
+        ctc_weight=1.0,
+        maxlenratio=0.0,
+        lm_weight=0,
+        minlenratio=0,
+        nbest=2,
+    )
+    with torch.no_grad():
+        nbest = model.recognize(x[0, : ilens[0]].numpy(), recog_args)
+    assert 1 <= len(nbest) <= min(beam_size, 2)
+    assert nbest[0]["yseq"][0] == model.sos
+    if beam_size > 1:
+        # N-best of CTC prefix beam search sorted by the scores
+        assert nbest[0]["yseq"][-1] == model.eos
+        assert nbest[0]["score"] >= nbest[-1]["score"]
+
+
+def test_transformer_pure_ctc_recognize_with_rnnlm():
+    from espnet.nets.pytorch_backend.lm.default import ClassifierWithState
+    from espnet.nets.pytorch_backend.lm.default import RNNLM
+
+    args = make_arg(mtlalpha=1.0, ctc_type="builtin")
+    model, x, ilens, y, data = prepare("pytorch", args)
+    model.eval()
+    rnnlm = ClassifierWithState(RNNLM(len(args.char_list), 2, 10))
+    rnnlm.eval()
+    recog_args = argparse.Namespace(
+        beam_size=3,
+        penalty=0.0,
+        ctc_weight=1.0,
+        maxlenratio=0.0,
+        lm_weight=0.5,
+        minlenratio=0,
+        nbest=3,
+    )
+    with torch.no_grad():
+        nbest = model.recognize(x[0, : ilens[0]].numpy(), recog_args, rnnlm=rnnlm)
+    # The LM scores are fused into the hypotheses
+    assert all("lm" in h["scores"] for h in nbest)
+    assert nbest[0]["score"] >= nbest[-1]["score"]
@@ -16,6 +16,7 @@ import pytest
 import torch
 
 from espnet.nets.pytorch_backend.e2e_tts_fastspeech import FeedForwardTransformer
+from espnet.nets.pytorch_backend.fastspeech.duration_predictor import DurationPredictor
 from espnet.nets.pytorch_backend.e2e_tts_tacotron2 import Tacotron2
 from espnet.nets.pytorch_backend.e2e_tts_transformer import Transformer
 from espnet.nets.pytorch_backend.fastspeech.duration_calculator import (
@@ -582,6 +583,40 @@ def test_length_regulator():
     xs_expand = length_regulator(xs, ds)
     assert int(xs_expand.shape[1]) == int(ds.sum(dim=-1).max())
 
+    # test with a sequence of all zero durations in the batch
+    ds[1] = 0
+    xs_expand, olens, _ = length_regulator(xs, ds, return_lengths=True)
+    assert (olens > 0).all()
+
+
+@pytest.mark.skipif(not is_torch_1_1_plus, reason="torch 1.1+ is required.")
+@pytest.mark.parametrize("alpha", [1.0, 0.7, 1.3])
+def test_length_regulator_batch(alpha):
+    # prepare inputs
+    idim = 5
+    ilens = [10, 5, 3]
+    xs = pad_list([torch.randn((ilen, idim)) for ilen in ilens], 0.0)
+    xs.requires_grad_(True)
+    ds = pad_list([torch.arange(ilen) % 4 for ilen in ilens], 0)
+
+    length_regulator = LengthRegulator(pad_value=-1.0)
+    xs_expand, olens, masks = length_regulator(xs, ds, alpha, return_lengths=True)
+
+    # the cumulative durations are scaled and rounded
+    cum_ds = torch.round(ds.cumsum(dim=1).float() * alpha).long()
+    expected_ds = torch.cat([cum_ds[:, :1], cum_ds[:, 1:] - cum_ds[:, :-1]], dim=1)
+    expected = pad_list(
+        [torch.repeat_interleave(x, d, dim=0) for x, d in zip(xs, expected_ds)],
+        -1.0,
+    )
+    np.testing.assert_array_equal(xs_expand.detach().numpy(), expected.detach().numpy())
+    assert olens.tolist() == expected_ds.sum(dim=1).tolist()
+    assert masks.sum(dim=1).tolist() == olens.tolist()
+    assert masks.shape == xs_expand.shape[:2]
+
+    xs_expand.masked_select(masks.unsqueeze(-1)).sum().backward()
+    assert xs.grad is not None
+
 
 @pytest.mark.skipif(not is_torch_1_1_plus, reason="torch 1.1+ is required.")
 def test_legacy_length_regulator():
@@ -663,3 +698,18 @@ def test_fastspeech_inference(alpha):
             inference_args,
             spemb=spemb,
         )
+
+
+def test_duration_predictor_masks_padding_only_in_inference():
+    predictor = DurationPredictor(idim=4, n_layers=2, n_chans=4, kernel_size=3)
+    predictor.eval()
+    xs = torch.randn(1, 5, 4)
+    masks = torch.tensor([[False, False, False, True, True]])
+    xs_noisy = xs.clone()
+    xs_noisy[:, 3:] = 100.0
+    with torch.no_grad():
+        assert torch.equal(
+            predictor.inference(xs, masks), predictor.inference(xs_noisy, masks)
+        )
+        # the training graph is left as is, so the padding leaks through the conv
+        assert not torch.allclose(predictor(xs, masks), predictor(xs_noisy, masks))
@@ -15,3 +15,71 @@ def test_ngram_build(test_sens):
     lm = kenlm.LanguageModel(os.path.join(root, "test.arpa"))
     assert isclose(lm.score(test_sens[0]), -1.04, rel_tol=0.01)
     assert isclose(lm.score(test_sens[1]), -1.18, rel_tol=0.01)
+
+
+def test_ngram_scorer_batch_score():
+    import torch
+
+    from espnet.nets.scorers.ngram import NgramFullScorer
+    from espnet.nets.scorers.ngram import NgramPartScorer
+
+    token_list = ["<blank>", "a", "e", "i", "<eos>"]
+    path = os.path.join(root, "beam_search_test.arpa")
+    full = NgramFullScorer(path, token_list)
+    part = NgramPartScorer(path, token_list)
+    x = torch.zeros(3, 2)
+    ys = torch.tensor([[4, 1, 2], [4, 2, 3], [4, 1, 2]])
+    states = [full.init_state(x) for _ in ys]
+
+    batch_scores, batch_states = full.batch_score(ys, states, x.expand(3, 3, 2))
+    assert batch_scores.shape == (3, len(token_list))
+    # The 1st and 3rd hypotheses share the context
+    assert len(full.cache) == 2
+    for y, state, score in zip(ys, states, batch_scores):
+        expected, _ = full.score(y, state, x)
+        torch.testing.assert_allclose(score, expected)
+        next_token = torch.tensor([3, 1])
+        partial, _ = part.score_partial(y, next_token, state, x)
+        torch.testing.assert_allclose(partial, expected[next_token])
+
+
+class CountingLM:
+    def __init__(self, lm):
+        self.lm = lm
+        self.num_calls = 0
+
+    def BaseScore(self, *args):
+        self.num_calls += 1
+        return self.lm.BaseScore(*args)
+
+
+def test_ngram_scorer_score_partial_cache(monkeypatch):
+    import torch
+
+    from espnet.nets.scorers.ngram import NgramFullScorer
+    from espnet.nets.scorers.ngram import NgramPartScorer
+
+    token_list = ["<blank>", "a", "e", "i", "<eos>"]
+    path = os.path.join(root, "beam_search_test.arpa")
+    full = NgramFullScorer(path, token_list)
+    part = NgramPartScorer(path, token_list)
+    x = torch.zeros(3, 2)
+    y = torch.tensor([4, 1, 2])
+    state = part.init_state(x)
+    expected, _ = full.score(y, state, x)
+
+    partial, _ = part.score_partial(y, torch.tensor([3, 1]), state, x)
+    torch.testing.assert_allclose(partial, expected[[3, 1]])
+    assert len(part.cache) == 1
+
+    # Only the tokens not scored yet for the context go to kenlm
+    lm = CountingLM(part.lm)
+    monkeypatch.setattr(part, "lm", lm)
+    partial, _ = part.score_partial(y, torch.tensor([1, 2, 3]), state, x)
+    torch.testing.assert_allclose(partial, expected[[1, 2, 3]])
+    # next_state() and the token "e"
+    assert lm.num_calls == 2
+    partial, _ = part.score_partial(y, torch.tensor([3, 2]), state, x)
+    torch.testing.assert_allclose(partial, expected[[3, 2]])
+    # next_state() only
+    assert lm.num_calls == 3